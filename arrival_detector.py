@@ -0,0 +1,145 @@
+"""到达检测：像 tail -f 一样增量读取 Minecraft 客户端日志
+
+Baritone 的提示会以聊天消息的形式写入 logs/latest.log，
+匹配"到达目标"和"寻路失败"消息后即可提前进入下一个点，
+配置中的等待时间则作为超时上限。
+"""
+import os
+import re
+import sys
+import time
+
+# Baritone 到达目标时的提示（需要开启 notificationOnPathComplete 或 chatDebug）
+DEFAULT_REACHED_PATTERNS = (
+    r"\[Baritone\].*(?:Pathing complete|Goal reached|All done\. At)",
+)
+# Baritone 寻路失败时的提示
+DEFAULT_FAILED_PATTERNS = (
+    r"\[Baritone\].*(?:Failed to compute path|Unable to find (?:any )?path|"
+    r"Path calculation failed|No path found)",
+)
+
+REACHED = "reached"
+FAILED = "failed"
+TIMEOUT = "timeout"
+STOPPED = "stopped"
+
+
+def default_log_path():
+    """返回默认的 Minecraft 客户端日志路径"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+        return os.path.join(base, ".minecraft", "logs", "latest.log")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/minecraft/logs/latest.log")
+    return os.path.expanduser("~/.minecraft/logs/latest.log")
+
+
+class LogTailer:
+    """增量读取日志文件的新行
+
+    从上次读取的偏移继续读，保留未写完的半行；
+    文件被截断或重新创建（客户端重启）时从头开始读。
+    """
+
+    def __init__(self, path, from_end=True):
+        self.path = path
+        self.offset = 0
+        self._file = None
+        self._inode = None
+        self._partial = b""
+        if from_end and os.path.exists(path):
+            self.offset = os.path.getsize(path)
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def skip_to_end(self):
+        """忽略当前已存在的内容"""
+        self.read_lines()
+        self._partial = b""
+
+    def read_lines(self):
+        """返回自上次调用以来新写入的完整行"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        if self._file is not None and stat.st_ino != self._inode:
+            # 日志被轮转（客户端重启后重新创建），从头读取新文件
+            self.close()
+            self.offset = 0
+            self._partial = b""
+        if self._file is None:
+            self._open()
+        if stat.st_size < self.offset:
+            # 日志被截断（包括第一次读取之前），重新从头读取
+            self.offset = 0
+            self._partial = b""
+
+        if stat.st_size == self.offset:
+            return []
+
+        self._file.seek(self.offset)
+        data = self._file.read(stat.st_size - self.offset)
+        self.offset += len(data)
+
+        data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        return [line.rstrip(b"\r").decode("utf-8", errors="replace") for line in lines]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ArrivalDetector:
+    """根据客户端日志判断 Baritone 是否已到达目标"""
+
+    def __init__(self, log_path=None, reached_patterns=DEFAULT_REACHED_PATTERNS,
+                 failed_patterns=DEFAULT_FAILED_PATTERNS, poll_interval=0.05,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.log_path = log_path or default_log_path()
+        self.reached_re = re.compile("|".join(f"(?:{p})" for p in reached_patterns))
+        self.failed_re = re.compile("|".join(f"(?:{p})" for p in failed_patterns))
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.tailer = LogTailer(self.log_path)
+        self.last_line = None
+
+    def arm(self):
+        """发送新指令前调用，丢弃之前的日志内容"""
+        self.tailer.skip_to_end()
+
+    def poll(self):
+        """读取新日志行，返回 REACHED / FAILED 或 None"""
+        for line in self.tailer.read_lines():
+            if self.reached_re.search(line):
+                self.last_line = line
+                return REACHED
+            if self.failed_re.search(line):
+                self.last_line = line
+                return FAILED
+        return None
+
+    def wait(self, timeout, should_stop=None):
+        """等待到达、失败、停止或超时，返回对应结果"""
+        deadline = self.clock() + timeout
+        while True:
+            result = self.poll()
+            if result:
+                return result
+            if should_stop is not None and should_stop():
+                return STOPPED
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return TIMEOUT
+            self.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        self.tailer.close()
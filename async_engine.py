@@ -0,0 +1,379 @@
+"""asyncio 执行引擎：每次执行是一个任务，所有等待和输入都是可立即取消的 await
+
+与 route_engine.RouteEngine 使用相同的执行计划和调度规则，区别在于：
+- 停止即取消任务，正在进行的等待或逐字输入在下一个 await 处立即中断；
+- 超时可以组合，如 race(等待到达, 等待截止时间) 取先完成者；
+- 多条路线、多个计时器可以在同一个事件循环中运行，不需要额外线程；
+- 时钟可替换，AsyncVirtualClock 在所有任务都在等待时直接跳到下一个唤醒时间，便于测试。
+断点、热加载、计时统计、指标导出、路段耗时和运行历史与 RouteEngine 共用 route_engine.EngineBase。
+
+TkAsyncBridge 在 Tk 主循环中定期推进事件循环，界面通过它启动和停止引擎。
+直接运行本模块会用虚拟时钟同时执行两条路线并演示取消。
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from arrival_detector import FAILED, REACHED
+from route_engine import COUNTDOWN_INTERVAL, DEFAULT_FOCUS, STARTUP_DELAY, EngineBase
+
+SETTLE_ROUNDS = 10  # 虚拟时钟推进前让就绪任务运行的轮数
+BRIDGE_INTERVAL_MS = 10  # Tk 桥推进事件循环的间隔(毫秒)
+
+
+# ---- 时钟 ----
+
+class AsyncClock:
+    """真实时钟，与 MonotonicClock 同源"""
+
+    def now(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(0.0, seconds))
+
+    async def sleep_until(self, deadline):
+        await self.sleep(deadline - self.now())
+
+
+class AsyncVirtualClock(AsyncClock):
+    """虚拟时钟：sleep 登记唤醒时间，由 run() 在所有任务都空闲时推进"""
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._timers = []  # (唤醒时间, 序号, future)
+        self._counter = itertools.count()
+
+    def now(self):
+        return self._now
+
+    async def sleep(self, seconds):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self._now + seconds, next(self._counter), future))
+        await future
+
+    def run(self, main):
+        """运行协程直到完成并返回其结果"""
+        async def driver():
+            task = asyncio.ensure_future(main)
+            while True:
+                for _ in range(SETTLE_ROUNDS):
+                    await asyncio.sleep(0)
+                if task.done():
+                    return task.result()
+                while self._timers and self._timers[0][2].cancelled():
+                    heapq.heappop(self._timers)
+                if not self._timers:
+                    raise RuntimeError("任务在等待虚拟时钟以外的事件，无法推进")
+                wake, _, future = heapq.heappop(self._timers)
+                self._now = max(self._now, wake)
+                future.set_result(None)
+
+        return asyncio.run(driver())
+
+
+# ---- 组合等待 ----
+
+async def race(*awaitables):
+    """等待最先完成的一个并取消其余的，返回 (序号, 结果)"""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    for index, task in enumerate(tasks):
+        if task in done:
+            return index, task.result()
+
+
+async def send_chat_command_async(backend, text, sleep, focus=DEFAULT_FOCUS):
+    """send_chat_command 的 asyncio 版本，等待和逐字输入之间都可以被取消
+
+    被取消时关闭已打开的聊天框（不发送输入了一半的指令）并继续抛出 CancelledError。
+    """
+    chat_open = False
+    try:
+        backend.click(*focus)  # 确保游戏窗口激活
+        backend.press('t')  # 打开聊天框
+        chat_open = True
+        await sleep(backend.chat_open_delay)
+        if backend.type_interval > 0:
+            for char in text:
+                backend.type_char(char)
+                await sleep(backend.type_interval)
+        else:
+            backend.write_text(text)
+        await sleep(backend.pre_enter_delay)
+        backend.press('enter')  # 发送指令
+        chat_open = False
+        await sleep(backend.post_enter_delay)
+    except asyncio.CancelledError:
+        if chat_open:
+            try:
+                backend.abort_chat()
+            except Exception:
+                pass
+        raise
+
+
+# ---- 引擎 ----
+
+class AsyncRouteEngine(EngineBase):
+    """按执行计划循环执行一条路线的 asyncio 任务，断点、热加载和各项记录与 RouteEngine 共用 EngineBase"""
+
+    blocking_history = False  # 不阻塞事件循环中的其他任务
+
+    def __init__(self, plan, backend, clock=None, arrival_detector=None, on_event=None, focus=DEFAULT_FOCUS,
+                 input_lock=None, startup_delay=STARTUP_DELAY, countdown_interval=COUNTDOWN_INTERVAL,
+                 metrics=None, exporter=None, waypoints=None, checkpoints=None, resume=None, travel_log=None,
+                 reloader=None, history=None):
+        # input_lock 为 asyncio.Lock，同一事件循环中的多条路线轮流输入
+        super().__init__(plan, backend, clock or AsyncClock(), arrival_detector=arrival_detector,
+                         on_event=on_event, focus=focus, input_lock=input_lock, startup_delay=startup_delay,
+                         countdown_interval=countdown_interval, metrics=metrics, exporter=exporter,
+                         waypoints=waypoints, checkpoints=checkpoints, resume=resume, travel_log=travel_log,
+                         reloader=reloader, history=history)
+        self._task = None
+        self._loop = None
+        self.backend.cancel_event = None  # 由任务取消负责中断
+
+    def stop(self, requested_at=None):
+        """取消执行任务，可以从其他线程调用"""
+        if self.stop_requested_at is None:
+            self.stop_requested_at = self.clock.now() if requested_at is None else requested_at
+        task, loop = self._task, self._loop  # 执行结束时事件循环线程会把 _task 置为 None
+        if task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # 事件循环已关闭，任务不会再运行
+
+    async def send_command(self, command):
+        """发送命令函数，返回指令是否已完整发送"""
+        lock = self.input_lock or _NO_LOCK
+        async with lock:
+            self.emit("action", f"输入指令: {command}")
+            started = self.clock.now()
+            try:
+                await send_chat_command_async(self.backend, command, self.clock.sleep, self.focus)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.emit("status", f"输入失败: {str(e)}")
+                return False
+            if self.metrics is not None:
+                self.metrics.observe(self.metrics.typing, self.clock.now() - started)
+            return True
+
+    async def countdown(self, desc, deadline):
+        """等待到截止时间，按间隔刷新倒计时"""
+        while True:
+            remaining = deadline - self.clock.now()
+            if remaining <= 0:
+                return
+            await self.clock.sleep(self.countdown_step(desc, remaining))
+
+    async def watch_arrival(self, desc):
+        """轮询客户端日志直到检测到到达"""
+        detector = self.arrival_detector
+        while True:
+            result = detector.poll()
+            if result == REACHED:
+                return result
+            if result == FAILED:
+                self.emit("status", f"寻路失败: {desc}")
+            await self.clock.sleep(detector.poll_interval)
+
+    async def wait_for_point(self, desc, deadline):
+        """等待到达或截止时间，先到者为准，返回是否提前到达"""
+        if not self.arrival_detector:
+            await self.countdown(desc, deadline)
+            return False
+        index, _ = await race(self.countdown(desc, deadline), self.watch_arrival(desc))
+        if index == 1:
+            self.emit("status", f"已到达: {desc}")
+            return True
+        return False
+
+    async def register_waypoints(self):
+        """航点模式：注册计划中尚未注册的航点，返回改用航点指令的执行计划"""
+        registry = self.waypoints
+        pending = registry.pending(self.plan.steps)
+        for count, (name, coords) in enumerate(pending, start=1):
+            self.emit("status", f"注册航点 {count}/{len(pending)}")
+            if await self.send_command(registry.save_command(name, coords)):
+                registry.mark_registered(name)
+        return self.plan.map_commands(registry.command_for)
+
+    async def apply_reload(self, plan, position):
+        """在两步之间换用修改后的计划，返回 (执行用的计划, 下一步的位置)"""
+        new_position = self.take_reload(position)
+        if new_position is None:
+            return plan, position
+        plan = await self.register_waypoints() if self.waypoints is not None else self.plan
+        self.emit("status", f"已应用修改，共 {len(plan)} 步，从第 {new_position + 1} 步继续")
+        return plan, new_position
+
+    async def run(self):
+        """执行循环，直到完成指定循环次数或任务被取消"""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        finished = False
+        reason = "stopped"
+        try:
+            if self.stop_requested_at is not None:
+                raise asyncio.CancelledError()  # 启动前已请求停止
+            self.emit("running", True)
+            self.emit("status", "启动中...")
+            await self.clock.sleep(self.startup_delay)  # 给用户切换窗口的时间
+            plan = await self.register_waypoints() if self.waypoints is not None else self.plan
+            first_step, first_delay, resumed_cycles = self.begin_run(plan)
+            scheduler = self.scheduler
+
+            while self.total_cycles == 0 or self.cycle_count < self.total_cycles:
+                cycle_start = scheduler.cycle_start(self.cycle_count - resumed_cycles)
+                if cycle_start > self.clock.now():
+                    self.announce_alignment(cycle_start)
+                    await self.clock.sleep_until(cycle_start)
+
+                cycle_began = self.begin_cycle(first_step == 0)
+
+                position = first_step
+                while position < len(plan.steps):
+                    if self.reloader is not None:
+                        plan, position = await self.apply_reload(plan, position)
+                        if position >= len(plan.steps):
+                            break
+                    step = plan.steps[position]
+                    delay = step.delay if first_delay is None else first_delay
+                    first_delay = None
+                    step_began, deadline = self.begin_step(step, delay)
+                    await self.send_command(step.command)
+                    self.emit("status", step.status)
+                    self.save_checkpoint(position, deadline)
+
+                    if await self.wait_for_point(step.desc, deadline):
+                        self.arrived(position)
+                    self.end_step(step, step_began, delay)
+                    position += 1
+
+                self.end_cycle(cycle_began)
+                first_step = 0
+
+            finished = True
+            reason = "completed"
+            self.emit("status", "已停止")
+        except asyncio.CancelledError:
+            self.emit("status", "已停止")
+            if self.stop_requested_at is None:
+                raise  # 不是通过 stop() 取消的（如事件循环关闭），继续传播
+        except Exception as e:
+            reason = f"error: {e}"
+            self.emit("status", f"错误: {str(e)}")
+        finally:
+            self._task = None
+            self.end_run(finished, reason)
+            self.emit("running", False)
+            self.emit("action", "无")
+            self.emit("point", "无")
+
+
+class _NoLock:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_NO_LOCK = _NoLock()
+
+
+async def run_routes(engines):
+    """在同一个事件循环中同时执行多条路线"""
+    await asyncio.gather(*(engine.run() for engine in engines))
+
+
+# ---- Tk 桥 ----
+
+class TkAsyncBridge:
+    """在 Tk 主循环中按固定间隔推进 asyncio 事件循环，不需要额外线程"""
+
+    def __init__(self, root, interval_ms=BRIDGE_INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.loop = asyncio.new_event_loop()
+        self._after_id = None
+
+    def start(self, coro):
+        """在事件循环中创建任务并开始推进"""
+        task = self.loop.create_task(coro)
+        self._schedule()
+        return task
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._step)
+
+    def _step(self):
+        self._after_id = None
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()  # 执行一轮就绪的回调和到期的计时器
+        if asyncio.all_tasks(self.loop):
+            self._schedule()
+
+    def close(self):
+        """取消所有任务并关闭事件循环，可以重复调用"""
+        if self.loop.is_closed():
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+
+def demo():
+    """用虚拟时钟同时执行两条路线，第二条在 100 秒时被取消"""
+    from input_backend import FakeInputBackend
+    from route_model import Route, RoutePoint
+
+    clock = AsyncVirtualClock()
+    route = Route([RoutePoint(0, 64, 0, 0, "起点"), RoutePoint(100, 64, 0, 30, "第二点"),
+                   RoutePoint(0, 64, 0, 60, "返回起点")])
+    settings = {"cycle_count": "3", "start_index": "0", "end_index": "2"}
+
+    async def main():
+        lock = asyncio.Lock()
+        engines = []
+        for _ in range(2):
+            backend = FakeInputBackend.like("typewrite", clock=clock.now)
+            engines.append(AsyncRouteEngine.from_settings(route, settings, backend, clock=clock, input_lock=lock,
+                                                          startup_delay=0, countdown_interval=None))
+
+        async def stop_second():
+            await clock.sleep(100)
+            engines[1].stop()
+
+        await asyncio.gather(run_routes(engines), stop_second())
+        return engines
+
+    engines = clock.run(main())
+    for number, engine in enumerate(engines, start=1):
+        print(f"路线{number}: 完成 {engine.cycle_count} 次循环，发送 {len(engine.backend.typed_commands())} 条指令，"
+              f"停止于 {engine.stop_requested_at}")
+    print(f"虚拟时间: {clock.now():.1f}s")
+
+
+if __name__ == "__main__":
+    demo()
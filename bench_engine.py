@@ -0,0 +1,94 @@
+"""执行引擎基准测试：固定场景下比较各输入方式与调度改动
+
+每个场景用模拟器运行，输出每点指令开销、循环耗时、每小时循环次数和引擎开销。
+--save 把结果保存为 JSON，--baseline 与之前保存的结果对比并输出变化。
+
+用法:
+    python bench_engine.py [--cycles 1000] [--save 结果.json] [--baseline 基线.json]
+"""
+import json
+
+from input_backend import BACKEND_CHOICES
+from route_model import Route, RoutePoint
+from simulator import DEFAULT_JITTER, simulate
+
+
+def boss_route():
+    """与默认配置相同的 4 点 BOSS 路线"""
+    return Route([
+        RoutePoint(637, 177, -1139, 0, "起点"),
+        RoutePoint(470, 190, -1013, 30, "第二点"),
+        RoutePoint(353, 236, -1014, 24, "第三点"),
+        RoutePoint(637, 177, -1139, 96, "返回起点并等待BOSS刷新"),
+    ])
+
+
+def dense_route(count=50, delay=2):
+    """点多、间隔短的路线，指令开销占比高"""
+    return Route(RoutePoint(i * 16, 64, (i % 5) * 16, delay, f"点{i}") for i in range(count))
+
+
+# (场景名称, 路线, 对齐周期, 航点模式)
+SCENARIOS = (
+    ("BOSS路线", boss_route, 0, False),
+    ("BOSS路线/周期160s", boss_route, 160, False),
+    ("BOSS路线/航点", boss_route, 0, True),
+    ("50点短间隔", dense_route, 0, False),
+    ("50点短间隔/航点", dense_route, 0, True),
+)
+
+
+def run(cycles=1000, backends=BACKEND_CHOICES):
+    """运行所有场景，返回 [(场景, 结果字典), ...]"""
+    rows = []
+    for name, make_route, period, waypoints in SCENARIOS:
+        route = make_route()
+        settings = {"cycle_count": str(cycles), "start_index": "0", "end_index": str(len(route) - 1),
+                    "cycle_period": str(period)}
+        for backend in backends:
+            result = simulate(route, settings, backend=backend, wake_jitter=DEFAULT_JITTER, waypoints=waypoints)
+            rows.append((name, result.to_dict()))
+    return rows
+
+
+def _delta(value, baseline):
+    if not baseline:
+        return ""
+    return f" ({(value - baseline) / baseline * 100:+.1f}%)"
+
+
+def print_table(rows, baseline=None):
+    baseline = {(name, data["backend"]): data for name, data in baseline or ()}
+    print(f"{'场景':<16} {'输入方式':<10} {'指令开销(ms)':>12} {'循环耗时(s)':>12} "
+          f"{'每小时循环':>10} {'字符/循环':>10} {'引擎(µs/步)':>12}")
+    for name, data in rows:
+        base = baseline.get((name, data["backend"]), {})
+        print(f"{name:<16} {data['backend']:<10} {data['command_overhead'] * 1000:>12.1f} "
+              f"{data['cycle_time']:>12.3f} {data['cycles_per_hour']:>10.1f}"
+              f"{_delta(data['cycles_per_hour'], base.get('cycles_per_hour'))} "
+              f"{data.get('chars_per_cycle', 0):>10.1f} "
+              f"{data['engine_overhead'] * 1e6:>12.1f}{_delta(data['engine_overhead'], base.get('engine_overhead'))}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="执行引擎基准测试")
+    parser.add_argument("--cycles", type=int, default=1000, help="每个场景模拟的循环次数")
+    parser.add_argument("--save", help="保存结果的 JSON 文件")
+    parser.add_argument("--baseline", help="用于对比的基线结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    rows = run(args.cycles)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(rows, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
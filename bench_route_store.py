@@ -0,0 +1,56 @@
+"""路线存储格式性能对比：JSON 与 JSON Lines 的保存、加载和读取头部耗时"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from route_model import Route, RoutePoint
+from route_store import load_header, load_route_file, save_route_file
+
+SIZES = (1000, 10000, 100000)
+FORMATS = (".json", ".jsonl")
+SETTINGS = {"cycle_count": "0", "start_index": "0", "end_index": "0", "cycle_period": "0", "segments": ""}
+
+
+def make_route(count, seed=0):
+    """生成指定点数的随机路线"""
+    rng = random.Random(seed)
+    descs = ["起点", "矿洞入口", "BOSS刷新点", "返回起点"]
+    return Route(
+        RoutePoint(rng.randint(-30000, 30000), rng.randint(-64, 320), rng.randint(-30000, 30000),
+                   rng.randint(0, 120), rng.choice(descs))
+        for _ in range(count)
+    )
+
+
+def timed(func, repeat=3):
+    """返回多次运行中最快一次的耗时(秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=SIZES):
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            route = make_route(count)
+            for suffix in FORMATS:
+                path = os.path.join(directory, f"route_{count}{suffix}")
+                save_time = timed(lambda: save_route_file(path, SETTINGS, route))
+                load_time = timed(lambda: load_route_file(path))
+                header_time = timed(lambda: load_header(path))
+                rows.append((count, suffix, os.path.getsize(path), save_time, load_time, header_time))
+    return rows
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or SIZES
+    print(f"{'点数':>8} {'格式':>7} {'大小(KB)':>10} {'保存(ms)':>10} {'加载(ms)':>10} {'头部(ms)':>10}")
+    for count, suffix, size, save_time, load_time, header_time in run(sizes):
+        print(f"{count:>8} {suffix:>7} {size / 1024:>10.1f} {save_time * 1000:>10.1f} "
+              f"{load_time * 1000:>10.1f} {header_time * 1000:>10.2f}")
@@ -0,0 +1,123 @@
+"""启动耗时基准测试：导入耗时和首次显示窗口的耗时
+
+- 导入耗时：用 python -X importtime 导入主程序，统计总耗时和最慢的顶层模块，
+  并单独统计无界面命令行执行器 run_route 的导入耗时；
+- 首窗耗时：设置 MC_GOTO_STARTUP_PROBE 环境变量启动程序，窗口首次绘制后程序自动退出，
+  测量从启动进程到进程退出的时间。源码运行和 dist 中的打包程序
+  （单文件 onefile 与目录模式 onedir）分别测量。
+
+--save 保存结果，--baseline 与之前的结果对比，便于发现启动变慢。
+
+用法:
+    python bench_startup.py [--repeat 5] [--exe 其他程序.exe] [--save 结果.json] [--baseline 基线.json]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from route_store import STARTUP_PROBE_ENV
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_NAME = "MC自动寻路工具"
+MAIN_MODULE = "test_optimized"
+CLI_MODULE = "run_route"  # 无界面命令行执行器
+FROZEN_TARGETS = (
+    ("onefile", os.path.join(HERE, "dist", APP_NAME + ".exe")),
+    ("onedir", os.path.join(HERE, "dist", APP_NAME, APP_NAME + ".exe")),
+)
+
+
+def measure_imports(module=MAIN_MODULE, top=5):
+    """返回 (总导入耗时(秒), [(模块, 耗时(秒)), ...] 最慢的顶层模块)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=HERE, capture_output=True, text=True, encoding="utf-8", errors="ignore")
+    total = 0.0
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 表头
+        seconds = int(cumulative) / 1e6
+        if name.strip() == module and not name.startswith("   "):
+            total = seconds
+        elif name.startswith("   ") and not name.startswith("     "):
+            children.append((name.strip(), seconds))  # 主程序直接导入的模块
+    children.sort(key=lambda item: item[1], reverse=True)
+    return total, children[:top]
+
+
+def measure_first_window(cmd, repeat=5):
+    """多次启动程序，返回每次到窗口首次绘制后退出的耗时(秒)；启动失败时返回空列表"""
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: "1"})
+    times = []
+    # 在空目录中运行，避免读取或写入当前的路线配置
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = subprocess.run(cmd, cwd=directory, env=env, capture_output=True)
+            if result.returncode != 0:
+                return []
+            times.append(time.perf_counter() - started)
+    return times
+
+
+def run(repeat=5, extra_exes=()):
+    """返回 {名称: 耗时(秒)}"""
+    results = {}
+    total, children = measure_imports()
+    results["import"] = total
+    for name, seconds in children:
+        results[f"import:{name}"] = seconds
+    results[f"import({CLI_MODULE})"] = measure_imports(CLI_MODULE)[0]
+
+    results["python -c pass"] = min(measure_first_window([sys.executable, "-c", "pass"], repeat))
+    targets = [("source", [sys.executable, os.path.join(HERE, MAIN_MODULE + ".py")])]
+    targets += [(name, [path]) for name, path in FROZEN_TARGETS if os.path.exists(path)]
+    targets += [(os.path.basename(path), [path]) for path in extra_exes]
+    for name, cmd in targets:
+        times = measure_first_window(cmd, repeat)
+        results[f"first_window:{name}"] = min(times) if times else None
+    return results
+
+
+def print_table(results, baseline=None):
+    baseline = baseline or {}
+    print(f"{'项目':<36} {'耗时(ms)':>10} {'基线(ms)':>10} {'变化':>8}")
+    for name, seconds in results.items():
+        if seconds is None:
+            print(f"{name:<36} {'启动失败':>10}")
+            continue
+        base = baseline.get(name)
+        base_text = f"{base * 1000:>10.1f}" if base else f"{'':>10}"
+        delta = f"{(seconds - base) / base * 100:>+7.1f}%" if base else ""
+        print(f"{name:<36} {seconds * 1000:>10.1f} {base_text} {delta:>8}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项启动次数，取最快一次")
+    parser.add_argument("--exe", action="append", default=[], help="额外测量的打包程序")
+    parser.add_argument("--save", help="保存结果的 JSON 文件")
+    parser.add_argument("--baseline", help="用于对比的基线结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.exe)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
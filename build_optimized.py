@@ -2,13 +2,16 @@ import subprocess
 import sys
 import os
 
-def build_executable():
-    """构建优化的可执行文件"""
+def build_executable(onedir=False):
+    """构建优化的可执行文件
+
+    onedir 为 True 时打包成目录：启动时无需每次把所有文件解压到临时目录，启动更快。
+    """
     # pyinstaller 命令参数 - 高度优化版本
     cmd = [
         'pyinstaller',
         '--noconfirm',  # 不需要确认
-        '--onefile',  # 打包成单个exe文件
+        '--onedir' if onedir else '--onefile',  # 打包成目录或单个exe文件
         '--windowed',  # 无控制台窗口
         '--name', 'MC自动寻路工具',  # exe文件名
         '--icon', 'NONE',  # 不使用图标
@@ -33,13 +36,13 @@ def build_executable():
         '--exclude-module', 'pydoc',
         '--exclude-module', 'doctest',
         '--exclude-module', 'argparse',
-        '--exclude-module', 'difflib',
-        '--exclude-module', 'inspect',
         '--exclude-module', 'pickle',
         '--exclude-module', 'sqlite3',
         '--exclude-module', 'ssl',
         '--exclude-module', 'html',
         # 注意：不要排除 'json' 模块，因为代码中使用了它
+        # 不要排除 'inspect'：asyncio 引擎和性能分析（pstats -> dataclasses）依赖它
+        # 不要排除 'difflib'：热加载时用它比较新旧计划的步骤
         'test_optimized.py'  # 源文件
     ]
 
@@ -56,9 +59,13 @@ def build_executable():
         )
         print("打包成功！")
         print("EXE文件位于 dist 文件夹中")
+        print("可运行 python bench_startup.py 比较单文件与目录模式的启动耗时")
 
         # 显示生成文件大小
-        exe_path = os.path.join('dist', 'MC自动寻路工具.exe')
+        if onedir:
+            exe_path = os.path.join('dist', 'MC自动寻路工具', 'MC自动寻路工具.exe')
+        else:
+            exe_path = os.path.join('dist', 'MC自动寻路工具.exe')
         if os.path.exists(exe_path):
             size = os.path.getsize(exe_path)
             print(f"生成文件大小: {size / 1024 / 1024:.2f} MB")
@@ -115,9 +122,10 @@ if __name__ == "__main__":
     print("选择打包方式:")
     print("1. 标准优化打包")
     print("2. UPX压缩打包（需要安装UPX）")
+    print("3. 目录模式打包（启动更快）")
 
     try:
-        choice = input("请输入选择 (1 或 2): ").strip()
+        choice = input("请输入选择 (1、2 或 3): ").strip()
     except:
         choice = "1"  # 默认选择
 
@@ -125,6 +133,8 @@ if __name__ == "__main__":
         build_executable()
     elif choice == "2":
         build_with_upx()
+    elif choice == "3":
+        build_executable(onedir=True)
     else:
         print("无效选择，使用标准优化打包")
         build_executable()
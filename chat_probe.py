@@ -0,0 +1,264 @@
+"""聊天框就绪检测：采样几个像素判断聊天框是否已打开，代替固定等待
+
+Minecraft 的聊天输入框是窗口底部一条半透明黑色横条。按 t 之前先记录这条横线上
+几个采样点的亮度作为基准，按下后轮询，多数采样点明显变暗即认为聊天框已打开；
+按回车后同样轮询直到恢复，确认聊天框已关闭。
+已有足够的实测延迟时，等待打开的超时按典型延迟收紧（不超过 OPEN_TIMEOUT），尽快发现按键丢失；
+超时仍未打开时抛出 ChatNotReady，不会把指令输入到游戏世界中，
+input_backend.send_chat_command 会按 esc 关闭后重试一次。
+
+采样点背景太暗（如夜晚、洞穴）无法判断时，退回按历史测得的典型延迟等待。
+LatencyModel 记录每台电脑上测得的打开、关闭耗时并保存到文件，下次启动继续使用。
+
+屏幕来源可替换：Windows 使用 GDI GetPixel，其他平台使用 pyautogui.pixel，
+测试时使用 FakeChatScreen 根据假后端的按键生成合成画面。
+"""
+import json
+import sys
+import time
+from collections import deque
+
+from route_store import atomic_write
+
+DEFAULT_LATENCY_FILE = "mc_goto_latency.json"
+SAMPLE_COUNT = 5  # 横条上的采样点数
+BAR_OFFSET = 10  # 采样点距窗口底部的像素数（界面缩放 1~4 时都落在输入框内）
+DARKEN_RATIO = 0.75  # 亮度降到基准的该比例以下视为被输入框遮住
+MIN_FRACTION = 0.6  # 判定打开所需的变暗采样点比例
+MIN_LUMA = 16  # 基准亮度低于该值的采样点无法判断
+POLL_INTERVAL = 0.01  # 轮询间隔(秒)
+OPEN_TIMEOUT = 2.0  # 等待聊天框打开的超时(秒)
+MIN_OPEN_TIMEOUT = 0.3  # 按实测延迟收紧后的最短超时(秒)
+OPEN_TIMEOUT_FACTOR = 4.0  # 按实测延迟收紧时，超时为典型打开延迟的倍数
+CLOSE_TIMEOUT = 1.0  # 等待聊天框关闭的超时(秒)
+HISTORY_SIZE = 50  # 每种延迟保留的历史样本数
+FALLBACK_MARGIN = 1.5  # 无法判断时按典型延迟的倍数等待
+
+
+class ChatNotReady(Exception):
+    """按下 t 后聊天框在超时时间内没有打开"""
+
+
+def luma(rgb):
+    r, g, b = rgb[:3]
+    return (299 * r + 587 * g + 114 * b) // 1000
+
+
+# ---- 屏幕来源 ----
+
+class Win32Screen:
+    """Windows GDI 读取屏幕像素，不依赖截图库"""
+
+    def __init__(self):
+        if sys.platform != "win32":
+            raise OSError("Win32Screen 仅支持 Windows")
+        import ctypes
+        from ctypes import wintypes
+
+        self._user32 = ctypes.windll.user32
+        self._gdi32 = ctypes.windll.gdi32
+        self._gdi32.GetPixel.argtypes = (wintypes.HDC, ctypes.c_int, ctypes.c_int)
+        self._gdi32.GetPixel.restype = wintypes.DWORD
+        self._user32.GetDC.restype = wintypes.HDC
+        self._dc = self._user32.GetDC(0)
+
+    def pixel(self, x, y):
+        color = self._gdi32.GetPixel(self._dc, x, y)
+        return color & 0xFF, (color >> 8) & 0xFF, (color >> 16) & 0xFF
+
+    def size(self):
+        return self._user32.GetSystemMetrics(0), self._user32.GetSystemMetrics(1)
+
+    def close(self):
+        if self._dc:
+            self._user32.ReleaseDC(0, self._dc)
+            self._dc = None
+
+
+class PyAutoGuiScreen:
+    """通过 pyautogui.pixel 读取屏幕像素（需要 Pillow）"""
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def pixel(self, x, y):
+        return tuple(self.pyautogui.pixel(x, y))
+
+    def size(self):
+        return tuple(self.pyautogui.size())
+
+    def close(self):
+        pass
+
+
+def create_screen():
+    """创建当前平台可用的屏幕来源"""
+    if sys.platform == "win32":
+        return Win32Screen()
+    return PyAutoGuiScreen()
+
+
+class FakeChatScreen:
+    """合成画面：根据假输入后端的按键模拟聊天框的打开和关闭
+
+    按下 t 后经过 open_latency 秒底部横条变暗，按下回车或 esc 后经过 close_latency 秒恢复。
+    open_latency 为 None 时聊天框始终不会打开。
+    """
+
+    def __init__(self, backend, clock, open_latency=0.05, close_latency=0.03,
+                 background=(120, 160, 90), size=(1920, 1080)):
+        self.backend = backend
+        self.clock = clock
+        self.open_latency = open_latency
+        self.close_latency = close_latency
+        self.background = background
+        self._size = size
+        self._seen = 0  # 已处理的事件数
+        self._pressed_t = None  # 最近一次按 t 的时间
+        self._closed = None  # 之后按回车或 esc 的时间
+
+    def chat_open(self):
+        events = self.backend.events
+        for timestamp, action, key in events[self._seen:]:
+            if action == "press" and key == "t":
+                self._pressed_t, self._closed = timestamp, None
+            elif action == "press" and key in ("enter", "esc"):
+                self._closed = timestamp
+        self._seen = len(events)
+        if self._pressed_t is None or self.open_latency is None:
+            return False
+        now = self.clock()
+        return (now >= self._pressed_t + self.open_latency
+                and (self._closed is None or now < self._closed + self.close_latency))
+
+    def pixel(self, x, y):
+        if y >= self._size[1] - BAR_OFFSET * 4 and self.chat_open():
+            return tuple(channel // 2 for channel in self.background)  # 50% 黑色遮罩
+        return self.background
+
+    def size(self):
+        return self._size
+
+    def close(self):
+        pass
+
+
+# ---- 延迟记录 ----
+
+class LatencyModel:
+    """记录聊天框打开、关闭的实测耗时，保存到文件供下次使用"""
+
+    def __init__(self, path=DEFAULT_LATENCY_FILE, history_size=HISTORY_SIZE):
+        self.path = path
+        self.samples = {"open": deque(maxlen=history_size), "close": deque(maxlen=history_size)}
+
+    @classmethod
+    def load(cls, path=DEFAULT_LATENCY_FILE):
+        model = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for kind, samples in model.samples.items():
+                samples.extend(float(value) for value in data.get(kind, []))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass  # 没有历史记录或文件损坏时从头开始
+        return model
+
+    def save(self):
+        if not self.path:
+            return
+        data = {kind: list(samples) for kind, samples in self.samples.items()}
+        atomic_write(self.path, lambda f: json.dump(data, f))
+
+    def record(self, kind, seconds):
+        self.samples[kind].append(seconds)
+
+    def typical(self, kind):
+        """该类延迟的典型值（90 分位数），样本不足时返回 None"""
+        samples = sorted(self.samples[kind])
+        if len(samples) < 5:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+
+    def fallback_wait(self, kind, default):
+        """无法通过画面判断时的等待时间"""
+        typical = self.typical(kind)
+        return default if typical is None else typical * FALLBACK_MARGIN
+
+
+# ---- 就绪检测 ----
+
+class ChatProbe:
+    """在窗口区域底部采样像素，判断聊天框是否打开"""
+
+    def __init__(self, screen, region=None, latencies=None, clock=time.monotonic,
+                 open_timeout=OPEN_TIMEOUT, close_timeout=CLOSE_TIMEOUT, poll_interval=POLL_INTERVAL):
+        self.screen = screen
+        if region is None:
+            region = (0, 0) + tuple(screen.size())
+        left, top, width, height = region
+        y = top + height - BAR_OFFSET
+        self.points = [(left + width * (k + 1) // (SAMPLE_COUNT + 1), y) for k in range(SAMPLE_COUNT)]
+        self.latencies = latencies or LatencyModel(path=None)
+        self.clock = clock
+        self.open_timeout = open_timeout
+        self.close_timeout = close_timeout
+        self.poll_interval = poll_interval
+        self._baseline = None
+
+    def capture_baseline(self):
+        """按 t 之前调用，记录聊天框关闭时的采样点亮度"""
+        self._baseline = [luma(self.screen.pixel(x, y)) for x, y in self.points]
+
+    def _readable(self):
+        return [i for i, value in enumerate(self._baseline) if value >= MIN_LUMA]
+
+    def _darkened(self, readable):
+        """已变暗的可判断采样点比例"""
+        darkened = 0
+        for i in readable:
+            x, y = self.points[i]
+            if luma(self.screen.pixel(x, y)) <= self._baseline[i] * DARKEN_RATIO:
+                darkened += 1
+        return darkened / len(readable)
+
+    def _poll(self, backend, kind, timeout, done, record=True):
+        """轮询直到 done() 为真，返回耗时；超时返回 None。等待通过 backend.wait 进行，可被停止请求打断"""
+        started = self.clock()
+        while True:
+            if done():
+                elapsed = self.clock() - started
+                if record:
+                    self.latencies.record(kind, elapsed)
+                return elapsed
+            if self.clock() - started >= timeout:
+                return None
+            backend.wait(self.poll_interval)
+
+    def open_wait_timeout(self):
+        """等待聊天框打开的超时：有实测延迟时按典型延迟收紧，不超过 open_timeout"""
+        typical = self.latencies.typical("open")
+        if typical is None:
+            return self.open_timeout
+        return min(self.open_timeout, max(MIN_OPEN_TIMEOUT, typical * OPEN_TIMEOUT_FACTOR))
+
+    def wait_open(self, backend):
+        """按 t 之后调用，等待聊天框打开，超时时抛出 ChatNotReady"""
+        readable = self._readable()
+        if len(readable) < 2:
+            backend.wait(self.latencies.fallback_wait("open", backend.chat_open_delay))
+            return
+        timeout = self.open_wait_timeout()
+        if self._poll(backend, "open", timeout, lambda: self._darkened(readable) >= MIN_FRACTION) is None:
+            raise ChatNotReady(f"聊天框在 {timeout:g} 秒内没有打开")
+
+    def wait_closed(self, backend, record=True):
+        """按回车（或 esc）之后调用，等待聊天框关闭；无法判断或超时时按历史延迟等待
+
+        record 为假时不记录耗时（如超时后按 esc 关闭，耗时不代表正常的关闭延迟）。
+        """
+        readable = self._readable()
+        if len(readable) < 2 or self._poll(backend, "close", self.close_timeout,
+                                           lambda: self._darkened(readable) < MIN_FRACTION, record) is None:
+            backend.wait(self.latencies.fallback_wait("close", backend.post_enter_delay))
@@ -0,0 +1,80 @@
+"""断点续跑：每步之后记录执行进度，崩溃、掉线或紧急停止后从中断处继续
+
+断点记录执行计划摘要、当前循环序号、计划中的步骤位置和该步剩余的等待时间，
+每次发送指令后以及停止时原子写入一个很小的 JSON 文件。
+继续执行时跳过已完成的步骤：中断时仍在等待的步骤会重新发送指令，只等待剩余时间
+（扣除程序停止期间经过的时间）；等待已经结束的步骤直接从下一步开始。
+路线或分段改变后摘要不同，旧断点自动失效。
+"""
+import json
+import os
+import time
+from collections import namedtuple
+
+from route_store import atomic_write
+
+DEFAULT_CHECKPOINT_FILE = "mc_goto_checkpoint.json"
+
+# cycle 为中断时所在的循环序号（从 1 开始），step 为该步在执行计划中的位置，saved_at 为写入时的系统时间
+Checkpoint = namedtuple("Checkpoint", ["digest", "cycle", "step", "remaining", "saved_at"])
+# 继续执行的位置：已完成的循环次数、从计划中第几步开始、该步的等待时间（None 表示按计划）
+ResumePoint = namedtuple("ResumePoint", ["completed_cycles", "step", "delay"])
+
+
+def plan_digest(plan):
+    """执行计划步骤的摘要，只有步骤完全相同时断点才有效"""
+    import hashlib
+
+    steps = [(step.index, step.coords, step.command, step.delay) for step in plan.steps]
+    return hashlib.sha1(json.dumps(steps, separators=(",", ":")).encode()).hexdigest()
+
+
+class CheckpointStore:
+    """断点文件的读写"""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE, wall_clock=time.time):
+        self.path = path
+        self.wall_clock = wall_clock
+
+    def save(self, digest, cycle, step, remaining):
+        data = {"digest": digest, "cycle": cycle, "step": step,
+                "remaining": round(max(0.0, remaining), 3), "saved_at": self.wall_clock()}
+        atomic_write(self.path, lambda f: f.write(json.dumps(data, separators=(",", ":"))))
+
+    def load(self):
+        """读取断点，文件不存在或损坏时返回 None"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return Checkpoint(str(data["digest"]), int(data["cycle"]), int(data["step"]),
+                              float(data["remaining"]), float(data["saved_at"]))
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def clear(self):
+        """全部循环完成后删除断点"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def resume_point(self, plan):
+        """读取断点并计算继续执行的位置，没有可用断点时返回 None"""
+        return resume_point(self.load(), plan, self.wall_clock())
+
+
+def resume_point(checkpoint, plan, now):
+    """根据断点计算 ResumePoint；断点与计划不符或循环已全部完成时返回 None"""
+    if checkpoint is None or not plan.steps or checkpoint.digest != plan_digest(plan):
+        return None
+    cycle, step = max(1, checkpoint.cycle), checkpoint.step
+    if not 0 <= step < len(plan.steps):
+        return None
+    delay = checkpoint.remaining - max(0.0, now - checkpoint.saved_at)
+    if delay <= 0:  # 该步的等待已经结束，从下一步开始
+        step, delay = step + 1, None
+        if step == len(plan.steps):
+            cycle, step = cycle + 1, 0
+    if plan.cycles and cycle > plan.cycles:
+        return None
+    return ResumePoint(cycle - 1, step, delay)
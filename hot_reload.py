@@ -0,0 +1,102 @@
+"""运行中热加载：不停止循环，在两步之间换用修改后的执行计划
+
+修改来源有两个：
+- ConfigWatcher 在每步开始前检查配置文件的修改时间和大小，有变化时重新加载并编译；
+- 界面中的编辑通过 PlanReloader.submit() 直接提交新计划。
+
+新计划在下一步开始前生效，已完成的循环次数不变。remap_position() 对新旧计划的步骤做差异比较
+（按坐标和描述匹配），找到刚完成的一步在新计划中的位置，从它的下一步继续：
+只改等待时间或坐标时位置不变，在前面插入或删除点时位置随之平移，刚完成的点被删除时从删除处继续。
+配置无效（格式错误、坐标无效、分段超出范围等）或无法对应位置时继续按原计划执行，只提示一次。
+"""
+import os
+import threading
+
+from checkpoint import plan_digest
+from route_plan import compile_plan
+from route_store import load_route_file
+
+
+def _step_keys(plan):
+    return [(step.coords, step.desc) for step in plan.steps]
+
+
+def remap_position(old_plan, new_plan, position):
+    """旧计划中下一步为 position 时，返回新计划中对应的下一步（可能等于新计划长度，表示本次循环已完成）"""
+    if position <= 0:
+        return 0
+    from difflib import SequenceMatcher  # 只在应用修改时导入，不影响启动耗时
+
+    done = position - 1  # 刚完成的一步
+    matcher = SequenceMatcher(None, _step_keys(old_plan), _step_keys(new_plan), autojunk=False)
+    for _, i1, i2, j1, j2 in matcher.get_opcodes():
+        if i1 <= done < i2:
+            if j1 == j2:
+                return j1  # 刚完成的点已删除，从删除处继续
+            # 相同或被替换（如修改了坐标）的点按顺序一一对应
+            return j1 + min(done - i1, j2 - j1 - 1) + 1
+    return len(new_plan.steps)
+
+
+def same_plan(a, b):
+    """两个计划的步骤（包括描述）、循环次数和对齐周期都相同
+
+    plan_digest 不包含描述，只改名的计划断点仍然有效，但运行中的状态文字需要更新。
+    """
+    return ((a.cycles, a.period) == (b.cycles, b.period) and plan_digest(a) == plan_digest(b)
+            and [step.desc for step in a.steps] == [step.desc for step in b.steps])
+
+
+class ConfigWatcher:
+    """轮询配置文件的修改时间和大小，有变化时重新编译执行计划
+
+    overrides 中的循环设置优先于文件中的设置（如命令行参数或界面中的设置）。
+    """
+
+    def __init__(self, path, overrides=None):
+        self.path = path
+        self.overrides = dict(overrides or {})
+        self._stamp = self._read_stamp()
+
+    def _read_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None  # 保存时短暂不存在（原子替换）
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        """文件自上次检查后是否有变化"""
+        stamp = self._read_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def load(self):
+        """加载并编译执行计划，文件或设置无效时抛出 OSError / ValueError"""
+        settings, route = load_route_file(self.path)
+        settings.update(self.overrides)
+        return compile_plan(route, settings)
+
+
+class PlanReloader:
+    """把新的执行计划交给正在运行的引擎，可以从其他线程提交"""
+
+    def __init__(self, watcher=None):
+        self.watcher = watcher
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def submit(self, plan):
+        """提交新计划，下一步开始前生效；多次提交时只保留最新的"""
+        with self._lock:
+            self._pending = plan
+
+    def take(self):
+        """返回待生效的新计划，没有时返回 None；配置文件无效时抛出 OSError / ValueError"""
+        if self.watcher is not None and self.watcher.changed():
+            self.submit(self.watcher.load())
+        with self._lock:
+            plan, self._pending = self._pending, None
+        return plan
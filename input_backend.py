@@ -0,0 +1,383 @@
+"""输入后端：向游戏窗口发送点击、按键和文本
+
+所有后端提供相同的接口（click / press / write_text / position），
+send_command 只依赖该接口，因此可以在逐字输入、剪贴板粘贴、
+Windows SendInput 以及无界面的内存假后端之间切换。
+
+设置 cancel_event 后，每次按键和等待之前都会检查停止请求，
+停止时抛出 StopRequested，正在输入的指令会被立即中断。
+"""
+import sys
+import time
+
+
+class StopRequested(Exception):
+    """输入过程中收到停止请求"""
+
+
+class InputBackend:
+    """输入后端基类
+
+    子类实现 _click / _press / _write_text / position，
+    公开方法负责在每次输入前检查停止请求。
+    """
+
+    name = "base"
+    # send_command 中各步骤之后的等待时间(秒)：打开聊天框、回车前、回车后
+    chat_open_delay = 0.15
+    pre_enter_delay = 0.03
+    post_enter_delay = 0.05
+    type_interval = 0.0  # 逐字输入时每个字符之后的等待(秒)
+    cancel_event = None  # threading.Event，被设置后中断输入
+
+    def check_cancel(self):
+        """已请求停止时抛出 StopRequested"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise StopRequested()
+
+    def wait(self, seconds):
+        """可被停止请求立即打断的等待"""
+        if seconds <= 0:
+            self.check_cancel()
+        elif self.cancel_event is None:
+            time.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise StopRequested()
+
+    def click(self, x, y):
+        self.check_cancel()
+        self._click(x, y)
+
+    def press(self, key):
+        self.check_cancel()
+        self._press(key)
+
+    def write_text(self, text):
+        self.check_cancel()
+        self._write_text(text)
+
+    def type_char(self, char):
+        """只输入一个字符，不做逐字间隔等待（由调用方控制节奏，如 asyncio 引擎）"""
+        self.check_cancel()
+        self._type_char(char)
+
+    def abort_chat(self):
+        """中断后关闭已打开的聊天框，丢弃输入了一半的指令（不检查停止请求）"""
+        self._press('esc')
+
+    def _click(self, x, y):
+        raise NotImplementedError
+
+    def _press(self, key):
+        raise NotImplementedError
+
+    def _write_text(self, text):
+        raise NotImplementedError
+
+    def _type_char(self, char):
+        self._write_text(char)
+
+    def position(self):
+        raise NotImplementedError
+
+    def close(self):
+        """释放后端持有的资源"""
+        pass
+
+
+class TypewriteBackend(InputBackend):
+    """pyautogui 逐字输入（原始实现，兼容性最好但最慢）"""
+
+    name = "typewrite"
+    chat_open_delay = 1.5
+    pre_enter_delay = 0.3
+    post_enter_delay = 0.5
+    type_interval = 0.1
+
+    def __init__(self, interval=None):
+        import pyautogui  # 延迟导入，避免启动时加载截图等重量级模块
+        self.pyautogui = pyautogui
+        self.pyautogui.PAUSE = 0  # 由 wait 负责停顿，保证每次按键之间都能响应停止
+        if interval is not None:
+            self.type_interval = interval
+
+    def _click(self, x, y):
+        self.pyautogui.click(x=x, y=y)
+
+    def _press(self, key):
+        self.pyautogui.press(key)
+
+    def _write_text(self, text):
+        for char in text:
+            self.check_cancel()
+            self._type_char(char)
+            self.wait(self.type_interval)
+
+    def _type_char(self, char):
+        self.pyautogui.write(char)
+
+    def position(self):
+        return tuple(self.pyautogui.position())
+
+
+class ClipboardBackend(TypewriteBackend):
+    """通过剪贴板一次性粘贴整条指令"""
+
+    name = "clipboard"
+    chat_open_delay = 0.15
+    pre_enter_delay = 0.03
+    post_enter_delay = 0.05
+    type_interval = 0.0
+
+    def __init__(self):
+        super().__init__()
+        import pyperclip  # pyautogui 的依赖，随其一同安装
+        self.pyperclip = pyperclip
+
+    def _write_text(self, text):
+        self.pyperclip.copy(text)
+        self.pyautogui.hotkey('ctrl', 'v')
+
+
+class SendInputBackend(InputBackend):
+    """Windows SendInput：整条指令作为一次输入事件批量提交
+
+    结构体与函数指针在构造时准备好并常驻，之后每次调用只做一次系统调用。
+    """
+
+    name = "sendinput"
+
+    INPUT_MOUSE = 0
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    VK_CODES = {"enter": 0x0D, "esc": 0x1B, "t": 0x54, "/": 0xBF}
+
+    def __init__(self):
+        if sys.platform != "win32":
+            raise OSError("SendInput 后端仅支持 Windows")
+
+        import ctypes
+        from ctypes import wintypes
+
+        ulong_ptr = ctypes.c_size_t
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG),
+                        ("mouseData", wintypes.DWORD), ("dwFlags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ulong_ptr)]
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD),
+                        ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                        ("dwExtraInfo", ulong_ptr)]
+
+        class _INPUTUNION(ctypes.Union):
+            _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT)]
+
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+        self.ctypes = ctypes
+        self.INPUT = INPUT
+        self.user32 = ctypes.windll.user32
+        self.user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        self.user32.SendInput.restype = wintypes.UINT
+        self._point = wintypes.POINT()
+
+    def _send(self, events):
+        array = (self.INPUT * len(events))(*events)
+        sent = self.user32.SendInput(len(events), array, self.ctypes.sizeof(self.INPUT))
+        if sent != len(events):
+            raise OSError(f"SendInput 只发送了 {sent}/{len(events)} 个事件")
+
+    def _key_event(self, vk=0, scan=0, flags=0):
+        event = self.INPUT(type=self.INPUT_KEYBOARD)
+        event.u.ki.wVk = vk
+        event.u.ki.wScan = scan
+        event.u.ki.dwFlags = flags
+        return event
+
+    def _mouse_event(self, flags):
+        event = self.INPUT(type=self.INPUT_MOUSE)
+        event.u.mi.dwFlags = flags
+        return event
+
+    def _click(self, x, y):
+        self.user32.SetCursorPos(int(x), int(y))
+        self._send([self._mouse_event(self.MOUSEEVENTF_LEFTDOWN),
+                    self._mouse_event(self.MOUSEEVENTF_LEFTUP)])
+
+    def _press(self, key):
+        vk = self.VK_CODES.get(key.lower())
+        if vk is None:
+            raise ValueError(f"不支持的按键: {key}")
+        scan = self.user32.MapVirtualKeyW(vk, 0)
+        self._send([self._key_event(vk, scan),
+                    self._key_event(vk, scan, self.KEYEVENTF_KEYUP)])
+
+    def _write_text(self, text):
+        events = []
+        data = text.encode("utf-16-le")
+        for i in range(0, len(data), 2):
+            code = int.from_bytes(data[i:i + 2], "little")
+            events.append(self._key_event(scan=code, flags=self.KEYEVENTF_UNICODE))
+            events.append(self._key_event(scan=code, flags=self.KEYEVENTF_UNICODE | self.KEYEVENTF_KEYUP))
+        if events:
+            self._send(events)
+
+    def position(self):
+        self.user32.GetCursorPos(self.ctypes.byref(self._point))
+        return self._point.x, self._point.y
+
+
+class FakeInputBackend(InputBackend):
+    """内存假后端：记录所有输入事件，用于无界面测试和模拟
+
+    events 中每一项为 (时间戳, 动作, 参数)；cursor 可由测试代码直接修改。
+    type_interval 大于0时逐字记录，用来模拟逐字输入的耗时。
+    传入 sleep 时等待改为调用 sleep(秒)，配合虚拟时钟可以不真正等待。
+    """
+
+    name = "fake"
+
+    def __init__(self, clock=time.monotonic, chat_open_delay=0.0, pre_enter_delay=0.0,
+                 post_enter_delay=0.0, type_interval=0.0, sleep=None):
+        self.clock = clock
+        self.sleep = sleep
+        self.chat_open_delay = chat_open_delay
+        self.pre_enter_delay = pre_enter_delay
+        self.post_enter_delay = post_enter_delay
+        self.type_interval = type_interval
+        self.cursor = (960, 540)
+        self.events = []
+
+    @classmethod
+    def like(cls, name, **kwargs):
+        """创建与指定后端输入耗时相同的假后端，用于模拟不同输入方式"""
+        backend_cls = BACKENDS[name]
+        timing = {attr: getattr(backend_cls, attr)
+                  for attr in ("chat_open_delay", "pre_enter_delay", "post_enter_delay", "type_interval")}
+        timing.update(kwargs)
+        return cls(**timing)
+
+    def wait(self, seconds):
+        if self.sleep is None:
+            return super().wait(seconds)
+        self.check_cancel()
+        if seconds > 0:
+            self.sleep(seconds)
+            self.check_cancel()
+
+    def _record(self, action, arg):
+        self.events.append((self.clock(), action, arg))
+
+    def _click(self, x, y):
+        self._record("click", (x, y))
+
+    def _press(self, key):
+        self._record("press", key)
+
+    def _write_text(self, text):
+        if self.type_interval <= 0:
+            self._record("write", text)
+            return
+        for char in text:
+            self.check_cancel()
+            self._type_char(char)
+            self.wait(self.type_interval)
+
+    def _type_char(self, char):
+        self._record("key", char)
+
+    def position(self):
+        return self.cursor
+
+    def typed_commands(self):
+        """返回已按回车发送的所有指令"""
+        commands = []
+        buffer = []
+        for _, action, arg in self.events:
+            if action in ("write", "key"):
+                buffer.append(arg)
+            elif action == "press" and arg == "enter":
+                commands.append("".join(buffer))
+                buffer = []
+            elif action == "press":
+                buffer = []
+        return commands
+
+
+BACKENDS = {
+    TypewriteBackend.name: TypewriteBackend,
+    ClipboardBackend.name: ClipboardBackend,
+    SendInputBackend.name: SendInputBackend,
+    FakeInputBackend.name: FakeInputBackend,
+}
+
+# 界面中可选的后端（假后端仅供测试使用）
+BACKEND_CHOICES = (ClipboardBackend.name, SendInputBackend.name, TypewriteBackend.name)
+DEFAULT_BACKEND = ClipboardBackend.name
+
+
+def send_chat_command(backend, text, focus=(960, 540), probe=None):
+    """点击游戏窗口、打开聊天框并发送一条指令
+
+    传入 probe（chat_probe.ChatProbe）时通过采样像素等待聊天框打开和关闭，代替固定等待；
+    超时未打开时按 esc 关闭后重试一次，仍未打开时抛出 chat_probe.ChatNotReady。
+    收到停止请求时关闭聊天框（不发送输入了一半的指令）并重新抛出 StopRequested。
+    """
+    chat_open = False
+    try:
+        backend.click(*focus)  # 确保游戏窗口激活
+        if probe is not None:
+            probe.capture_baseline()
+        backend.press('t')  # 打开聊天框
+        chat_open = True
+        if probe is not None:
+            from chat_probe import ChatNotReady  # 传入 probe 时该模块已加载
+
+            try:
+                probe.wait_open(backend)
+            except ChatNotReady:
+                # 按键可能丢失，或聊天框在超时后才打开：先关闭，等画面恢复后重新按 t
+                backend.abort_chat()
+                chat_open = False
+                probe.wait_closed(backend, record=False)
+                probe.capture_baseline()
+                backend.press('t')
+                chat_open = True
+                try:
+                    probe.wait_open(backend)
+                except ChatNotReady:
+                    backend.abort_chat()  # 放弃这条指令，不让之后打开的聊天框留在屏幕上
+                    chat_open = False
+                    raise
+        else:
+            backend.wait(backend.chat_open_delay)
+        backend.write_text(text)  # 输入指令
+        backend.wait(backend.pre_enter_delay)
+        backend.press('enter')  # 发送指令
+        chat_open = False
+        if probe is not None:
+            probe.wait_closed(backend)
+        else:
+            backend.wait(backend.post_enter_delay)
+    except StopRequested:
+        if chat_open:
+            try:
+                backend.abort_chat()
+            except Exception:
+                pass
+        raise
+
+
+def create_backend(name=DEFAULT_BACKEND, **kwargs):
+    """按名称创建输入后端"""
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的输入后端: {name}")
+    return backend_cls(**kwargs)
@@ -0,0 +1,154 @@
+"""执行过程计时统计：固定桶直方图，定期导出为 JSON Lines 和 Prometheus 文本格式
+
+每个直方图只保存固定数量的桶计数、总数和总和，无限循环时内存占用也不会增长；
+记录一次只需一次二分查找和几次加法，可以一直开启。
+Prometheus 文件每次原子重写，可由 node_exporter 的 textfile 收集器等本地采集器读取。
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from route_store import atomic_write
+
+DEFAULT_JSONL_PATH = "route_metrics.jsonl"
+DEFAULT_PROM_PATH = "route_metrics.prom"
+FLUSH_INTERVAL = 15.0  # 导出间隔(秒)
+MAX_JSONL_BYTES = 5 * 1024 * 1024  # JSON Lines 文件超过该大小时轮转为 .1
+METRIC_PREFIX = "mc_route_"
+
+LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_ERROR_BOUNDS = (-30.0, -10.0, -1.0, -0.1, -0.01, 0.0, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+CYCLE_BOUNDS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 180.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+class Histogram:
+    """固定桶直方图，桶上界语义与 Prometheus 的 le 相同"""
+
+    def __init__(self, name, help_text, bounds):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """按桶上界估算分位数，落在 +Inf 桶时返回最大值"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "bounds": self.bounds,
+            "counts": self.counts,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+    def prometheus_lines(self):
+        name = METRIC_PREFIX + self.name
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum!r}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class EngineMetrics:
+    """执行引擎的各项计时直方图（秒）
+
+    typing       发送一条指令（点击、打开聊天框、输入、回车）的耗时
+    wait_error   每步实际耗时减去配置的等待时间，负数表示检测到到达后提前结束
+    cycle        每次循环的耗时
+    stop_latency 从请求停止到执行线程退出的耗时
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.typing = Histogram("typing_seconds", "发送一条指令的耗时(秒)", LATENCY_BOUNDS)
+        self.wait_error = Histogram("wait_error_seconds", "每步实际耗时与配置等待时间之差(秒)", WAIT_ERROR_BOUNDS)
+        self.cycle = Histogram("cycle_seconds", "每次循环的耗时(秒)", CYCLE_BOUNDS)
+        self.stop_latency = Histogram("stop_latency_seconds", "请求停止到执行线程退出的耗时(秒)", LATENCY_BOUNDS)
+        self.histograms = (self.typing, self.wait_error, self.cycle, self.stop_latency)
+
+    def observe(self, histogram, value):
+        with self._lock:
+            histogram.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {histogram.name: histogram.to_dict() for histogram in self.histograms}
+
+    def prometheus_text(self):
+        with self._lock:
+            lines = []
+            for histogram in self.histograms:
+                lines.extend(histogram.prometheus_lines())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """定期把统计写入 JSON Lines（追加）和 Prometheus 文本文件（原子重写）
+
+    不单独开线程：执行线程每步调用 maybe_flush()，到达间隔时才真正写文件。
+    """
+
+    def __init__(self, metrics, jsonl_path=DEFAULT_JSONL_PATH, prom_path=DEFAULT_PROM_PATH,
+                 interval=FLUSH_INTERVAL, max_jsonl_bytes=MAX_JSONL_BYTES, clock=time.monotonic):
+        self.metrics = metrics
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.interval = interval
+        self.max_jsonl_bytes = max_jsonl_bytes
+        self.clock = clock
+        self._next_flush = clock() + interval
+
+    def maybe_flush(self):
+        if self.clock() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        """立即导出，写文件失败时忽略（统计不应影响路线执行）"""
+        self._next_flush = self.clock() + self.interval
+        try:
+            if self.jsonl_path:
+                self._append_jsonl()
+            if self.prom_path:
+                text = self.metrics.prometheus_text()
+                atomic_write(self.prom_path, lambda f: f.write(text))
+        except OSError:
+            pass
+
+    def _append_jsonl(self):
+        if os.path.exists(self.jsonl_path) and os.path.getsize(self.jsonl_path) > self.max_jsonl_bytes:
+            os.replace(self.jsonl_path, self.jsonl_path + ".1")
+        record = {"time": time.time(), "metrics": self.metrics.snapshot()}
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
@@ -0,0 +1,178 @@
+"""多客户端并行执行：每个客户端绑定一个窗口区域，共享一把输入锁
+
+每个客户端在各自的线程中运行 RouteEngine，发送指令前先获取共享的输入锁，
+点击自己窗口的中心使其获得焦点后再输入；等待期间不持有锁，
+因此一个客户端输入时其他客户端仍在倒计时，N 个客户端的吞吐接近单客户端的 N 倍。
+
+用法:
+    python multi_client.py --client 路线1.json 0,0,960,1040 --client 路线2.json 960,0,960,1040
+窗口区域也可以写成 title:窗口标题，由 pygetwindow 查找窗口位置。
+"""
+import threading
+
+from input_backend import DEFAULT_BACKEND, create_backend
+from route_engine import STARTUP_DELAY, RouteEngine
+from route_store import load_route_file
+from scheduler import MonotonicClock
+
+
+def parse_region(text):
+    """解析 "left,top,width,height" 或 "title:窗口标题" 为窗口区域"""
+    if text.startswith("title:"):
+        return window_region(text[len("title:"):])
+    parts = [int(part) for part in text.replace(" ", "").split(",")]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError(f"窗口区域格式错误: {text!r}（应为 left,top,width,height）")
+    return tuple(parts)
+
+
+def window_region(title):
+    """按标题查找窗口并返回其区域（需要 pygetwindow，pyautogui 的依赖）"""
+    import pygetwindow
+
+    windows = pygetwindow.getWindowsWithTitle(title)
+    if not windows:
+        raise ValueError(f"找不到窗口: {title!r}")
+    window = windows[0]
+    return window.left, window.top, window.width, window.height
+
+
+def region_center(region):
+    left, top, width, height = region
+    return left + width // 2, top + height // 2
+
+
+class ClientTarget:
+    """一个游戏客户端：路线、循环设置和窗口区域"""
+
+    def __init__(self, name, route, settings, region, arrival_detector=None):
+        self.name = name
+        self.route = route
+        self.settings = settings
+        self.region = region
+        self.arrival_detector = arrival_detector
+
+    @classmethod
+    def from_config(cls, config_path, region, name=None):
+        settings, route = load_route_file(config_path)
+        return cls(name or config_path, route, settings, region)
+
+    @property
+    def focus(self):
+        return region_center(self.region)
+
+
+class MultiClientRunner:
+    """并行运行多个客户端的路线"""
+
+    def __init__(self, clients, backend, clock=None, startup_delay=STARTUP_DELAY, on_event=None):
+        self.clients = list(clients)
+        self.backend = backend  # 所有客户端共用同一套键鼠，由输入锁串行化
+        self.clock = clock or MonotonicClock()
+        self.on_event = on_event  # (客户端名称, 键, 值)
+        self.input_lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.engines = [self._create_engine(client, startup_delay) for client in self.clients]
+        self._threads = []
+
+    def _create_engine(self, client, startup_delay):
+        def emit(key, value):
+            if self.on_event is not None:
+                self.on_event(client.name, key, value)
+
+        return RouteEngine.from_settings(
+            client.route, client.settings, self.backend,
+            clock=self.clock,
+            cancel_event=self.cancel_event,
+            arrival_detector=client.arrival_detector,
+            on_event=emit,
+            focus=client.focus,
+            input_lock=self.input_lock,
+            startup_delay=startup_delay
+        )
+
+    def start(self):
+        self._threads = [threading.Thread(target=engine.run, name=client.name, daemon=True)
+                         for client, engine in zip(self.clients, self.engines)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def join(self, timeout=None):
+        """等待所有客户端结束，返回是否全部结束"""
+        for thread in self._threads:
+            thread.join(timeout)
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+        self.cancel_event.set()
+
+    def run(self):
+        self.start()
+        self.join()
+
+
+def commands_by_window(events, regions):
+    """根据假后端记录的事件，统计每个窗口区域实际收到的指令
+
+    点击落在哪个区域内，之后输入的指令就算作该区域收到的；
+    返回 {区域下标: [指令, ...]}，同时检查指令输入过程中没有被其他窗口的点击打断。
+    """
+    received = {index: [] for index in range(len(regions))}
+    current = None
+    buffer = []
+    for _, action, arg in events:
+        if action == "click":
+            if buffer:
+                raise AssertionError(f"指令输入过程中焦点被切换: {''.join(buffer)!r}")
+            x, y = arg
+            current = next((index for index, (left, top, width, height) in enumerate(regions)
+                            if left <= x < left + width and top <= y < top + height), None)
+        elif action in ("write", "key"):
+            buffer.append(arg)
+        elif action == "press" and arg == "enter":
+            if current is not None:
+                received[current].append("".join(buffer))
+            buffer = []
+        elif action == "press":
+            buffer = []
+    return received
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from stop_watcher import StopWatcher, corner_check, hotkey_checks
+
+    parser = argparse.ArgumentParser(description="多客户端并行执行路线")
+    parser.add_argument("--client", nargs=2, action="append", required=True, metavar=("CONFIG", "REGION"),
+                        help="路线配置文件和窗口区域 left,top,width,height 或 title:窗口标题")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, help="输入方式")
+    args = parser.parse_args(argv)
+
+    clients = [ClientTarget.from_config(config, parse_region(region), name=f"#{index} {config}")
+               for index, (config, region) in enumerate(args.client)]
+
+    def log(name, key, value):
+        if key in ("status", "cycle"):
+            print(f"[{time.strftime('%H:%M:%S')}] {name} {key}: {value}", flush=True)
+
+    runner = MultiClientRunner(clients, create_backend(args.backend), on_event=log)
+    checks = [corner_check(runner.backend.position)] + hotkey_checks()
+    watcher = StopWatcher(runner.cancel_event, checks).start()
+    runner.start()
+    try:
+        while not runner.join(timeout=0.2):
+            pass
+    except KeyboardInterrupt:
+        runner.stop()
+        runner.join()
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""性能分析开关：对执行循环做确定性分析（cProfile），并统计关键调用的墙钟耗时
+
+ProfileSession 在调用 start() 的线程中启用 cProfile，完成指定次数的循环后自动停止，
+finish() 保存 pstats 文件（可用 python -m pstats 或 snakeviz 查看）和一份文本摘要：
+按累计耗时排序的前若干个函数，以及各计时区间的调用次数、总耗时和最大耗时。
+
+Spans 只在启用分析时用计时包装替换实例上的方法，restore() 后恢复为类中的原方法，
+关闭分析时执行路径上没有任何额外代码。
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+DEFAULT_PREFIX = "mc_goto_profile"
+TOP_COUNT = 20  # 摘要中列出的函数数
+
+
+class Spans:
+    """按名称统计方法调用的次数和墙钟耗时"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stats = {}  # 名称 -> [次数, 总耗时, 最大耗时]
+        self._lock = threading.Lock()
+        self._patched = []  # (对象, 方法名)
+
+    def record(self, name, seconds):
+        with self._lock:
+            entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def wrap(self, obj, method, name=None):
+        """用计时包装替换对象上的方法，调用 restore() 时恢复"""
+        original = getattr(obj, method)
+        label = name or f"{type(obj).__name__}.{method}"
+        clock = self.clock
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(label, clock() - started)
+
+        setattr(obj, method, timed)
+        self._patched.append((obj, method))
+        return timed
+
+    def restore(self):
+        """删除实例上的包装，恢复类中的原方法"""
+        for obj, method in reversed(self._patched):
+            obj.__dict__.pop(method, None)
+        self._patched.clear()
+
+    def report(self):
+        """按总耗时排序的文本表格"""
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'区间':<36} {'次数':>8} {'总耗时(s)':>10} {'平均(ms)':>10} {'最大(ms)':>10}"]
+        for name, (count, total, longest) in rows:
+            lines.append(f"{name:<36} {count:>8} {total:>10.3f} {total / count * 1000:>10.2f} {longest * 1000:>10.2f}")
+        return lines
+
+
+class ProfileSession:
+    """一次执行的性能分析，cycles 为分析的循环次数（0 表示直到执行结束）"""
+
+    def __init__(self, cycles=0, prefix=DEFAULT_PREFIX, top=TOP_COUNT):
+        self.cycles = cycles
+        self.prefix = prefix
+        self.top = top
+        self.spans = Spans()
+        self.profile = cProfile.Profile()
+        self.active = False
+        self._used = False
+
+    def start(self):
+        """在执行循环所在的线程中调用，返回是否已启用分析"""
+        if not self.active:
+            try:
+                self.profile.enable()
+            except ValueError:
+                return False  # 已有其他分析工具（如调试器）在运行，不影响执行
+            self.active = self._used = True
+        return True
+
+    def stop(self):
+        """停止分析，必须与 start() 在同一线程中调用"""
+        if self.active:
+            self.profile.disable()
+            self.active = False
+
+    def wrap_events(self, engine):
+        """包装引擎的 on_event，完成 cycles 次循环后（下一次循环开始时）停止分析"""
+        on_event = engine.on_event
+
+        def handler(key, value):
+            if key == "cycle" and self.cycles and engine.cycle_count > self.cycles:
+                self.stop()
+            if on_event is not None:
+                on_event(key, value)
+
+        engine.on_event = handler
+
+    def summary(self):
+        """文本摘要：累计耗时最多的函数和各计时区间"""
+        lines = []
+        if self._used:
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            lines.extend(line for line in stream.getvalue().splitlines() if line.strip())
+        if self.spans.stats:
+            lines.append("")
+            lines.extend(self.spans.report())
+        return "\n".join(lines)
+
+    def finish(self):
+        """停止分析并保存结果，返回 (pstats 文件, 摘要文件, 摘要文本)"""
+        self.stop()
+        self.spans.restore()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        stats_path = f"{self.prefix}-{stamp}.prof"
+        summary_path = f"{self.prefix}-{stamp}.txt"
+        if self._used:
+            self.profile.dump_stats(stats_path)
+        else:
+            stats_path = None
+        text = self.summary()
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        return stats_path, summary_path, text
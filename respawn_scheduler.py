@@ -0,0 +1,289 @@
+"""多路线刷新调度：在多个副本之间轮转，总是先去 BOSS 最早可打的路线
+
+调度配置（JSON）列出若干路线配置文件、各自的 BOSS 刷新周期以及路线之间的赶路耗时：
+
+    {
+      "routes": [{"config": "副本A.json", "respawn": 160},
+                 {"config": "副本B.json", "respawn": 300, "name": "B"}],
+      "travel": {"副本A.json": {"副本B.json": 45}},
+      "default_speed": 4.0
+    }
+
+每条路线执行一遍计划即击杀一次 BOSS，BOSS 在击杀后 respawn 秒刷新。
+未在 travel 中列出的赶路耗时按上一条路线终点到下一条路线起点的距离 / default_speed 估算，
+连续执行同一条路线时也一样（从终点回到起点）。
+
+调度器用优先队列按刷新时刻保存各路线，每次选择"赶到后可以开始的时刻"最早的路线：
+可开始时刻 = max(现在 + 赶路耗时, 刷新时刻)，它不早于刷新时刻，
+因此按刷新时刻出队、遇到刷新时刻晚于当前最优值的路线即可停止查找。
+选中路线后第一步的等待时间延长为赶路耗时与等待刷新的时间，之后按计划执行一遍。
+执行出错或未完成的路线按退避时间推迟（连续失败时加倍），不会被立即重新选中。
+
+project() 用同样的规则离线推算每小时击杀数，run() 用 RouteEngine 实际执行并统计，
+两者都可以使用 scheduler.VirtualClock 测试。
+直接运行本模块会执行调度配置，--simulate 用虚拟时钟模拟并对比单条路线的效率。
+"""
+import heapq
+import json
+import math
+import os
+import threading
+from collections import namedtuple
+
+from route_engine import RouteEngine
+from route_plan import RoutePlan, compile_plan
+from route_store import load_route_file
+from scheduler import MonotonicClock
+
+DEFAULT_SPEED = 4.0  # 估算赶路耗时的移动速度(方块/秒)
+FAILURE_BACKOFF = 30.0  # 执行失败后推迟该路线的时间(秒)，连续失败时加倍
+MAX_FAILURE_BACKOFF = 600.0
+
+# 一次执行的记录，completed 表示完整执行了一遍（击杀一次）
+RunRecord = namedtuple("RunRecord", ["name", "started", "finished", "completed"])
+
+
+class ScheduledRoute:
+    """调度中的一条路线"""
+
+    __slots__ = ("name", "config", "plan", "respawn", "ready_at", "kills", "failures")
+
+    def __init__(self, name, config, plan, respawn):
+        self.name = name
+        self.config = config
+        self.plan = plan  # 只执行一遍的计划
+        self.respawn = respawn
+        self.ready_at = 0.0  # BOSS 刷新时刻
+        self.kills = 0
+        self.failures = 0  # 连续失败次数
+
+    @property
+    def entry(self):
+        return self.plan.steps[0].coords
+
+    @property
+    def exit(self):
+        return self.plan.steps[-1].coords
+
+
+def _single_pass(route, settings):
+    settings = dict(settings, cycle_count="1", cycle_period="0")
+    return compile_plan(route, settings)
+
+
+def _with_first_delay(plan, delay):
+    """返回第一步等待时间改为 delay 的计划"""
+    shift = delay - plan.steps[0].delay
+    steps = [plan.steps[0]._replace(delay=delay, offset=plan.steps[0].offset + shift)]
+    steps += [step._replace(offset=step.offset + shift) for step in plan.steps[1:]]
+    return RoutePlan(steps, plan.segments, plan.cycles, plan.period)
+
+
+def load_schedule(path):
+    """读取调度配置，返回 (路线列表, 赶路耗时表, 默认速度)；路线配置的相对路径相对于调度配置所在目录"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    routes = []
+    for item in data.get("routes", []):
+        config = item["config"]
+        settings, route = load_route_file(os.path.join(base, config))
+        name = item.get("name") or os.path.splitext(os.path.basename(config))[0]
+        routes.append(ScheduledRoute(name, config, _single_pass(route, settings), float(item["respawn"])))
+    if not routes:
+        raise ValueError("调度配置中没有路线")
+    return routes, data.get("travel", {}), float(data.get("default_speed", DEFAULT_SPEED))
+
+
+class RespawnScheduler:
+    """按刷新时刻在多条路线之间轮转"""
+
+    def __init__(self, routes, travel=None, default_speed=DEFAULT_SPEED, clock=None):
+        self.routes = list(routes)
+        self.travel = travel or {}
+        self.default_speed = default_speed
+        self.clock = clock or MonotonicClock()
+        self.history = []  # RunRecord
+        self.started_at = None
+
+    @classmethod
+    def from_file(cls, path, clock=None):
+        routes, travel, speed = load_schedule(path)
+        return cls(routes, travel, speed, clock)
+
+    def travel_time(self, source, target):
+        """从 source 路线终点赶到 target 路线起点的耗时，source 为 None（刚开始）时为 0"""
+        if source is None:
+            return 0.0
+        explicit = self.travel.get(source.config, {}).get(target.config)
+        if explicit is not None:
+            return float(explicit)
+        return math.dist(source.exit, target.entry) / self.default_speed
+
+    def choose(self, queue, now, current):
+        """从优先队列中选出可开始时刻最早的路线，返回 (路线, 可开始时刻)，队列中移除该路线"""
+        best = best_start = None
+        popped = []
+        while queue and (best_start is None or queue[0][0] < best_start):
+            entry = heapq.heappop(queue)
+            popped.append(entry)
+            route = self.routes[entry[1]]
+            start = max(now + self.travel_time(current, route), route.ready_at)
+            if best_start is None or start < best_start:
+                best, best_start = route, start
+        for entry in popped:
+            if self.routes[entry[1]] is not best:
+                heapq.heappush(queue, entry)
+        return best, best_start
+
+    def _queue(self):
+        queue = [(route.ready_at, index) for index, route in enumerate(self.routes)]
+        heapq.heapify(queue)
+        return queue
+
+    def _requeue(self, queue, route):
+        heapq.heappush(queue, (route.ready_at, self.routes.index(route)))
+
+    def project(self, hours=1.0):
+        """按计划耗时离线推算 hours 小时内的击杀，返回 {路线名称: 每小时击杀数}（"总计" 为合计）"""
+        saved = [(route.ready_at, route.kills) for route in self.routes]
+        try:
+            for route in self.routes:
+                route.ready_at, route.kills = 0.0, 0
+            queue = self._queue()
+            now, current, horizon = 0.0, None, hours * 3600
+            while True:
+                route, start = self.choose(queue, now, current)
+                # 与 run() 相同：第一步的等待时间为 max(原等待时间, 到可开始时刻的时间)
+                first_delay = route.plan.steps[0].delay
+                finished = max(start, now + first_delay) + route.plan.step_time - first_delay
+                if finished > horizon:
+                    break
+                route.kills += 1
+                route.ready_at = finished + route.respawn
+                self._requeue(queue, route)
+                now, current = finished, route
+            rates = {route.name: route.kills / hours for route in self.routes}
+        finally:
+            for route, (ready_at, kills) in zip(self.routes, saved):
+                route.ready_at, route.kills = ready_at, kills
+        rates["总计"] = sum(rates.values())
+        return rates
+
+    def solo_rates(self):
+        """每条路线单独反复执行时的每小时击杀数（等待刷新后从起点重新开始）"""
+        return {route.name: 3600 / (route.plan.step_time + route.respawn) for route in self.routes}
+
+    def run(self, backend, hours=None, cancel_event=None, on_event=None, **engine_kwargs):
+        """实际执行调度，直到经过 hours 小时（None 表示直到停止）或 cancel_event 被设置"""
+        cancel_event = cancel_event or threading.Event()
+        clock = self.clock
+        self.started_at = clock.now()
+        deadline = None if hours is None else self.started_at + hours * 3600
+        for route in self.routes:
+            route.ready_at = self.started_at
+            route.failures = 0
+        queue = self._queue()
+        current = None
+
+        def emit(key, value):
+            if on_event is not None:
+                on_event(key, value)
+
+        while not cancel_event.is_set():
+            now = clock.now()
+            route, start = self.choose(queue, now, current)
+            if deadline is not None and start >= deadline:
+                break
+            emit("status", f"下一条路线: {route.name}（{max(0.0, start - now):.0f}s 后开始）")
+            # 第一步前往路线起点，等待时间延长为赶路和等待刷新的时间
+            plan = _with_first_delay(route.plan, max(route.plan.steps[0].delay, start - now))
+            engine = RouteEngine(plan, backend, clock=clock, cancel_event=cancel_event, on_event=on_event,
+                                 startup_delay=0, **engine_kwargs)
+            engine.run()
+            finished = clock.now()
+            completed = engine.outcome == "completed"
+            self.history.append(RunRecord(route.name, now, finished, completed))
+            if completed:
+                route.kills += 1
+                route.failures = 0
+                route.ready_at = finished + route.respawn
+            elif not cancel_event.is_set():
+                backoff = min(FAILURE_BACKOFF * 2 ** route.failures, MAX_FAILURE_BACKOFF)
+                route.failures += 1
+                route.ready_at = finished + backoff
+                emit("status", f"{route.name} 执行失败，{backoff:.0f}s 后再试")
+            self._requeue(queue, route)
+            current = route
+        return self.actual_rates()
+
+    def actual_rates(self):
+        """实际执行的每小时击杀数（"总计" 为合计）"""
+        if self.started_at is None:
+            return {}
+        hours = max(1e-9, (self.clock.now() - self.started_at) / 3600)
+        rates = {route.name: route.kills / hours for route in self.routes}
+        rates["总计"] = sum(rates.values())
+        return rates
+
+
+def format_rates(projected, actual=None, solo=None):
+    lines = [f"{'路线':<20} {'预计/小时':>10} {'实际/小时':>10} {'单独/小时':>10}"]
+    for name, rate in projected.items():
+        actual_text = f"{actual[name]:>10.1f}" if actual and name in actual else f"{'':>10}"
+        solo_text = f"{solo[name]:>10.1f}" if solo and name in solo else f"{'':>10}"
+        lines.append(f"{name:<20} {rate:>10.1f} {actual_text} {solo_text}")
+    return lines
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多路线刷新调度")
+    parser.add_argument("schedule", help="调度配置文件")
+    parser.add_argument("--hours", type=float, help="执行的小时数，默认直到停止（模拟时默认 1 小时）")
+    parser.add_argument("--simulate", action="store_true", help="用虚拟时钟模拟")
+    parser.add_argument("--backend", help="输入方式")
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        from input_backend import DEFAULT_BACKEND, FakeInputBackend
+        from scheduler import VirtualClock
+
+        clock = VirtualClock(wake_jitter=0.015, seed=0)
+        scheduler = RespawnScheduler.from_file(args.schedule, clock)
+        backend = FakeInputBackend.like(args.backend or DEFAULT_BACKEND, clock=clock.now, sleep=clock.sleep)
+        projected = scheduler.project(args.hours or 1.0)
+        actual = scheduler.run(backend, hours=args.hours or 1.0, countdown_interval=None)
+        print("\n".join(format_rates(projected, actual, scheduler.solo_rates())))
+        return 0
+
+    import time
+
+    from input_backend import DEFAULT_BACKEND, create_backend
+    from run_route import EXIT_INTERRUPTED, run_interruptible
+    from stop_watcher import StopWatcher, corner_check, hotkey_checks
+
+    scheduler = RespawnScheduler.from_file(args.schedule)
+    print("\n".join(format_rates(scheduler.project(args.hours or 1.0), solo=scheduler.solo_rates())), flush=True)
+    backend = create_backend(args.backend or DEFAULT_BACKEND)
+    cancel_event = threading.Event()
+
+    def log(key, value):
+        if key in ("status", "action") and value != "无":
+            print(f"[{time.strftime('%H:%M:%S')}] {key}: {value}", flush=True)
+
+    watcher = StopWatcher(cancel_event, [corner_check(backend.position)] + hotkey_checks()).start()
+    try:
+        interrupted = run_interruptible(
+            lambda: scheduler.run(backend, args.hours, cancel_event, log, countdown_interval=None),
+            cancel_event.set)
+    finally:
+        watcher.stop()
+        backend.close()
+    print("\n".join(format_rates(scheduler.actual_rates())))
+    return EXIT_INTERRUPTED if interrupted else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,394 @@
+"""路线执行引擎：与界面无关的循环执行逻辑
+
+RouteEngine 在调用线程中遍历执行计划（route_plan.RoutePlan），依次发送预先生成的指令并等待到截止时间，
+状态变化通过 on_event(键, 值) 回调通知界面或日志，键包括
+status / action / point / cycle / running。
+传入 metrics（metrics.EngineMetrics）时记录每步的输入耗时、等待误差、循环耗时和停止延迟。
+传入 waypoints（waypoints.WaypointRegistry）时启用航点模式，开始循环前注册航点，之后按航点名称寻路。
+传入 chat_probe（chat_probe.ChatProbe）时通过采样像素判断聊天框是否打开，代替固定等待。
+传入 checkpoints（checkpoint.CheckpointStore）时每步记录断点，传入 resume（checkpoint.ResumePoint）时从断点继续。
+传入 travel_log（travel_model.TravelLog）时记录检测到到达或手动标记到达时的路段耗时。
+传入 reloader（hot_reload.PlanReloader）时在每步开始前检查并换用修改后的执行计划，保持当前位置。
+传入 history（run_history.RunRecorder）时记录每次循环和各点的耗时以及停止原因。
+以上记录逻辑在 EngineBase 中实现，async_engine.AsyncRouteEngine 共用同一套。
+"""
+import math
+import threading
+
+from arrival_detector import FAILED, REACHED
+from checkpoint import plan_digest
+from hot_reload import remap_position, same_plan
+from input_backend import StopRequested, send_chat_command
+from route_plan import compile_plan
+from scheduler import DeadlineScheduler, MonotonicClock
+
+DEFAULT_FOCUS = (960, 540)  # 1920x1080 单窗口时的游戏窗口中心
+STARTUP_DELAY = 3.0  # 启动后给用户切换到游戏窗口的时间(秒)
+LOCK_POLL_INTERVAL = 0.05  # 等待输入锁时检查停止请求的间隔(秒)
+COUNTDOWN_INTERVAL = 1.0  # 倒计时刷新间隔(秒)
+
+
+class EngineBase:
+    """RouteEngine 和 async_engine.AsyncRouteEngine 共用的状态和每步的记录逻辑
+
+    断点、热加载、计时统计、路段耗时和运行历史都在这里实现，两个引擎只负责发送指令和等待
+    （阻塞等待或 await），并在执行循环的对应位置调用 begin_run / begin_cycle / begin_step /
+    arrived / end_step / end_cycle / end_run。
+    """
+
+    blocking_history = True  # 结束时是否等待运行历史写入完成（asyncio 引擎不阻塞事件循环）
+
+    def __init__(self, plan, backend, clock, arrival_detector=None, on_event=None, focus=DEFAULT_FOCUS,
+                 input_lock=None, startup_delay=STARTUP_DELAY, countdown_interval=COUNTDOWN_INTERVAL,
+                 metrics=None, exporter=None, waypoints=None, checkpoints=None, resume=None, travel_log=None,
+                 reloader=None, history=None):
+        self.plan = plan
+        self.backend = backend
+        self.total_cycles = plan.cycles  # 0 表示无限循环
+        self.clock = clock
+        self.arrival_detector = arrival_detector
+        self.on_event = on_event
+        self.focus = focus
+        self.input_lock = input_lock  # 同一时刻只有一个客户端（或一条路线）输入
+        self.startup_delay = startup_delay
+        self.countdown_interval = countdown_interval  # None 表示不显示倒计时，一次等待到截止时间
+        self.metrics = metrics
+        self.exporter = exporter  # metrics.MetricsExporter，每步检查是否需要导出
+        self.waypoints = waypoints
+        self.checkpoints = checkpoints
+        self.resume = resume
+        self.travel_log = travel_log
+        self.reloader = reloader
+        self.history = history
+        self.stop_requested_at = None
+        self.cycle_count = 0
+        self.outcome = None  # 执行结束后为 completed / stopped / error: 错误信息
+        self.scheduler = None  # 本次执行的 DeadlineScheduler，begin_run() 时创建
+        self._digest = None
+        self._progress = None  # 最近一次断点的 (计划中的位置, 截止时间)
+        self._previous = None  # 上一步的坐标，第一步的出发位置未知，不记录耗时
+        self._segment = None  # 正在行进的路段 (上一点坐标, 本点坐标, 开始时间)
+        self._segment_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, route, settings, backend, **kwargs):
+        """用配置文件格式的循环设置创建引擎，设置无效时抛出 route_plan.PlanError"""
+        return cls(compile_plan(route, settings), backend, **kwargs)
+
+    def emit(self, key, value):
+        if self.on_event is not None:
+            self.on_event(key, value)
+
+    def countdown_step(self, desc, remaining):
+        """刷新倒计时，返回本次等待的时长：对齐到整秒刷新，最后不足一秒时精确等待到截止时间"""
+        if not self.countdown_interval:
+            return remaining
+        self.emit("action", f"{desc} - 等待: {math.ceil(remaining)}s")
+        return remaining % self.countdown_interval or self.countdown_interval
+
+    def announce_alignment(self, cycle_start):
+        self.emit("status", "等待周期对齐")
+        self.emit("action", f"下次循环: {cycle_start - self.clock.now():.1f}s 后")
+
+    def update_cycle_count(self):
+        total = "∞" if self.total_cycles == 0 else self.total_cycles
+        self.emit("cycle", f"{self.cycle_count}/{total}")
+
+    def save_checkpoint(self, position, deadline):
+        """记录断点，写入失败不影响执行"""
+        if self.checkpoints is None:
+            return
+        if self._digest is None:
+            self._digest = plan_digest(self.plan)
+        self._progress = (position, deadline)
+        try:
+            self.checkpoints.save(self._digest, self.cycle_count, position, deadline - self.clock.now())
+        except OSError:
+            pass
+
+    def finish_checkpoint(self, finished):
+        """执行结束时：全部完成则删除断点，否则按停止时刻更新剩余等待时间"""
+        if self.checkpoints is None:
+            return
+        if finished:
+            try:
+                self.checkpoints.clear()
+            except OSError:
+                pass
+        elif self._progress is not None:
+            self.save_checkpoint(*self._progress)
+
+    def mark_arrived(self):
+        """记录当前路段的行进耗时并返回，每个路段只记录一次；没有可记录的路段时返回 None
+
+        检测到到达时由执行循环调用，也可以由界面在手动确认到达时调用。
+        """
+        with self._segment_lock:
+            segment, self._segment = self._segment, None
+        if segment is None or self.travel_log is None:
+            return None
+        start, end, began = segment
+        seconds = self.clock.now() - began
+        try:
+            self.travel_log.record(start, end, seconds)
+        except OSError:
+            pass
+        return seconds
+
+    def take_reload(self, position):
+        """换用修改后的计划，返回新计划中的下一步；没有修改或新配置无效时返回 None，继续使用原计划"""
+        try:
+            new_plan = self.reloader.take()
+            if new_plan is None or same_plan(new_plan, self.plan):
+                return None
+        except (OSError, ValueError) as e:
+            self.emit("status", f"配置无效，继续按原路线执行: {e}")
+            return None
+        try:
+            position = remap_position(self.plan, new_plan, position)
+        except Exception as e:
+            # 如打包时缺少 difflib；热加载失败不应中断正在执行的循环
+            self.emit("status", f"无法应用修改，继续按原路线执行: {e}")
+            return None
+        self.plan = new_plan
+        self.total_cycles = new_plan.cycles
+        self.scheduler.period = new_plan.period
+        self._digest = None  # 断点改为对应新计划
+        if self.history is not None:
+            self.history.use_plan(new_plan)
+        self.update_cycle_count()
+        return position
+
+    # ---- 执行循环中的记录 ----
+
+    def begin_run(self, plan):
+        """开始循环前调用，返回 (第一步的位置, 第一步的等待时间, 从断点继续前已完成的循环数)"""
+        resume = self.resume
+        first_step, first_delay = (resume.step, resume.delay) if resume else (0, None)
+        self.cycle_count = resumed_cycles = resume.completed_cycles if resume else 0
+        self.update_cycle_count()
+        if resume:
+            self.emit("status", f"从第 {self.cycle_count + 1} 次循环第 {first_step + 1} 步继续")
+        self.scheduler = DeadlineScheduler(self.clock, period=plan.period)
+        self.scheduler.start()
+        if self.history is not None:
+            self.history.start(self.plan)
+        return first_step, first_delay, resumed_cycles
+
+    def begin_cycle(self, whole):
+        """每次循环开始时调用，whole 为假表示从断点中途开始；返回循环开始时间"""
+        self.cycle_count += 1
+        self.update_cycle_count()
+        self.emit("status", f"第 {self.cycle_count} 次循环")
+        if self.history is not None:
+            self.history.begin_cycle(whole)
+        return self.clock.now()
+
+    def begin_step(self, step, delay):
+        """发送指令前调用，返回 (开始时间, 截止时间)；发送指令的耗时计入等待时间"""
+        self.emit("point", step.desc)
+        began = self.clock.now()
+        deadline = self.scheduler.step_deadline(delay)
+        if self.arrival_detector:
+            self.arrival_detector.arm()
+        if self.travel_log is not None:
+            with self._segment_lock:
+                self._segment = (self._previous, step.coords, began) if self._previous else None
+        self._previous = step.coords
+        return began, deadline
+
+    def arrived(self, position):
+        """检测到提前到达时调用：从当前时间计算下一步，并记录断点和路段耗时"""
+        self.scheduler.resync()
+        self.save_checkpoint(position, self.clock.now())
+        self.mark_arrived()
+
+    def end_step(self, step, began, delay):
+        """一步正常结束（未被停止）时调用"""
+        elapsed = self.clock.now() - began
+        if self.metrics is not None:
+            self.metrics.observe(self.metrics.wait_error, elapsed - delay)
+        if self.history is not None:
+            self.history.step(step.index, elapsed)
+        if self.exporter is not None:
+            self.exporter.maybe_flush()
+
+    def end_cycle(self, began):
+        """完整执行一次循环后调用"""
+        elapsed = self.clock.now() - began
+        if self.metrics is not None:
+            self.metrics.observe(self.metrics.cycle, elapsed)
+        if self.history is not None:
+            self.history.cycle(elapsed)
+
+    def end_run(self, finished, reason):
+        """执行结束时调用（包括停止和出错）"""
+        self.outcome = reason
+        metrics = self.metrics
+        if metrics is not None and self.stop_requested_at is not None:
+            metrics.observe(metrics.stop_latency, self.clock.now() - self.stop_requested_at)
+        if self.exporter is not None:
+            self.exporter.flush()
+        self.finish_checkpoint(finished)
+        if self.history is not None and self.history.started is not None:
+            self.history.finish(reason, wait=self.blocking_history)
+
+
+class RouteEngine(EngineBase):
+    """按执行计划循环执行一条路线"""
+
+    def __init__(self, plan, backend, clock=None, cancel_event=None, arrival_detector=None, on_event=None,
+                 focus=DEFAULT_FOCUS, input_lock=None, startup_delay=STARTUP_DELAY,
+                 countdown_interval=COUNTDOWN_INTERVAL, metrics=None, exporter=None, waypoints=None,
+                 chat_probe=None, checkpoints=None, resume=None, travel_log=None, reloader=None,
+                 history=None):
+        super().__init__(plan, backend, clock or MonotonicClock(), arrival_detector=arrival_detector,
+                         on_event=on_event, focus=focus, input_lock=input_lock, startup_delay=startup_delay,
+                         countdown_interval=countdown_interval, metrics=metrics, exporter=exporter,
+                         waypoints=waypoints, checkpoints=checkpoints, resume=resume, travel_log=travel_log,
+                         reloader=reloader, history=history)
+        self.cancel_event = cancel_event or threading.Event()
+        self.chat_probe = chat_probe
+        self.backend.cancel_event = self.cancel_event
+
+    def stop(self, requested_at=None):
+        """请求停止，正在进行的输入和等待会立即中断
+
+        requested_at 为检测到停止条件的时刻（与引擎时钟同源），用于统计停止延迟。
+        """
+        if self.stop_requested_at is None:
+            self.stop_requested_at = self.clock.now() if requested_at is None else requested_at
+        self.cancel_event.set()
+
+    def _acquire_input(self):
+        """获取输入锁，等待期间收到停止请求时返回 False"""
+        if self.input_lock is None:
+            return True
+        while not self.cancel_event.is_set():
+            if self.input_lock.acquire(timeout=LOCK_POLL_INTERVAL):
+                return True
+        return False
+
+    def send_command(self, command):
+        """发送命令函数，返回指令是否已完整发送"""
+        if not self._acquire_input():
+            return False
+        try:
+            self.emit("action", f"输入指令: {command}")
+            started = self.clock.now()
+            send_chat_command(self.backend, command, self.focus, self.chat_probe)
+            if self.metrics is not None:
+                self.metrics.observe(self.metrics.typing, self.clock.now() - started)
+            return True
+        except StopRequested:
+            pass  # 停止请求由执行循环处理
+        except Exception as e:
+            self.emit("status", f"输入失败: {str(e)}")
+        finally:
+            if self.input_lock is not None:
+                self.input_lock.release()
+
+    def wait_for_point(self, desc, deadline):
+        """等待到该点的截止时间，返回是否提前到达"""
+        stop = self.cancel_event
+        while not stop.is_set():
+            remaining = deadline - self.clock.now()
+            if remaining <= 0:
+                break
+            step = self.countdown_step(desc, remaining)
+            if not self.arrival_detector:
+                self.clock.wait(step, stop)
+                continue
+
+            # 配置的等待时间作为超时上限，检测到到达后立即前往下一个点
+            result = self.arrival_detector.wait(step, should_stop=stop.is_set)
+            if result == REACHED:
+                self.emit("status", f"已到达: {desc}")
+                return True
+            if result == FAILED:
+                self.emit("status", f"寻路失败: {desc}")
+        return False
+
+    def register_waypoints(self):
+        """航点模式：注册计划中尚未注册的航点，返回改用航点指令的执行计划"""
+        registry = self.waypoints
+        pending = registry.pending(self.plan.steps)
+        for count, (name, coords) in enumerate(pending, start=1):
+            if self.cancel_event.is_set():
+                break
+            self.emit("status", f"注册航点 {count}/{len(pending)}")
+            if self.send_command(registry.save_command(name, coords)):
+                registry.mark_registered(name)
+        return self.plan.map_commands(registry.command_for)
+
+    def apply_reload(self, plan, position):
+        """在两步之间换用修改后的计划，返回 (执行用的计划, 下一步的位置)"""
+        new_position = self.take_reload(position)
+        if new_position is None:
+            return plan, position
+        plan = self.register_waypoints() if self.waypoints is not None else self.plan
+        self.emit("status", f"已应用修改，共 {len(plan)} 步，从第 {new_position + 1} 步继续")
+        return plan, new_position
+
+    def run(self):
+        """执行坐标序列操作，直到完成指定循环次数或收到停止请求"""
+        stop = self.cancel_event
+        finished = False
+        reason = "stopped"
+        try:
+            self.emit("running", True)
+            self.emit("status", "启动中...")
+            self.clock.wait(self.startup_delay, stop)  # 给用户切换窗口的时间
+            plan = self.register_waypoints() if self.waypoints is not None else self.plan
+            first_step, first_delay, resumed_cycles = self.begin_run(plan)
+            scheduler = self.scheduler
+
+            while not stop.is_set() and (self.total_cycles == 0 or self.cycle_count < self.total_cycles):
+                cycle_start = scheduler.cycle_start(self.cycle_count - resumed_cycles)
+                if cycle_start > self.clock.now():
+                    self.announce_alignment(cycle_start)
+                    if self.clock.wait_until(cycle_start, stop):
+                        break
+
+                cycle_began = self.begin_cycle(first_step == 0)
+
+                # 依次执行计划中的每一步，从断点继续时跳过已完成的步骤
+                position = first_step
+                while position < len(plan.steps):
+                    if stop.is_set():
+                        break
+                    if self.reloader is not None:
+                        plan, position = self.apply_reload(plan, position)
+                        if position >= len(plan.steps):
+                            continue
+
+                    step = plan.steps[position]
+                    delay = step.delay if first_delay is None else first_delay
+                    first_delay = None
+                    step_began, deadline = self.begin_step(step, delay)
+                    self.send_command(step.command)
+                    self.emit("status", step.status)
+                    self.save_checkpoint(position, deadline)
+
+                    # 等待到该点的截止时间
+                    if self.wait_for_point(step.desc, deadline):
+                        self.arrived(position)
+                    if not stop.is_set():
+                        self.end_step(step, step_began, delay)
+                    position += 1
+                if not stop.is_set():  # 最后一步等待期间停止时，本次循环不完整，不记录耗时
+                    self.end_cycle(cycle_began)
+                first_step = 0
+
+            finished = not stop.is_set()
+            if finished:
+                reason = "completed"
+            self.emit("status", "已停止")
+        except Exception as e:
+            reason = f"error: {e}"
+            self.emit("status", f"错误: {str(e)}")
+        finally:
+            self.end_run(finished, reason)
+            self.emit("running", False)
+            self.emit("action", "无")
+            self.emit("point", "无")
@@ -0,0 +1,304 @@
+"""路线库：为多个路线配置中的所有点建立空间索引
+
+RouteLibrary 扫描目录中的路线文件（.json / .jsonl），把所有点和相邻点之间的线段
+按三维网格分桶（SpatialGrid），用于：
+- nearest(位置)：最近的路线点，从所在网格向外逐圈查找；
+- near(位置, 半径)：哪些路线经过附近（按线段距离判断，而不只是点）。
+数万个点时单次查询在毫秒级。refresh() 只在文件有变化时重建索引。
+
+nearest_entry(计划, 位置) 返回从离当前位置最近的一步开始执行的 checkpoint.ResumePoint，
+第一步只等待从当前位置赶到该点的估算时间（已在该点附近时立即前往下一步），
+当前位置可以手动输入、从 F3+C 复制的传送指令解析，或从客户端日志中最近的传送消息读取。
+直接运行本模块会列出目录中经过指定位置附近的路线。
+"""
+import math
+import os
+import re
+from collections import namedtuple
+
+from checkpoint import ResumePoint
+from route_optimizer import estimate_delay
+from route_store import load_route_file
+
+CELL_SIZE = 32  # 网格边长(方块)
+NEAREST_RINGS = 8  # 最近点查找的最大圈数，超出后线性扫描
+NEAR_RADIUS = 64  # 默认的"附近"半径(方块)
+LOG_TAIL_BYTES = 256 * 1024  # 读取客户端日志末尾的字节数
+
+RouteEntry = namedtuple("RouteEntry", ["path", "name", "route"])
+PointHit = namedtuple("PointHit", ["path", "name", "index", "desc", "distance"])
+# index 为该路线中离位置最近的点
+RouteHit = namedtuple("RouteHit", ["path", "name", "distance", "index"])
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_POSITION_PATTERNS = (
+    re.compile(rf"tp @s {_NUMBER} {_NUMBER} {_NUMBER}"),  # F3+C 复制的传送指令
+    re.compile(rf"Teleported .+? to {_NUMBER}, {_NUMBER}, {_NUMBER}"),  # 原版传送消息
+    re.compile(rf"^\s*{_NUMBER}[\s,]+{_NUMBER}[\s,]+{_NUMBER}\s*$"),  # 手动输入 "x y z"
+)
+
+
+def parse_position(text):
+    """从文本中解析坐标 (x, y, z)，无法解析时返回 None"""
+    for pattern in _POSITION_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return tuple(float(value) for value in match.groups())
+    return None
+
+
+def position_from_log(path):
+    """返回客户端日志中最近一条传送消息的坐标，没有时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, os.path.getsize(path) - LOG_TAIL_BYTES))
+            lines = f.read().decode("utf-8", errors="ignore").splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        position = parse_position(line)
+        if position is not None:
+            return position
+    return None
+
+
+def _point_segment_distance(p, a, b):
+    ab = [b[i] - a[i] for i in range(3)]
+    length2 = ab[0] * ab[0] + ab[1] * ab[1] + ab[2] * ab[2]
+    t = 0.0
+    if length2:
+        t = max(0.0, min(1.0, sum((p[i] - a[i]) * ab[i] for i in range(3)) / length2))
+    return math.dist(p, [a[i] + t * ab[i] for i in range(3)])
+
+
+class SpatialGrid:
+    """三维网格分桶：{网格坐标: [条目序号, ...]}"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.low = None  # 已占用网格的最小、最大坐标
+        self.high = None
+
+    def cell(self, x, y, z):
+        size = self.cell_size
+        return int(x // size), int(y // size), int(z // size)
+
+    def add(self, cell, item):
+        items = self.cells.get(cell)
+        if items is None:
+            items = self.cells[cell] = []
+            if self.low is None:
+                self.low = self.high = cell
+            else:
+                self.low = tuple(map(min, self.low, cell))
+                self.high = tuple(map(max, self.high, cell))
+        items.append(item)
+
+    def shell(self, center, ring):
+        """与中心网格切比雪夫距离恰好为 ring 的网格中的条目"""
+        cx, cy, cz = center
+        cells = self.cells
+        for dx in range(-ring, ring + 1):
+            for dy in range(-ring, ring + 1):
+                edge = abs(dx) == ring or abs(dy) == ring
+                for dz in (range(-ring, ring + 1) if edge else (-ring, ring)):
+                    items = cells.get((cx + dx, cy + dy, cz + dz))
+                    if items:
+                        yield from items
+
+    def box(self, low, high):
+        """网格坐标范围 [low, high] 内的条目
+
+        范围先裁剪到已占用网格的边界；裁剪后仍比已占用的网格数多时，直接遍历已占用的网格。
+        """
+        cells = self.cells
+        if not cells:
+            return
+        low = tuple(map(max, low, self.low))
+        high = tuple(map(min, high, self.high))
+        if any(a > b for a, b in zip(low, high)):
+            return
+        if math.prod(b - a + 1 for a, b in zip(low, high)) > len(cells):
+            for cell, items in cells.items():
+                if all(a <= c <= b for a, c, b in zip(low, cell, high)):
+                    yield from items
+            return
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                for z in range(low[2], high[2] + 1):
+                    items = cells.get((x, y, z))
+                    if items:
+                        yield from items
+
+
+class RouteLibrary:
+    """目录中所有路线的点和线段的空间索引"""
+
+    def __init__(self, directory=".", cell_size=CELL_SIZE):
+        self.directory = directory
+        self.cell_size = cell_size
+        self.routes = []
+        self._stamps = None  # {路径: (修改时间, 大小)}，用于判断是否需要重建
+        self._points = []  # (路线序号, 点序号, 坐标)
+        self._segments = []  # (路线序号, 起点坐标, 终点坐标)
+        self._point_grid = SpatialGrid(cell_size)
+        self._segment_grid = SpatialGrid(cell_size)
+
+    def _scan(self):
+        stamps = {}
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return stamps
+        for name in names:
+            if name.lower().endswith((".json", ".jsonl")):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def refresh(self):
+        """文件有变化时重新加载并重建索引，返回是否重建"""
+        stamps = self._scan()
+        if stamps == self._stamps:
+            return False
+        routes = []
+        for path in stamps:
+            try:
+                _, route = load_route_file(path)
+            except (OSError, ValueError, TypeError, AttributeError):
+                continue  # 不是路线文件（偏好设置、计时记录等）或文件损坏
+            if route:
+                routes.append(RouteEntry(path, os.path.splitext(os.path.basename(path))[0], route))
+        self.build(routes)
+        self._stamps = stamps
+        return True
+
+    def build(self, routes):
+        """为给定的 RouteEntry 列表建立索引"""
+        self.routes = list(routes)
+        self._points = []
+        self._segments = []
+        self._point_grid = SpatialGrid(self.cell_size)
+        self._segment_grid = SpatialGrid(self.cell_size)
+        for route_id, entry in enumerate(self.routes):
+            coords = entry.route.all_coords()
+            for index, point in enumerate(coords):
+                self._point_grid.add(self._point_grid.cell(*point), len(self._points))
+                self._points.append((route_id, index, point))
+            pairs = list(zip(coords, coords[1:]))
+            if len(coords) > 2:
+                pairs.append((coords[-1], coords[0]))  # 循环路线最后一点回到起点
+            for a, b in pairs:
+                self._add_segment(route_id, a, b)
+
+    def _add_segment(self, route_id, a, b):
+        """按不超过半个网格的间隔采样线段，登记经过的所有网格"""
+        segment_id = len(self._segments)
+        self._segments.append((route_id, a, b))
+        grid = self._segment_grid
+        samples = max(1, math.ceil(math.dist(a, b) / (self.cell_size / 2)))
+        seen = set()
+        for k in range(samples + 1):
+            t = k / samples
+            cell = grid.cell(*(a[i] + (b[i] - a[i]) * t for i in range(3)))
+            if cell not in seen:
+                seen.add(cell)
+                grid.add(cell, segment_id)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _hit(self, point_id, distance):
+        route_id, index, _ = self._points[point_id]
+        entry = self.routes[route_id]
+        return PointHit(entry.path, entry.name, index, entry.route.descs[index], distance)
+
+    def nearest(self, position):
+        """离位置最近的路线点，路线库为空时返回 None"""
+        if not self._points:
+            return None
+        grid = self._point_grid
+        center = grid.cell(*position)
+        best, best_distance = None, math.inf
+        for ring in range(NEAREST_RINGS + 1):
+            for point_id in grid.shell(center, ring):
+                distance = math.dist(position, self._points[point_id][2])
+                if distance < best_distance:
+                    best, best_distance = point_id, distance
+            # 第 ring+1 圈及以外的点距离至少为 ring 个网格
+            if best is not None and best_distance <= ring * self.cell_size:
+                return self._hit(best, best_distance)
+        for point_id, (_, _, point) in enumerate(self._points):  # 附近没有点时线性扫描
+            distance = math.dist(position, point)
+            if distance < best_distance:
+                best, best_distance = point_id, distance
+        return self._hit(best, best_distance)
+
+    def near(self, position, radius=NEAR_RADIUS):
+        """经过位置附近（线段距离不超过 radius）的路线，按距离排序"""
+        grid = self._segment_grid
+        low = grid.cell(*(value - radius for value in position))
+        high = grid.cell(*(value + radius for value in position))
+        # 线段采样间隔为半个网格，向外多查一圈保证不遗漏
+        low = tuple(value - 1 for value in low)
+        high = tuple(value + 1 for value in high)
+        best = {}
+        for segment_id in set(grid.box(low, high)):
+            route_id, a, b = self._segments[segment_id]
+            distance = _point_segment_distance(position, a, b)
+            if distance <= radius and distance < best.get(route_id, math.inf):
+                best[route_id] = distance
+        hits = []
+        for route_id, distance in best.items():
+            entry = self.routes[route_id]
+            coords = entry.route.all_coords()
+            index = min(range(len(coords)), key=lambda i: math.dist(position, coords[i]))
+            hits.append(RouteHit(entry.path, entry.name, distance, index))
+        hits.sort(key=lambda hit: hit.distance)
+        return hits
+
+
+def nearest_entry(plan, position):
+    """返回从执行计划中离位置最近的一步开始执行的 (ResumePoint, 距离)"""
+    position_in_plan = min(range(len(plan.steps)), key=lambda p: math.dist(position, plan.steps[p].coords))
+    distance = math.dist(position, plan.steps[position_in_plan].coords)
+    # 该点配置的等待时间对应从上一点赶来的耗时，这里只需从当前位置赶到该点
+    return ResumePoint(0, position_in_plan, estimate_delay(distance)), distance
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="查找经过指定位置附近的路线")
+    parser.add_argument("position", help='当前位置，如 "100 64 -200" 或 F3+C 复制的传送指令')
+    parser.add_argument("--dir", default=".", help="路线文件所在目录")
+    parser.add_argument("--radius", type=float, default=NEAR_RADIUS, help="附近的半径(方块)")
+    args = parser.parse_args(argv)
+
+    position = parse_position(args.position)
+    if position is None:
+        parser.error(f"无法解析坐标: {args.position}")
+    library = RouteLibrary(args.dir)
+    started = time.perf_counter()
+    library.refresh()
+    print(f"已索引 {len(library.routes)} 条路线、{len(library)} 个点（{(time.perf_counter() - started) * 1000:.0f} ms）")
+
+    started = time.perf_counter()
+    nearest = library.nearest(position)
+    hits = library.near(position, args.radius)
+    elapsed = (time.perf_counter() - started) * 1000
+    if nearest is not None:
+        print(f"最近的点: {nearest.name} 第 {nearest.index} 个点 {nearest.desc}（{nearest.distance:.1f} 格）")
+    for hit in hits:
+        print(f"  {hit.name:<30} 距离 {hit.distance:>7.1f} 格，最近的点 {hit.index}")
+    print(f"查询耗时 {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
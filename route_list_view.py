@@ -0,0 +1,231 @@
+"""路线点列表控件：增量更新，超大路线时只渲染可见窗口
+
+普通模式下每个 Treeview 行的 item id 与路线索引一一对应（self.items[索引]，
+反向映射 self.rows[item id]），增删改和上下移动只修改受影响的行，不再整表删除重建。
+点数超过 VIRTUAL_THRESHOLD 时切换到虚拟模式：Treeview 中只保留一屏的行，
+滚动时把对应区间的数据填入这些行。
+"""
+import tkinter as tk
+from tkinter import ttk
+
+VIRTUAL_THRESHOLD = 2000  # 超过该点数时启用虚拟模式
+WHEEL_ROWS = 3  # 虚拟模式下鼠标滚轮每格滚动的行数
+
+
+class RouteListView:
+    """带稳定 item id 映射的路线点列表"""
+
+    def __init__(self, parent, columns, format_row, height=10):
+        self.format_row = format_row  # (索引, 路线点) -> 行数据
+        self.height = height
+        self.points = []
+        self.items = []  # 普通模式：路线索引 -> item id；虚拟模式：可见行 -> item id
+        self.rows = {}  # item id -> self.items 中的序号
+        self.virtual = False
+        self.offset = 0  # 虚拟模式下第一行可见行对应的路线索引
+        self.selected = None  # 虚拟模式下选中的路线索引
+        self._next_id = 0
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=height,
+                                 selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._bind_normal_scroll()
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+        self.tree.bind("<Up>", lambda e: self._on_key(-1))
+        self.tree.bind("<Down>", lambda e: self._on_key(1))
+
+    def _new_id(self):
+        self._next_id += 1
+        return f"p{self._next_id}"
+
+    def _bind_normal_scroll(self):
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def _bind_virtual_scroll(self):
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self._on_scrollbar)
+
+    # ---- 数据变更通知 ----
+
+    def set_points(self, points):
+        """整体替换路线（加载、新建、优化后调用）"""
+        self.points = points
+        self.tree.delete(*self.tree.get_children())
+        self.items = []
+        self.rows = {}
+        self.offset = 0
+        self.selected = None
+        self.virtual = len(points) > VIRTUAL_THRESHOLD
+
+        if self.virtual:
+            self._bind_virtual_scroll()
+            for row in range(self.height):
+                iid = self._new_id()
+                self.tree.insert("", "end", iid=iid)
+                self.items.append(iid)
+                self.rows[iid] = row
+            self._render_window()
+        else:
+            self._bind_normal_scroll()
+            for index, point in enumerate(points):
+                iid = self._new_id()
+                self.tree.insert("", "end", iid=iid, values=self.format_row(index, point))
+                self.items.append(iid)
+                self.rows[iid] = index
+
+    def _check_mode(self):
+        """点数跨过阈值时切换模式，返回是否已整体刷新"""
+        if (len(self.points) > VIRTUAL_THRESHOLD) != self.virtual:
+            self.set_points(self.points)
+            return True
+        return False
+
+    def _renumber(self, start):
+        """从 start 开始刷新行号列和 item id 到索引的映射"""
+        for index in range(start, len(self.items)):
+            iid = self.items[index]
+            self.rows[iid] = index
+            self.tree.set(iid, "#", index)
+
+    def inserted(self, index):
+        """在 index 处插入了新点"""
+        if self._check_mode():
+            return
+        if self.virtual:
+            self._render_window()
+            return
+        iid = self._new_id()
+        self.tree.insert("", index, iid=iid, values=self.format_row(index, self.points[index]))
+        self.items.insert(index, iid)
+        self.rows[iid] = index
+        self._renumber(index + 1)
+
+    def updated(self, index):
+        """index 处的点被修改"""
+        if self.virtual:
+            self._render_window()
+        else:
+            self.tree.item(self.items[index], values=self.format_row(index, self.points[index]))
+
+    def deleted(self, index):
+        """index 处的点被删除"""
+        if self.virtual:
+            if self.selected is not None and self.selected >= len(self.points):
+                self.selected = None
+            if not self._check_mode():
+                self._render_window()
+            return
+        iid = self.items.pop(index)
+        del self.rows[iid]
+        self.tree.delete(iid)
+        self._renumber(index)
+        self._check_mode()
+
+    def swapped(self, first, second):
+        """两个点交换了位置"""
+        if self.virtual:
+            self._render_window()
+            return
+        for index in (first, second):
+            self.tree.item(self.items[index], values=self.format_row(index, self.points[index]))
+
+    # ---- 选中 ----
+
+    def selected_index(self):
+        """返回选中点的路线索引，没有选中时返回 None"""
+        if self.virtual:
+            return self.selected
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self.rows.get(selection[0])
+
+    def select(self, index):
+        """选中并滚动到指定点"""
+        if not 0 <= index < len(self.points):
+            return
+        if self.virtual:
+            self.selected = index
+            if not self.offset <= index < self.offset + self.height:
+                self.offset = index - self.height // 2
+            self._render_window()
+        else:
+            iid = self.items[index]
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+            self.tree.see(iid)
+
+    def _on_select(self, event):
+        if not self.virtual:
+            return
+        selection = self.tree.selection()
+        if selection:
+            row = self.rows.get(selection[0])
+            if row is not None and self.offset + row < len(self.points):
+                self.selected = self.offset + row
+
+    # ---- 虚拟模式滚动 ----
+
+    def _render_window(self):
+        """把 [offset, offset + height) 区间的数据填入可见行"""
+        count = len(self.points)
+        self.offset = max(0, min(self.offset, count - self.height))
+        for row, iid in enumerate(self.items):
+            index = self.offset + row
+            if index < count:
+                self.tree.item(iid, values=self.format_row(index, self.points[index]))
+            else:
+                self.tree.item(iid, values=())
+
+        if self.selected is not None and self.offset <= self.selected < self.offset + self.height:
+            iid = self.items[self.selected - self.offset]
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if count:
+            self.scrollbar.set(self.offset / count, min(1.0, (self.offset + self.height) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, offset):
+        self.offset = offset
+        self._render_window()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.points)))
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self._scroll_to(self.offset + amount)
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.offset - WHEEL_ROWS)
+        else:
+            self._scroll_to(self.offset + WHEEL_ROWS)
+        return "break"
+
+    def _on_key(self, step):
+        if not self.virtual or not self.points:
+            return None
+        current = self.selected if self.selected is not None else self.offset - step
+        index = max(0, min(len(self.points) - 1, current + step))
+        self.selected = index
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.height:
+            self.offset = index - self.height + 1
+        self._render_window()
+        return "break"
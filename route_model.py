@@ -0,0 +1,221 @@
+"""路线数据模型：加载或编辑时一次性解析并校验坐标
+
+Route 按列存储路线点：x/y/z 使用 array('i')，等待时间使用 array('d')，
+描述字符串经过 intern 去重，".b goto" 指令在写入时预先生成。
+执行循环、路线优化和耗时估算可以直接访问这些数值列，无需重复解析字符串。
+"""
+import math
+import sys
+from array import array
+
+BARITONE_PREFIX = ".b"  # Baritone 聊天指令前缀
+GOTO_PREFIX = f"{BARITONE_PREFIX} goto"
+MAX_COORD = 30_000_000  # Minecraft 世界边界，也保证坐标能存入 array('i')
+
+
+class RouteError(ValueError):
+    """路线点数据无效"""
+
+
+def parse_coords(text):
+    """解析 "x y z" 坐标字符串为整数三元组"""
+    parts = str(text).split()
+    if len(parts) != 3:
+        raise RouteError(f"坐标格式错误: {text!r}（应为 x y z）")
+    try:
+        coords = tuple(int(part) for part in parts)
+    except ValueError:
+        raise RouteError(f"坐标必须是整数: {text!r}")
+    return check_coords(coords)
+
+
+def check_coords(coords):
+    """检查坐标是否在世界范围内，返回原坐标"""
+    if any(abs(value) > MAX_COORD for value in coords):
+        raise RouteError(f"坐标超出世界范围（±{MAX_COORD}）: {format_coords(*coords)}")
+    return coords
+
+
+def parse_delay(value):
+    """解析等待时间(秒)，支持小数"""
+    try:
+        delay = float(value)
+    except (TypeError, ValueError):
+        raise RouteError(f"等待时间格式错误: {value!r}")
+    if not math.isfinite(delay) or delay < 0:
+        raise RouteError("等待时间不能为负数")
+    return delay
+
+
+def format_delay(delay):
+    """整数秒显示为整数，保持配置文件格式不变"""
+    return int(delay) if float(delay).is_integer() else delay
+
+
+def format_coords(x, y, z):
+    return f"{x} {y} {z}"
+
+
+class RoutePoint:
+    """单个路线点"""
+
+    __slots__ = ("x", "y", "z", "delay", "desc", "pinned")
+
+    def __init__(self, x, y, z, delay=0.0, desc="", pinned=False):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.delay = delay
+        self.desc = desc
+        self.pinned = pinned
+
+    @classmethod
+    def parse(cls, coords, delay=0, desc="", pinned=False):
+        """从坐标字符串等原始输入创建并校验路线点"""
+        x, y, z = parse_coords(coords)
+        return cls(x, y, z, parse_delay(delay), sys.intern(str(desc)), bool(pinned))
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict) or "coords" not in data:
+            raise RouteError("路线点缺少 coords 字段")
+        return cls.parse(data["coords"], data.get("delay", 0), data.get("desc", ""), data.get("pinned", False))
+
+    def to_dict(self):
+        data = {"coords": self.coords, "delay": format_delay(self.delay), "desc": self.desc}
+        if self.pinned:
+            data["pinned"] = True
+        return data
+
+    @property
+    def coords(self):
+        return format_coords(self.x, self.y, self.z)
+
+    @property
+    def command(self):
+        return f"{GOTO_PREFIX} {self.coords}"
+
+    def __eq__(self, other):
+        if not isinstance(other, RoutePoint):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"RoutePoint({self.coords!r}, delay={self.delay}, desc={self.desc!r})"
+
+
+class Route:
+    """按列存储的路线点序列"""
+
+    __slots__ = ("xs", "ys", "zs", "delays", "descs", "pinned", "commands")
+
+    def __init__(self, points=()):
+        self.xs = array('i')
+        self.ys = array('i')
+        self.zs = array('i')
+        self.delays = array('d')
+        self.descs = []
+        self.pinned = bytearray()
+        self.commands = []  # 预先生成的 ".b goto x y z" 指令
+        self.extend(points)
+
+    @classmethod
+    def from_dicts(cls, items):
+        """从配置文件中的 route_points 列表创建路线，出错时指出第几个点"""
+        route = cls()
+        if not isinstance(items, list):
+            raise RouteError("route_points 必须是列表")
+        for index, data in enumerate(items):
+            try:
+                route.append(RoutePoint.from_dict(data))
+            except RouteError as e:
+                raise RouteError(f"第 {index} 个路线点无效: {e}")
+        return route
+
+    def to_dicts(self):
+        return [point.to_dict() for point in self]
+
+    def copy(self):
+        route = Route()
+        route.xs = array('i', self.xs)
+        route.ys = array('i', self.ys)
+        route.zs = array('i', self.zs)
+        route.delays = array('d', self.delays)
+        route.descs = list(self.descs)
+        route.pinned = bytearray(self.pinned)
+        route.commands = list(self.commands)
+        return route
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __bool__(self):
+        return len(self.xs) > 0
+
+    def __getitem__(self, index):
+        return RoutePoint(self.xs[index], self.ys[index], self.zs[index], self.delays[index],
+                          self.descs[index], bool(self.pinned[index]))
+
+    def __setitem__(self, index, point):
+        self.xs[index] = point.x
+        self.ys[index] = point.y
+        self.zs[index] = point.z
+        self.delays[index] = point.delay
+        self.descs[index] = sys.intern(point.desc)
+        self.pinned[index] = bool(point.pinned)
+        self.commands[index] = point.command
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def insert(self, index, point):
+        self.xs.insert(index, point.x)
+        self.ys.insert(index, point.y)
+        self.zs.insert(index, point.z)
+        self.delays.insert(index, point.delay)
+        self.descs.insert(index, sys.intern(point.desc))
+        self.pinned.insert(index, bool(point.pinned))
+        self.commands.insert(index, point.command)
+
+    def append(self, point):
+        self.xs.append(point.x)
+        self.ys.append(point.y)
+        self.zs.append(point.z)
+        self.delays.append(point.delay)
+        self.descs.append(sys.intern(point.desc))
+        self.pinned.append(bool(point.pinned))
+        self.commands.append(point.command)
+
+    def extend(self, points):
+        for point in points:
+            self.append(point)
+
+    def pop(self, index=-1):
+        point = self[index]
+        for column in (self.xs, self.ys, self.zs, self.delays, self.descs, self.pinned, self.commands):
+            del column[index]
+        return point
+
+    def swap(self, first, second):
+        for column in (self.xs, self.ys, self.zs, self.delays, self.descs, self.pinned, self.commands):
+            column[first], column[second] = column[second], column[first]
+
+    def coords(self, index):
+        """返回第 index 个点的 (x, y, z)"""
+        return self.xs[index], self.ys[index], self.zs[index]
+
+    def all_coords(self):
+        return list(zip(self.xs, self.ys, self.zs))
+
+    def reordered(self, order):
+        """按给定索引顺序返回新路线"""
+        route = Route()
+        route.xs = array('i', (self.xs[i] for i in order))
+        route.ys = array('i', (self.ys[i] for i in order))
+        route.zs = array('i', (self.zs[i] for i in order))
+        route.delays = array('d', (self.delays[i] for i in order))
+        route.descs = [self.descs[i] for i in order]
+        route.pinned = bytearray(self.pinned[i] for i in order)
+        route.commands = [self.commands[i] for i in order]
+        return route
@@ -0,0 +1,228 @@
+"""路线顺序优化：按三维距离重新排列路线点
+
+起点索引、终点索引以及标记为固定（pinned）的点保持原位，
+它们把执行区间切分为若干段，每段内的自由点先用最近邻构造初始顺序，
+再用 2-opt 和 Or-opt 局部改进。距离矩阵只计算一次。
+点的等待时间对应从上一点赶来的耗时，重排后上一点改变的自由点按新的距离 / 移动速度重新估算等待时间；
+区间端点和固定点的等待时间是用户设定的（如终点等待刷新），保持不变。
+"""
+import math
+from collections import namedtuple
+
+# retimed 为重新估算了等待时间的点在新路线中的序号
+OptimizeResult = namedtuple("OptimizeResult", ["points", "order", "distance_before", "distance_after", "retimed"])
+
+NEIGHBOR_COUNT = 10  # 局部改进时每个点只考虑最近的若干个候选点
+MAX_PASSES = 50  # 局部改进的最大轮数
+EPSILON = 1e-9
+DEFAULT_SPEED = 4.0  # 估算赶路耗时的移动速度(方块/秒)，与 respawn_scheduler 相同
+DELAY_STEP = 0.5  # 估算的等待时间向上取整的粒度(秒)
+
+
+def distance_matrix(coords):
+    """计算所有点两两之间的三维距离"""
+    dist = math.dist
+    return [[dist(p, q) for q in coords] for p in coords]
+
+
+def estimate_delay(distance, speed=DEFAULT_SPEED):
+    """按移动速度估算走完 distance 所需的等待时间，向上取整到 DELAY_STEP"""
+    return math.ceil(distance / speed / DELAY_STEP - EPSILON) * DELAY_STEP
+
+
+def path_length(order, matrix):
+    """按给定顺序走完所有点的总距离"""
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def nearest_neighbor_path(first, last, free, matrix):
+    """从 first 出发，每次走到最近的未访问点，最后到达 last"""
+    path = [first]
+    remaining = set(free)
+    current = first
+    while remaining:
+        row = matrix[current]
+        current = min(remaining, key=row.__getitem__)
+        remaining.remove(current)
+        path.append(current)
+    path.append(last)
+    return path
+
+
+def _neighbor_lists(nodes, matrix):
+    """每个点按距离排序的最近候选点"""
+    neighbors = {}
+    for node in nodes:
+        row = matrix[node]
+        ordered = sorted(nodes, key=row.__getitem__)
+        neighbors[node] = [other for other in ordered[:NEIGHBOR_COUNT + 1] if other != node][:NEIGHBOR_COUNT]
+    return neighbors
+
+
+def _two_opt(path, matrix, neighbors):
+    """2-opt：反转子路径消除交叉，首尾两点不动"""
+    last = len(path) - 1
+    pos = {node: i for i, node in enumerate(path)}
+
+    def reverse(i, j):
+        path[i:j + 1] = path[i:j + 1][::-1]
+        for k in range(i, j + 1):
+            pos[path[k]] = k
+
+    improved = False
+    for _ in range(MAX_PASSES):
+        changed = False
+        for i in range(last):
+            a, b = path[i], path[i + 1]
+            row_a = matrix[a]
+            d_ab = row_a[b]
+            for c in neighbors.get(a, ()):
+                gain_first = d_ab - row_a[c]
+                if gain_first <= EPSILON:
+                    break  # 候选点按距离排序，后面的更远
+                j = pos[c]
+                if i + 1 < j < last:
+                    d = path[j + 1]
+                    gain = gain_first + matrix[c][d] - matrix[b][d]
+                    if gain > EPSILON:
+                        reverse(i + 1, j)
+                        changed = True
+                        break
+                elif j < i:
+                    e = path[j + 1]
+                    gain = gain_first + matrix[c][e] - matrix[e][b]
+                    if gain > EPSILON:
+                        reverse(j + 1, i)
+                        changed = True
+                        break
+        if not changed:
+            break
+        improved = True
+    return improved
+
+
+def _or_opt(path, matrix, neighbors):
+    """Or-opt：把长度 1~3 的片段移动到更合适的位置（可反向插入）"""
+    pos = {node: i for i, node in enumerate(path)}
+    improved = False
+    for _ in range(MAX_PASSES):
+        changed = False
+        for seg_len in (1, 2, 3):
+            i = 1
+            while i + seg_len < len(path):
+                head, tail = path[i], path[i + seg_len - 1]
+                prev_node, next_node = path[i - 1], path[i + seg_len]
+                removal_gain = (matrix[prev_node][head] + matrix[tail][next_node]
+                                - matrix[prev_node][next_node])
+                if removal_gain <= EPSILON:
+                    i += 1
+                    continue
+
+                # 只尝试插入到片段端点的近邻所在的边上（新连边须短于移除收益）
+                best = None
+                candidates = []
+                for end_node in (head, tail):
+                    row = matrix[end_node]
+                    for anchor in neighbors.get(end_node, ()):
+                        if row[anchor] >= removal_gain:
+                            break
+                        candidates.append(anchor)
+                for anchor in candidates:
+                    k = pos[anchor]
+                    if i <= k < i + seg_len:
+                        continue
+                    for left in (k - 1, k):
+                        if left < 0 or left + 1 >= len(path) or i - 1 <= left < i + seg_len:
+                            continue
+                        u, v = path[left], path[left + 1]
+                        base = matrix[u][v]
+                        forward = matrix[u][head] + matrix[tail][v] - base
+                        backward = matrix[u][tail] + matrix[head][v] - base
+                        cost, reverse = (forward, False) if forward <= backward else (backward, True)
+                        if removal_gain - cost > EPSILON and (best is None or cost < best[0]):
+                            best = (cost, left, reverse)
+
+                if best is None:
+                    i += 1
+                    continue
+
+                _, left, reverse = best
+                seg = path[i:i + seg_len]
+                if reverse:
+                    seg.reverse()
+                if left < i:
+                    lo, hi = left + 1, i + seg_len
+                    path[lo:hi] = seg + path[lo:i]
+                else:
+                    lo, hi = i, left + 1
+                    path[lo:hi] = path[i + seg_len:hi] + seg
+                for k in range(lo, hi):
+                    pos[path[k]] = k
+                changed = True
+        if not changed:
+            break
+        improved = True
+    return improved
+
+
+def optimize_segment(first, last, free, matrix):
+    """优化首尾固定、中间为自由点的一段路径"""
+    if len(free) < 2:
+        return [first] + list(free) + [last]
+    path = nearest_neighbor_path(first, last, free, matrix)
+    neighbors = _neighbor_lists(path, matrix)
+    for _ in range(MAX_PASSES):
+        changed = _two_opt(path, matrix, neighbors)
+        changed = _or_opt(path, matrix, neighbors) or changed
+        if not changed:
+            break
+    return path
+
+
+def optimize_route(route, start_index=0, end_index=None, speed=DEFAULT_SPEED):
+    """优化路线点顺序，返回 OptimizeResult（points 为重排后的新 Route）
+
+    只重排 start_index 与 end_index 之间的点，区间外的点、
+    区间两端以及标记为固定的点都保持原位。
+    上一点改变的自由点按 speed（方块/秒）重新估算等待时间，其余点（包括区间端点和固定点）保留原等待时间。
+    """
+    count = len(route)
+    if count == 0:
+        return OptimizeResult(route.copy(), [], 0.0, 0.0, [])
+
+    start_index = max(0, min(count - 1, int(start_index)))
+    end_index = count - 1 if end_index is None else max(0, min(count - 1, int(end_index)))
+    if end_index < start_index:
+        start_index, end_index = end_index, start_index
+
+    indices = list(range(start_index, end_index + 1))
+    coords = [route.coords(i) for i in indices]
+    matrix = distance_matrix(coords)
+
+    # 固定点（区间端点 + pinned）把区间切分为若干段，分别优化
+    local_order = []
+    segment_first = 0
+    free = []
+    for local in range(1, len(indices)):
+        if local == len(indices) - 1 or route.pinned[indices[local]]:
+            path = optimize_segment(segment_first, local, free, matrix)
+            local_order.extend(path if not local_order else path[1:])
+            segment_first = local
+            free = []
+        else:
+            free.append(local)
+    if not local_order:
+        local_order = [0]
+
+    distance_before = path_length(list(range(len(indices))), matrix)
+    distance_after = path_length(local_order, matrix)
+
+    order = list(range(start_index)) + [indices[i] for i in local_order] + list(range(end_index + 1, count))
+    points = route.reordered(order)
+    retimed = []
+    for position in range(1, len(local_order) - 1):
+        previous, current = local_order[position - 1], local_order[position]
+        if previous != current - 1 and not route.pinned[indices[current]]:
+            points.delays[start_index + position] = estimate_delay(matrix[previous][current], speed)
+            retimed.append(start_index + position)
+    return OptimizeResult(points, order, distance_before, distance_after, retimed)
@@ -0,0 +1,167 @@
+"""执行计划：在启动循环前校验设置并编译为不可变的步骤列表
+
+compile_plan 把路线和循环设置（起点/终点、分段、循环次数、对齐周期）编译为 RoutePlan：
+每一步预先生成指令、状态文本和相对循环开始的截止时间偏移，执行循环只需依次遍历。
+设置无效时抛出 PlanError，并指出具体哪一项有问题。
+
+分段格式: "0-3, 5-8x2" 表示先执行 0~3 号点，再执行两遍 5~8 号点；
+单个数字表示只有一个点的分段；为空时使用起点、终点索引。
+"""
+import re
+from collections import namedtuple
+
+from route_model import format_coords
+
+# index 为路线中的点序号，offset 为该步截止时间相对本次循环开始的偏移(秒)
+PlanStep = namedtuple("PlanStep", ["index", "coords", "command", "desc", "delay", "offset", "status"])
+Segment = namedtuple("Segment", ["start", "end", "repeat"])
+
+_SEGMENT_PATTERN = re.compile(r"^(\d+)(?:\s*-\s*(\d+))?(?:\s*[x×*]\s*(\d+))?$")
+
+
+class PlanError(ValueError):
+    """循环设置无效，无法生成执行计划"""
+
+
+def _parse_int(value, name, minimum=0):
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise PlanError(f"{name}必须是整数: {value!r}")
+    if number < minimum:
+        raise PlanError(f"{name}不能小于 {minimum}: {number}")
+    return number
+
+
+def _parse_period(value):
+    text = str(value).strip()
+    if not text:
+        return 0.0
+    try:
+        period = float(text)
+    except ValueError:
+        raise PlanError(f"对齐周期必须是数字: {value!r}")
+    if period < 0 or period != period or period == float("inf"):
+        raise PlanError(f"对齐周期无效: {value!r}")
+    return period
+
+
+def parse_segments(text, point_count):
+    """解析分段字符串为 Segment 元组，序号超出路线范围时抛出 PlanError"""
+    segments = []
+    for part in str(text).replace("，", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = _SEGMENT_PATTERN.match(part)
+        if not match:
+            raise PlanError(f"分段格式错误: {part!r}（应为 起点-终点 或 起点-终点x次数）")
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) is not None else start
+        repeat = int(match.group(3)) if match.group(3) is not None else 1
+        if start > end:
+            raise PlanError(f"分段起点大于终点: {part!r}")
+        if end >= point_count:
+            raise PlanError(f"分段 {part!r} 超出路线范围（共 {point_count} 个点）")
+        if repeat < 1:
+            raise PlanError(f"分段重复次数至少为 1: {part!r}")
+        segments.append(Segment(start, end, repeat))
+    return tuple(segments)
+
+
+def _default_segment(settings, point_count):
+    """起点、终点索引超出范围时限制在路线内，终点小于起点时交换"""
+    start_index = min(point_count - 1, _parse_int(settings.get("start_index", 0), "起点索引"))
+    end_index = min(point_count - 1, _parse_int(settings.get("end_index", 0), "终点索引"))
+    if end_index < start_index:
+        start_index, end_index = end_index, start_index
+    return Segment(start_index, end_index, 1)
+
+
+class RoutePlan:
+    """不可变的执行计划"""
+
+    __slots__ = ("steps", "segments", "cycles", "period", "step_time")
+
+    def __init__(self, steps, segments, cycles, period):
+        self.steps = tuple(steps)
+        self.segments = tuple(segments)
+        self.cycles = cycles  # 0 表示无限循环
+        self.period = period
+        self.step_time = self.steps[-1].offset if self.steps else 0.0  # 一次循环各步等待时间之和
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "step_time"):
+            raise AttributeError("RoutePlan 不可修改")
+        super().__setattr__(name, value)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    @property
+    def cycle_time(self):
+        """每次循环的预计耗时(秒)"""
+        return max(self.period, self.step_time)
+
+    def estimated_runtime(self):
+        """预计总耗时(秒)，无限循环时返回 None"""
+        if self.cycles == 0:
+            return None
+        return (self.cycles - 1) * self.cycle_time + self.step_time
+
+    def map_commands(self, command_for):
+        """返回替换了各步指令的新计划，新指令为 command_for(坐标, 原指令)"""
+        steps = [step._replace(command=command_for(step.coords, step.command)) for step in self.steps]
+        return RoutePlan(steps, self.segments, self.cycles, self.period)
+
+    def describe(self, limit=None):
+        """返回计划的文本描述（每行一步）"""
+        lines = []
+        for number, step in enumerate(self.steps[:limit]):
+            lines.append(f"{number:>4}. [{step.index}] {step.desc}  {format_coords(*step.coords)}  "
+                         f"等待 {step.delay:g}s  (+{step.offset:g}s)")
+        if limit is not None and len(self.steps) > limit:
+            lines.append(f"... 共 {len(self.steps)} 步")
+        return lines
+
+
+def compile_plan(route, settings):
+    """校验循环设置并把路线编译为 RoutePlan"""
+    point_count = len(route)
+    if point_count == 0:
+        raise PlanError("路线为空")
+
+    cycles = _parse_int(settings.get("cycle_count", 1), "循环次数")
+    period = _parse_period(settings.get("cycle_period", 0))
+    segments = parse_segments(settings.get("segments", ""), point_count)
+    if not segments:
+        segments = (_default_segment(settings, point_count),)
+
+    steps = []
+    offset = 0.0
+    for segment in segments:
+        for _ in range(segment.repeat):
+            for index in range(segment.start, segment.end + 1):
+                delay = route.delays[index]
+                desc = route.descs[index]
+                offset += delay
+                steps.append(PlanStep(index, route.coords(index), route.commands[index], desc, delay, offset,
+                                      f"前往: {desc}"))
+    return RoutePlan(steps, segments, cycles, period)
+
+
+def format_duration(seconds):
+    """把秒数格式化为 "1小时2分3秒" 的形式"""
+    if seconds is None:
+        return "无限"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}小时{minutes}分{seconds}秒"
+    if minutes:
+        return f"{minutes}分{seconds}秒"
+    return f"{seconds}秒"
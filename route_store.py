@@ -0,0 +1,280 @@
+"""路线文件存储：原子保存、自动保存日志、JSON Lines 格式
+
+- 所有保存都先写入同目录下的临时文件，fsync 后用 os.replace 替换，
+  写到一半崩溃也不会损坏原配置。
+- RouteJournal 把每次编辑追加到 <配置文件>.journal，崩溃后可重放恢复；
+  记录过多时把日志压缩为一条快照。
+- .jsonl 格式第一行为头部（循环设置和点数），之后每行一个路线点，
+  列出路线库时只需读取第一行，加载大路线时逐行流式解析。
+
+tempfile 和 hashlib 只在第一次保存或比较日志时导入，不拖慢程序启动。
+"""
+import json
+import os
+import sys
+
+from route_model import Route, RouteError, RoutePoint, check_coords, format_delay, parse_delay
+
+JSONL_FORMAT = "mc-route-jsonl"
+JSONL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+COMPACT_THRESHOLD = 200  # 日志记录超过该条数时压缩为快照
+SETTING_KEYS = ("cycle_count", "start_index", "end_index", "cycle_period", "segments")
+DEFAULT_SETTINGS = {"cycle_count": "1", "start_index": "0", "end_index": "0", "cycle_period": "0", "segments": ""}
+PREFERENCES_FILE = "mc_goto_prefs.json"  # 界面偏好设置（如已关闭的提示）
+STARTUP_PROBE_ENV = "MC_GOTO_STARTUP_PROBE"  # 设置该环境变量时窗口首次绘制后立即退出，用于测量启动耗时
+
+
+def is_jsonl(path):
+    return path.lower().endswith(".jsonl")
+
+
+def atomic_write(path, write):
+    """调用 write(文件对象) 写入临时文件，成功后原子替换目标文件"""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _settings_of(data):
+    return {key: str(data.get(key, DEFAULT_SETTINGS[key])) for key in SETTING_KEYS}
+
+
+def _point_row(route, index):
+    """JSON Lines 中一个路线点的紧凑表示: [x, y, z, delay, desc(, 1)]"""
+    row = [route.xs[index], route.ys[index], route.zs[index], format_delay(route.delays[index]), route.descs[index]]
+    if route.pinned[index]:
+        row.append(1)
+    return row
+
+
+def _point_from_row(row):
+    """从紧凑表示创建路线点，数值已由 JSON 解析，只需校验类型"""
+    if not isinstance(row, list) or len(row) < 5:
+        raise RouteError(f"路线点格式错误: {row!r}")
+    x, y, z, delay, desc = row[:5]
+    if not (type(x) is int and type(y) is int and type(z) is int):
+        raise RouteError(f"坐标必须是整数: {row[:3]!r}")
+    check_coords((x, y, z))
+    return RoutePoint(x, y, z, parse_delay(delay), sys.intern(str(desc)), len(row) > 5 and bool(row[5]))
+
+
+# ---- 保存 ----
+
+def save_route_file(path, settings, route):
+    """按扩展名以 JSON 或 JSON Lines 格式原子保存路线"""
+    settings = _settings_of(settings)
+    if is_jsonl(path):
+        def write(f):
+            header = dict(settings, format=JSONL_FORMAT, version=JSONL_VERSION, point_count=len(route))
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+            f.writelines(dumps(_point_row(route, i)) + "\n" for i in range(len(route)))
+    else:
+        def write(f):
+            config_data = dict(settings, route_points=route.to_dicts())
+            json.dump(config_data, f, ensure_ascii=False, indent=2)
+    atomic_write(path, write)
+
+
+# ---- 加载 ----
+
+def load_header(path):
+    """只读取路线设置和点数，JSON Lines 文件只读第一行"""
+    if is_jsonl(path):
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+        if header.get("format") != JSONL_FORMAT:
+            raise RouteError(f"不是路线文件: {path}")
+        return dict(_settings_of(header), point_count=header.get("point_count", 0))
+
+    with open(path, "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    return dict(_settings_of(config_data), point_count=len(config_data.get("route_points", [])))
+
+
+def iter_points(path):
+    """逐个产生 JSON Lines 路线文件中的路线点（流式，不一次读入整个文件）"""
+    decode = json.JSONDecoder().decode
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()  # 跳过头部
+        for line_no, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            try:
+                yield _point_from_row(decode(line))
+            except (ValueError, RouteError) as e:
+                raise RouteError(f"第 {line_no} 行无效: {e}")
+
+
+def load_route_file(path):
+    """加载路线文件，返回 (设置, Route)"""
+    if is_jsonl(path):
+        settings = load_header(path)
+        settings.pop("point_count", None)
+        return settings, Route(iter_points(path))
+
+    with open(path, "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    return _settings_of(config_data), Route.from_dicts(config_data.get("route_points", []))
+
+
+def file_digest(path):
+    """配置文件内容摘要，用于判断日志是否基于当前文件"""
+    if not os.path.exists(path):
+        return None
+    import hashlib
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---- 界面偏好设置 ----
+
+def load_preferences(path=PREFERENCES_FILE):
+    """读取偏好设置，文件不存在或损坏时返回空字典"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            prefs = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return prefs if isinstance(prefs, dict) else {}
+
+
+def save_preferences(prefs, path=PREFERENCES_FILE):
+    atomic_write(path, lambda f: json.dump(prefs, f, ensure_ascii=False, indent=2))
+
+
+# ---- 自动保存日志 ----
+
+class RouteJournal:
+    """追加式编辑日志
+
+    第一行记录所基于的配置文件摘要，之后每行一条编辑操作：
+    insert / update / delete / swap / reset（包含循环设置的整体快照）。
+    """
+
+    def __init__(self, config_path, compact_threshold=COMPACT_THRESHOLD):
+        self.config_path = config_path
+        self.path = config_path + JOURNAL_SUFFIX
+        self.compact_threshold = compact_threshold
+        self.entries = 0
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            if not os.path.exists(self.path):
+                self._write_base([])
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write_base(self, records):
+        """原子重写日志：基础摘要 + 给定记录"""
+        def write(f):
+            f.write(json.dumps({"op": "base", "digest": file_digest(self.config_path)}) + "\n")
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        atomic_write(self.path, write)
+        self.entries = len(records)
+
+    def record(self, op, **fields):
+        """追加一条编辑记录"""
+        self._open()
+        fields["op"] = op
+        self._file.write(json.dumps(fields, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.entries += 1
+
+    def record_insert(self, index, point):
+        self.record("insert", index=index, point=point.to_dict())
+
+    def record_update(self, index, point):
+        self.record("update", index=index, point=point.to_dict())
+
+    def record_delete(self, index):
+        self.record("delete", index=index)
+
+    def record_swap(self, first, second):
+        self.record("swap", first=first, second=second)
+
+    def record_snapshot(self, settings, route):
+        self.record("reset", settings=_settings_of(settings), points=route.to_dicts())
+
+    def maybe_compact(self, settings, route):
+        """记录过多时把日志压缩为一条快照"""
+        if self.entries >= self.compact_threshold:
+            self.compact(settings, route)
+
+    def compact(self, settings, route):
+        self.close()
+        self._write_base([{"op": "reset", "settings": _settings_of(settings), "points": route.to_dicts()}])
+
+    def clear(self):
+        """配置已保存，删除日志"""
+        self.close()
+        self.entries = 0
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def has_pending(self):
+        """是否存在基于当前配置文件、且包含编辑记录的日志"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                base = json.loads(f.readline())
+            except ValueError:
+                return False
+            return base.get("digest") == file_digest(self.config_path) and bool(f.readline().strip())
+
+    def replay(self, settings, route):
+        """把日志中的编辑重放到 (设置, 路线) 上，返回恢复后的 (设置, 路线)
+
+        最后一行可能在崩溃时只写了一半，解析失败的记录会被忽略。
+        """
+        settings = dict(settings)
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                op = record.get("op")
+                if op == "insert":
+                    route.insert(record["index"], RoutePoint.from_dict(record["point"]))
+                elif op == "update":
+                    route[record["index"]] = RoutePoint.from_dict(record["point"])
+                elif op == "delete":
+                    route.pop(record["index"])
+                elif op == "swap":
+                    route.swap(record["first"], record["second"])
+                elif op == "reset":
+                    settings = _settings_of(record["settings"])
+                    route = Route.from_dicts(record["points"])
+                count += 1
+        self.entries = count
+        return settings, route
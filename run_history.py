@@ -0,0 +1,262 @@
+"""运行历史：把每次执行的记录追加到有大小上限、自动轮转的本地文件，并提供聚合查询
+
+记录为 JSON Lines，两种类型：
+- 循环记录 {"k":"c", "run", "route", "cfg", "at", "s", "pts"}：每完成一次循环写一条，
+  s 为循环耗时，pts 为 [[点序号, 耗时], ...]；
+- 运行记录 {"k":"r", "run", "route", "cfg", "start", "end", "cycles", "reason"}：每次执行结束时写一条，
+  reason 为 completed / stopped / error: 错误信息。
+cfg 为执行计划步骤的摘要（checkpoint.plan_digest 的前 12 位），用于区分同一路线的不同版本。
+
+文件超过 max_bytes 时依次轮转为 .1、.2 ...，只保留 max_files 个文件，总大小有上限。
+执行线程只把记录放入队列，由后台写入线程批量写文件，不会因磁盘慢而推迟下一步。
+查询逐行流式读取，先按类型做字符串预筛再解析 JSON，早于查询起点的轮转文件按修改时间整个跳过；
+内存中只保留各分组的耗时数值，不加载完整记录。
+
+直接运行本模块会输出按天或按路线汇总的循环耗时。
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from checkpoint import plan_digest
+
+DEFAULT_HISTORY_FILE = "mc_goto_history.jsonl"
+MAX_FILE_BYTES = 1024 * 1024  # 单个文件超过该大小时轮转
+MAX_FILES = 5  # 包括当前文件在内保留的文件数
+DIGEST_LENGTH = 12
+STEP_PRECISION = 3  # 耗时保留的小数位数
+MAX_BATCH = 256  # 每批最多写入的记录数，每批写入前检查是否需要轮转
+
+# 按 key（日期、路线或点序号）汇总的耗时统计(秒)
+TimingStat = namedtuple("TimingStat", ["key", "count", "median", "best", "worst"])
+RunSummary = namedtuple("RunSummary", ["run", "route", "cfg", "start", "end", "cycles", "reason"])
+
+GROUPS = {
+    "day": lambda record: time.strftime("%Y-%m-%d", time.localtime(record["at"])),
+    "route": lambda record: record["route"],
+    "route_day": lambda record: f"{record['route']} {time.strftime('%Y-%m-%d', time.localtime(record['at']))}",
+}
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _stats(groups):
+    import statistics  # 只在查询时导入，不影响启动耗时
+
+    return [TimingStat(key, len(values), statistics.median(values), min(values), max(values))
+            for key, values in sorted(groups.items())]
+
+
+class RunHistory:
+    """运行历史文件：后台批量写入、按大小轮转、流式查询"""
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, max_bytes=MAX_FILE_BYTES, max_files=MAX_FILES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    # ---- 写入 ----
+
+    def append(self, record):
+        """把记录放入写入队列，立即返回"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                    self._writer.start()
+        self._queue.put(record)
+
+    def flush(self):
+        """等待队列中的记录全部写入文件"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < MAX_BATCH:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                self._write(batch)
+            except OSError:
+                pass  # 写入失败时丢弃，历史记录不应影响路线执行
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, records):
+        self._rotate()
+        text = "".join(_dumps(record) + "\n" for record in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def _rotate(self):
+        """当前文件超过大小上限时轮转：path.N-1 -> path.N ... path -> path.1，最旧的文件被覆盖"""
+        try:
+            if os.path.getsize(self.path) <= self.max_bytes:
+                return
+        except OSError:
+            return
+        for number in range(self.max_files - 1, 0, -1):
+            source = self.path if number == 1 else f"{self.path}.{number - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number}")
+
+    # ---- 查询 ----
+
+    def files(self):
+        """从旧到新的历史文件"""
+        paths = [f"{self.path}.{number}" for number in range(self.max_files - 1, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def records(self, kind=None, since=None, route=None):
+        """逐条读取记录（从旧到新），kind 为 "c" / "r" 时只返回该类型，since 为起始时间戳，route 为路线名称"""
+        markers = []
+        if kind is not None:
+            markers.append(f'"k":"{kind}"')
+        if route is not None:
+            markers.append(f'"route":{json.dumps(route, ensure_ascii=False)}')
+        for path in self.files():
+            try:
+                if since is not None and os.path.getmtime(path) < since:
+                    continue  # 文件最后一次写入早于起点，其中的记录都更早
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if markers and not all(marker in line for marker in markers):
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # 崩溃时只写了一半的行
+                        if since is not None and record.get("at", record.get("end", 0)) < since:
+                            continue
+                        if route is not None and record.get("route") != route:
+                            continue
+                        yield record
+            except OSError:
+                continue  # 读取期间被轮转
+
+    def cycle_stats(self, group="day", route=None, since=None):
+        """按 group（day / route / route_day）汇总的循环耗时 TimingStat 列表"""
+        key_of = GROUPS[group]
+        groups = {}
+        for record in self.records("c", since, route):
+            groups.setdefault(key_of(record), []).append(record["s"])
+        return _stats(groups)
+
+    def point_stats(self, route, since=None, cfg=None):
+        """某条路线各点的耗时 TimingStat 列表，key 为点序号；cfg 指定时只统计该版本"""
+        groups = {}
+        for record in self.records("c", since, route):
+            if cfg is None or record["cfg"] == cfg:
+                for index, seconds in record["pts"]:
+                    groups.setdefault(index, []).append(seconds)
+        return _stats(groups)
+
+    def recent_runs(self, limit=20):
+        """最近 limit 次执行的 RunSummary，从新到旧"""
+        runs = deque(maxlen=limit)
+        for record in self.records("r"):
+            runs.append(RunSummary(*(record[field] for field in RunSummary._fields)))
+        return list(reversed(runs))
+
+
+class RunRecorder:
+    """一次执行的记录器，由执行引擎调用；只在内存中累积，整条记录交给 RunHistory 后台写入"""
+
+    def __init__(self, history, route, wall_clock=time.time):
+        self.history = history
+        self.route = route  # 路线名称（配置文件名）
+        self.wall_clock = wall_clock
+        self.run = None
+        self.cfg = None
+        self.started = None
+        self.cycles = 0  # 完成的循环数
+        self._points = []
+        self._whole = False  # 本次循环是否从第一步开始、且中途没有换用计划
+
+    def start(self, plan):
+        self.started = self.wall_clock()
+        self.run = f"{int(self.started * 1000):x}"
+        self.cfg = plan_digest(plan)[:DIGEST_LENGTH]
+
+    def use_plan(self, plan):
+        """执行计划变化（热加载）后调用，跨两个计划的本次循环不记录耗时"""
+        self.cfg = plan_digest(plan)[:DIGEST_LENGTH]
+        self._whole = False
+
+    def begin_cycle(self, whole):
+        """每次循环开始时调用，whole 为假（从断点或中途开始）时本次循环不记录耗时"""
+        self._points = []
+        self._whole = whole
+
+    def step(self, index, seconds):
+        self._points.append([index, round(seconds, STEP_PRECISION)])
+
+    def cycle(self, seconds):
+        self.cycles += 1
+        if self._whole:
+            self.history.append({"k": "c", "run": self.run, "route": self.route, "cfg": self.cfg,
+                                 "at": self.wall_clock(), "s": round(seconds, STEP_PRECISION), "pts": self._points})
+        self._points = []
+
+    def finish(self, reason, wait=True):
+        """写入运行记录，wait 为真时等待全部写入（执行已结束，不影响执行循环）"""
+        self.history.append({"k": "r", "run": self.run, "route": self.route, "cfg": self.cfg,
+                             "start": self.started, "end": self.wall_clock(), "cycles": self.cycles,
+                             "reason": reason})
+        if wait:
+            self.history.flush()
+
+
+def route_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def format_stats(stats, key_title="分组"):
+    lines = [f"{key_title:<24} {'次数':>6} {'中位数(s)':>10} {'最快(s)':>9} {'最慢(s)':>9}"]
+    for stat in stats:
+        lines.append(f"{str(stat.key):<24} {stat.count:>6} {stat.median:>10.1f} {stat.best:>9.1f} {stat.worst:>9.1f}")
+    return lines
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="汇总运行历史中的循环耗时")
+    parser.add_argument("--file", default=DEFAULT_HISTORY_FILE, help="运行历史文件")
+    parser.add_argument("--by", choices=sorted(GROUPS), default="day", help="分组方式")
+    parser.add_argument("--route", help="只统计该路线（配置文件名，不含扩展名）")
+    parser.add_argument("--days", type=float, help="只统计最近的天数")
+    parser.add_argument("--points", action="store_true", help="输出 --route 指定路线各点的耗时")
+    parser.add_argument("--runs", type=int, default=0, metavar="N", help="列出最近 N 次执行")
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.file)
+    since = None if args.days is None else time.time() - args.days * 86400
+    started = time.perf_counter()
+    if args.points:
+        if not args.route:
+            parser.error("--points 需要指定 --route")
+        print("\n".join(format_stats(history.point_stats(args.route, since), "点序号")))
+    else:
+        print("\n".join(format_stats(history.cycle_stats(args.by, args.route, since))))
+    for run in history.recent_runs(args.runs) if args.runs else ():
+        start = time.strftime("%m-%d %H:%M", time.localtime(run.start))
+        print(f"{start}  {run.route:<20} {run.cycles:>5} 次循环  {run.end - run.start:>8.0f}s  {run.reason}")
+    print(f"查询耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""无界面命令行执行器：不加载 tkinter，在终端中执行路线
+
+命令行参数覆盖配置文件中的循环设置，进度输出到标准输出。
+Ctrl+C 立即停止（正在输入的指令会被中断），鼠标移到屏幕左上角或按停止热键（Windows）同样会停止。
+每步记录断点，--resume 从上次中断处继续；--near 从离当前位置最近的点开始。
+执行期间修改并保存配置文件会在下一步开始前生效（命令行参数仍然优先），--no-reload 关闭。
+每次执行的循环耗时、各点耗时和停止原因追加到运行历史（run_history），--history "" 关闭。
+
+用法:
+    python run_route.py mc_route_config.json [--cycles 0] [--start 0] [--end 3] [--backend sendinput]
+"""
+import sys
+import threading
+import time
+
+from checkpoint import DEFAULT_CHECKPOINT_FILE, CheckpointStore
+from hot_reload import ConfigWatcher, PlanReloader
+from input_backend import BACKEND_CHOICES, DEFAULT_BACKEND, create_backend
+from route_engine import STARTUP_DELAY, RouteEngine
+from route_plan import PlanError, format_duration
+from route_store import load_route_file
+from run_history import DEFAULT_HISTORY_FILE, RunHistory, RunRecorder, route_name
+from stop_watcher import StopWatcher, corner_check, hotkey_checks
+
+JOIN_INTERVAL = 0.1  # 主线程等待执行线程的间隔(秒)，期间响应 Ctrl+C
+EXIT_INTERRUPTED = 130
+
+# 命令行参数 -> 配置文件中的循环设置
+SETTING_OVERRIDES = (
+    ("cycles", "cycle_count"),
+    ("start", "start_index"),
+    ("end", "end_index"),
+    ("period", "cycle_period"),
+    ("segments", "segments"),
+)
+
+
+def apply_overrides(settings, args):
+    """返回用命令行参数覆盖后的循环设置"""
+    settings = dict(settings)
+    for option, key in SETTING_OVERRIDES:
+        value = getattr(args, option)
+        if value is not None:
+            settings[key] = str(value)
+    return settings
+
+
+def console_log(stream=sys.stdout):
+    """把引擎事件输出为带时间的日志行"""
+    def log(key, value):
+        if key in ("status", "cycle") or (key == "action" and value != "无"):
+            print(f"[{time.strftime('%H:%M:%S')}] {key}: {value}", file=stream, flush=True)
+    return log
+
+
+def run_interruptible(work, stop):
+    """在工作线程中执行 work()，主线程响应 Ctrl+C：第一次调用 stop()，再按一次强制退出
+
+    返回是否被 Ctrl+C 中断。
+    """
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    interrupted = False
+    while thread.is_alive():
+        try:
+            thread.join(JOIN_INTERVAL)
+        except KeyboardInterrupt:
+            if interrupted:
+                raise  # 再按一次 Ctrl+C 强制退出
+            interrupted = True
+            print("正在停止...（再按一次 Ctrl+C 强制退出）", flush=True)
+            stop()
+    return interrupted
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="无界面执行路线")
+    parser.add_argument("config", help="路线配置文件（.json 或 .jsonl）")
+    parser.add_argument("--cycles", type=int, help="循环次数，0 表示无限循环")
+    parser.add_argument("--start", type=int, help="起点索引")
+    parser.add_argument("--end", type=int, help="终点索引")
+    parser.add_argument("--period", type=float, help="对齐周期(秒)")
+    parser.add_argument("--segments", help='分段，如 "0-3, 5-8x2"')
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=BACKEND_CHOICES, help="输入方式")
+    parser.add_argument("--startup-delay", type=float, default=STARTUP_DELAY, help="开始前等待的秒数")
+    parser.add_argument("--arrival", nargs="?", const="", metavar="LOG",
+                        help="读取客户端日志检测到达（省略路径时使用默认日志）")
+    parser.add_argument("--waypoints", action="store_true", help="使用 Baritone 航点模式")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_FILE, help="断点文件")
+    start_group = parser.add_mutually_exclusive_group()
+    start_group.add_argument("--resume", action="store_true", help="从断点继续")
+    start_group.add_argument("--near", metavar="POSITION", help='从离当前位置最近的点开始，如 "100 64 -200"')
+    parser.add_argument("--no-reload", action="store_true", help="执行期间不重新加载修改后的配置文件")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE, help="运行历史文件，为空时不记录")
+    parser.add_argument("--metrics", action="store_true", help="导出计时统计（route_metrics.jsonl / .prom）")
+    parser.add_argument("--profile", type=int, nargs="?", const=0, metavar="CYCLES",
+                        help="分析前 CYCLES 次循环的性能（省略次数时分析全部）")
+    args = parser.parse_args(argv)
+
+    try:
+        settings, route = load_route_file(args.config)
+    except (OSError, ValueError) as e:
+        print(f"加载配置失败: {e}", file=sys.stderr)
+        return 2
+    settings = apply_overrides(settings, args)
+
+    try:
+        backend = create_backend(args.backend)
+    except Exception as e:
+        print(f"初始化输入方式失败: {e}", file=sys.stderr)
+        return 2
+
+    detector = None
+    if args.arrival is not None:
+        from arrival_detector import ArrivalDetector
+        detector = ArrivalDetector(args.arrival or None)
+    waypoints = None
+    if args.waypoints:
+        from waypoints import WaypointRegistry
+        waypoints = WaypointRegistry()
+    metrics = exporter = None
+    if args.metrics:
+        from metrics import EngineMetrics, MetricsExporter
+        metrics = EngineMetrics()
+        exporter = MetricsExporter(metrics)
+
+    checkpoints = CheckpointStore(args.checkpoint)
+    history = RunRecorder(RunHistory(args.history), route_name(args.config)) if args.history else None
+    reloader = None if args.no_reload else PlanReloader(ConfigWatcher(args.config, apply_overrides({}, args)))
+    try:
+        engine = RouteEngine.from_settings(route, settings, backend, arrival_detector=detector,
+                                           on_event=console_log(), startup_delay=args.startup_delay,
+                                           countdown_interval=None, metrics=metrics, exporter=exporter,
+                                           waypoints=waypoints, checkpoints=checkpoints, reloader=reloader,
+                                           history=history)
+    except PlanError as e:
+        print(f"循环设置无效: {e}", file=sys.stderr)
+        return 2
+    if args.near:
+        from route_library import nearest_entry, parse_position
+        position = parse_position(args.near)
+        if position is None:
+            print(f"无法解析坐标: {args.near}", file=sys.stderr)
+            return 2
+        engine.resume, distance = nearest_entry(engine.plan, position)
+        print(f"从第 {engine.resume.step + 1} 步开始（距离 {distance:.0f} 格）", flush=True)
+    elif args.resume:
+        engine.resume = checkpoints.resume_point(engine.plan)
+        if engine.resume is None:
+            print("没有可继续的断点（路线或分段已修改，或上次已全部完成）", file=sys.stderr)
+            return 1
+
+    plan = engine.plan
+    cycles = "无限" if plan.cycles == 0 else f"{plan.cycles} 次"
+    print(f"每次循环 {len(plan)} 步，预计 {format_duration(plan.cycle_time)}；"
+          f"循环 {cycles}，预计总耗时 {format_duration(plan.estimated_runtime())}", flush=True)
+
+    profile = None
+    if args.profile is not None:
+        from profiling import ProfileSession
+        profile = ProfileSession(cycles=args.profile)
+        profile.spans.wrap(engine, "send_command")
+        profile.wrap_events(engine)
+
+    def work():
+        if profile is not None:
+            profile.start()
+        try:
+            engine.run()
+        finally:
+            if profile is not None:
+                profile.stop()
+
+    watcher = StopWatcher(engine.cancel_event, [corner_check(backend.position)] + hotkey_checks(),
+                          on_stop=lambda: engine.stop(watcher.triggered_at)).start()
+    try:
+        interrupted = run_interruptible(work, engine.stop)
+    finally:
+        watcher.stop()
+        if detector is not None:
+            detector.close()
+        backend.close()
+
+    if profile is not None:
+        stats_path, summary_path, text = profile.finish()
+        print(text)
+        print(f"分析结果: {stats_path}，摘要: {summary_path}")
+    return EXIT_INTERRUPTED if interrupted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""基于截止时间的调度：支持小数秒延迟且不累积漂移
+
+每个点的截止时间 = 上一个截止时间 + 该点延迟，而不是"发送指令后再等 delay 秒"，
+因此 send_command、界面更新和线程唤醒的耗时都会被后续等待抵消。
+启用对齐周期后，第 N 次循环总是在 t0 + N×period 开始。
+
+直接运行本模块会用虚拟时钟模拟 1000 次循环并输出累计漂移。
+"""
+import random
+import threading
+import time
+
+MAX_LAG = 1.0  # 落后截止时间超过该值(秒)时从当前时间重新计时，避免连续补偿
+
+
+class MonotonicClock:
+    """真实时钟，基于 time.monotonic()"""
+
+    def now(self):
+        return time.monotonic()
+
+    def wait(self, seconds, cancel_event=None):
+        """等待指定秒数，被停止时返回 True"""
+        if cancel_event is None:
+            if seconds > 0:
+                time.sleep(seconds)
+            return False
+        if seconds <= 0:
+            return cancel_event.is_set()
+        return cancel_event.wait(seconds)
+
+    def wait_until(self, deadline, cancel_event=None):
+        """等待到指定时刻，被停止时返回 True"""
+        return self.wait(deadline - self.now(), cancel_event)
+
+
+class VirtualClock(MonotonicClock):
+    """虚拟时钟：等待立即返回并推进时间，用于模拟和测试
+
+    wake_jitter 用来模拟线程唤醒的随机延迟(秒)。
+    """
+
+    def __init__(self, start=0.0, wake_jitter=0.0, seed=None):
+        self._now = start
+        self.wake_jitter = wake_jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        """推进虚拟时间"""
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def wait(self, seconds, cancel_event=None):
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        if seconds > 0:
+            self.advance(seconds + self._random.uniform(0, self.wake_jitter))
+        return cancel_event is not None and cancel_event.is_set()
+
+
+class DeadlineScheduler:
+    """为每个点和每次循环计算绝对截止时间"""
+
+    def __init__(self, clock=None, period=0.0, max_lag=MAX_LAG):
+        self.clock = clock or MonotonicClock()
+        self.period = period  # 大于0时启用对齐周期模式
+        self.max_lag = max_lag
+        self.t0 = None
+        self.next_start = None  # 下一步骤的计划开始时间
+
+    def start(self):
+        """记录起始时间 t0"""
+        self.t0 = self.next_start = self.clock.now()
+        return self.t0
+
+    def cycle_start(self, index):
+        """返回第 index 次循环（从0开始）的计划开始时间"""
+        start = self.next_start
+        if self.period > 0:
+            start = max(start, self.t0 + index * self.period)
+        self.next_start = start
+        return start
+
+    def step_deadline(self, delay):
+        """在发送指令前调用，返回本步骤等待的截止时间"""
+        base = self.next_start
+        now = self.clock.now()
+        if now - base > self.max_lag:
+            base = now  # 已严重落后（如被长时间阻塞），不再追赶
+        self.next_start = base + max(0.0, delay)
+        return self.next_start
+
+    def resync(self):
+        """提前结束等待（如检测到已到达）后，从当前时间开始计算下一步"""
+        self.next_start = self.clock.now()
+
+    def lag(self):
+        """当前时间相对计划时间的偏差(秒)，正数表示落后"""
+        return self.clock.now() - self.next_start
+
+
+def measure_drift(cycles=1000, delays=(0, 30, 24, 96), command_time=(0.15, 0.35), wake_jitter=0.015,
+                  period=0.0):
+    """用虚拟时钟模拟多次循环，返回实际结束时间与理论结束时间之差(秒)
+
+    每次发送指令耗时在 command_time 范围内随机，每次唤醒随机延迟 wake_jitter 以内。
+    """
+    clock = VirtualClock(wake_jitter=wake_jitter, seed=1)
+    rng = random.Random(2)
+    scheduler = DeadlineScheduler(clock, period=period)
+    t0 = scheduler.start()
+    for index in range(cycles):
+        clock.wait_until(scheduler.cycle_start(index))
+        for delay in delays:
+            deadline = scheduler.step_deadline(delay)
+            clock.advance(rng.uniform(*command_time))
+            while clock.now() < deadline:
+                clock.wait(min(1.0, deadline - clock.now()))
+    cycle_time = max(period, sum(delays))
+    return clock.now() - (t0 + (cycles - 1) * cycle_time + sum(delays))
+
+
+if __name__ == "__main__":
+    print(f"1000 次循环累计漂移: {measure_drift() * 1000:.1f} ms")
+    print(f"1000 次循环累计漂移(对齐周期 160s): {measure_drift(period=160) * 1000:.1f} ms")
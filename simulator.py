@@ -0,0 +1,189 @@
+"""路线模拟器：用虚拟时钟和假输入后端运行真实的执行引擎
+
+不需要打开游戏，也不会真正等待，就能测量每个点发送指令的开销、循环耗时和每小时循环次数。
+一万次循环只需几秒。
+
+用法:
+    python simulator.py [配置文件] [--backend clipboard] [--cycles 1000] [--jitter 0.015] [--waypoints] [--chat-latency 0.1]
+"""
+import time
+
+from chat_probe import ChatProbe, FakeChatScreen
+from input_backend import BACKEND_CHOICES, DEFAULT_BACKEND, FakeInputBackend
+from route_engine import RouteEngine
+from route_store import load_route_file
+from scheduler import VirtualClock
+from waypoints import WaypointRegistry
+
+DEFAULT_CYCLES = 1000  # 配置为无限循环时模拟的循环次数
+DEFAULT_JITTER = 0.015  # 模拟线程唤醒延迟上限(秒)
+
+
+class SimulationResult:
+    """一次模拟的统计结果，时间单位均为秒"""
+
+    def __init__(self, backend, cycles, steps, command_times, cycle_starts, end_time, wall_time, typed_chars=0):
+        self.backend = backend
+        self.cycles = cycles
+        self.steps = steps  # 实际执行的路线点步数
+        self.command_times = command_times  # 每次发送指令耗费的（虚拟）时间
+        self.cycle_starts = cycle_starts
+        self.end_time = end_time
+        self.wall_time = wall_time  # 模拟本身消耗的真实时间
+        self.typed_chars = typed_chars  # 输入的指令字符总数（含注册航点）
+
+    @property
+    def command_overhead(self):
+        """每个点发送指令的平均耗时"""
+        return sum(self.command_times) / len(self.command_times) if self.command_times else 0.0
+
+    @property
+    def cycle_time(self):
+        """平均每次循环耗时"""
+        if not self.cycle_starts:
+            return 0.0
+        return (self.end_time - self.cycle_starts[0]) / len(self.cycle_starts)
+
+    @property
+    def cycles_per_hour(self):
+        return 3600 / self.cycle_time if self.cycle_time > 0 else 0.0
+
+    @property
+    def chars_per_cycle(self):
+        return self.typed_chars / self.cycles if self.cycles else 0.0
+
+    @property
+    def engine_overhead(self):
+        """执行引擎每步消耗的真实 CPU 时间（不含等待）"""
+        return self.wall_time / self.steps if self.steps else 0.0
+
+    def to_dict(self):
+        return {
+            "backend": self.backend,
+            "cycles": self.cycles,
+            "command_overhead": self.command_overhead,
+            "cycle_time": self.cycle_time,
+            "cycles_per_hour": self.cycles_per_hour,
+            "chars_per_cycle": self.chars_per_cycle,
+            "engine_overhead": self.engine_overhead,
+            "wall_time": self.wall_time,
+        }
+
+    def report(self):
+        return "\n".join((
+            f"输入方式: {self.backend}",
+            f"模拟循环: {self.cycles} 次（{self.steps} 步）",
+            f"每点指令开销: {self.command_overhead * 1000:.1f} ms（最大 {max(self.command_times, default=0) * 1000:.1f} ms）",
+            f"平均循环耗时: {self.cycle_time:.3f} s",
+            f"预计每小时循环: {self.cycles_per_hour:.1f} 次",
+            f"每循环输入字符: {self.chars_per_cycle:.1f}",
+            f"引擎开销: {self.engine_overhead * 1e6:.1f} µs/步",
+            f"模拟耗时: {self.wall_time:.2f} s",
+        ))
+
+
+class _TimedEngine(RouteEngine):
+    """记录每次发送指令耗时的执行引擎（注册航点的指令不计入）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.command_times = []
+        self._registering = False
+
+    def register_waypoints(self):
+        self._registering = True
+        try:
+            return super().register_waypoints()
+        finally:
+            self._registering = False
+
+    def send_command(self, command):
+        start = self.clock.now()
+        sent = super().send_command(command)
+        if not self._registering:
+            self.command_times.append(self.clock.now() - start)
+        return sent
+
+
+def simulate(route, settings, backend=DEFAULT_BACKEND, cycles=None, wake_jitter=DEFAULT_JITTER, seed=0,
+             waypoints=False, chat_latency=None, profile=None):
+    """用虚拟时钟运行路线并返回 SimulationResult
+
+    backend 为要模拟的输入方式名称，假后端使用与其相同的输入等待时间；
+    cycles 为 None 时使用配置中的循环次数（无限循环时模拟 DEFAULT_CYCLES 次）；
+    waypoints 为 True 时模拟 Baritone 航点模式；
+    chat_latency 为聊天框打开耗时(秒)，设置后模拟启用聊天框检测（自适应等待）；
+    profile 为 profiling.ProfileSession 时分析引擎执行，结果由调用方保存。
+    """
+    settings = dict(settings)
+    if cycles is not None:
+        settings["cycle_count"] = str(cycles)
+    if str(settings.get("cycle_count", "1")).strip() in ("", "0"):
+        settings["cycle_count"] = str(DEFAULT_CYCLES)
+
+    clock = VirtualClock(wake_jitter=wake_jitter, seed=seed)
+    fake = FakeInputBackend.like(backend, clock=clock.now, sleep=clock.sleep)
+    cycle_starts = []
+    probe = None
+    if chat_latency is not None:
+        probe = ChatProbe(FakeChatScreen(fake, clock.now, open_latency=chat_latency), clock=clock.now)
+
+    def on_event(key, value):
+        if key == "cycle" and engine.cycle_count > 0:
+            cycle_starts.append(clock.now())
+
+    engine = _TimedEngine.from_settings(route, settings, fake, clock=clock, on_event=on_event,
+                                        startup_delay=0, countdown_interval=None,
+                                        waypoints=WaypointRegistry() if waypoints else None,
+                                        chat_probe=probe)
+    if profile is not None:
+        profile.spans.wrap(engine, "send_command")
+        profile.wrap_events(engine)
+        profile.start()
+    started = time.perf_counter()
+    try:
+        engine.run()
+    finally:
+        if profile is not None:
+            profile.stop()
+    wall_time = time.perf_counter() - started
+    return SimulationResult(backend, engine.cycle_count, len(engine.command_times), engine.command_times,
+                            cycle_starts, clock.now(), wall_time,
+                            sum(len(command) for command in fake.typed_commands()))
+
+
+def simulate_file(config_path, **kwargs):
+    settings, route = load_route_file(config_path)
+    return simulate(route, settings, **kwargs)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="用虚拟时钟模拟执行路线")
+    parser.add_argument("config", nargs="?", default="mc_route_config.json", help="路线配置文件")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=BACKEND_CHOICES, help="模拟的输入方式")
+    parser.add_argument("--cycles", type=int, help="模拟的循环次数，默认使用配置中的设置")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="线程唤醒延迟上限(秒)")
+    parser.add_argument("--waypoints", action="store_true", help="模拟 Baritone 航点模式")
+    parser.add_argument("--chat-latency", type=float, help="模拟聊天框检测，指定聊天框打开耗时(秒)")
+    parser.add_argument("--profile", type=int, nargs="?", const=0, metavar="CYCLES",
+                        help="分析前 CYCLES 次循环的性能（省略次数时分析全部）")
+    args = parser.parse_args(argv)
+
+    profile = None
+    if args.profile is not None:
+        from profiling import ProfileSession
+        profile = ProfileSession(cycles=args.profile)
+    result = simulate_file(args.config, backend=args.backend, cycles=args.cycles, wake_jitter=args.jitter,
+                           waypoints=args.waypoints, chat_latency=args.chat_latency, profile=profile)
+    print(result.report())
+    if profile is not None:
+        stats_path, summary_path, text = profile.finish()
+        print()
+        print(text)
+        print(f"\n分析结果: {stats_path}，摘要: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
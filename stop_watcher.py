@@ -0,0 +1,139 @@
+"""紧急停止：高频采样鼠标位置和全局热键，触发共享的取消事件
+
+StopWatcher 在独立线程中以约 100Hz 运行所有停止条件，
+任一条件满足即设置 cancel_event；输入后端的每次按键和每次等待都会检查该事件，
+因此即使正在输入指令，停止也能在约 50ms 内生效。
+
+直接运行本模块会用假输入后端测量停止延迟。
+"""
+import random
+import sys
+import threading
+import time
+
+from input_backend import FakeInputBackend, StopRequested, send_chat_command
+
+SAMPLE_INTERVAL = 0.01  # 采样间隔(秒)
+CORNER_SIZE = 10  # 左上角判定范围(像素)
+DEFAULT_HOTKEY = "f12"  # 默认停止热键
+
+VK_CODES = {"f8": 0x77, "f9": 0x78, "f10": 0x79, "f12": 0x7B, "pause": 0x13, "end": 0x23}
+
+
+def corner_check(position_reader, corner_size=CORNER_SIZE):
+    """鼠标移到屏幕左上角时返回 True 的停止条件"""
+    def check():
+        x, y = position_reader()
+        return x < corner_size and y < corner_size
+    return check
+
+
+def hotkey_check(key_reader, key=DEFAULT_HOTKEY):
+    """热键按下时返回 True 的停止条件"""
+    def check():
+        return key_reader(key)
+    return check
+
+
+def windows_key_reader():
+    """返回基于 GetAsyncKeyState 的按键读取函数，非 Windows 平台返回 None"""
+    if sys.platform != "win32":
+        return None
+
+    import ctypes
+    get_state = ctypes.windll.user32.GetAsyncKeyState
+
+    def read(key):
+        return bool(get_state(VK_CODES[key.lower()]) & 0x8000)
+    return read
+
+
+def hotkey_checks(key=DEFAULT_HOTKEY):
+    """当前平台可用的热键停止条件列表（非 Windows 平台为空）"""
+    key_reader = windows_key_reader()
+    return [hotkey_check(key_reader, key)] if key_reader else []
+
+
+class StopWatcher:
+    """在后台线程中高频检查停止条件"""
+
+    def __init__(self, cancel_event, checks, interval=SAMPLE_INTERVAL, on_stop=None):
+        self.cancel_event = cancel_event
+        self.checks = list(checks)
+        self.interval = interval
+        self.on_stop = on_stop
+        self.triggered_at = None  # 检测到停止条件的时间(monotonic)
+        self._halt = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._halt.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _triggered(self):
+        for check in self.checks:
+            try:
+                if check():
+                    return True
+            except Exception:
+                pass  # 单次采样失败不影响后续采样
+        return False
+
+    def _run(self):
+        while not self._halt.is_set() and not self.cancel_event.is_set():
+            if self._triggered():
+                self.triggered_at = time.monotonic()
+                try:
+                    if self.on_stop:
+                        self.on_stop()  # 先于取消事件调用，便于记录停止请求的时刻
+                finally:
+                    self.cancel_event.set()
+                break
+            self._halt.wait(self.interval)
+
+
+def measure_stop_latency(trials=20, type_interval=0.1):
+    """测量从鼠标移到左上角到输入线程停止的延迟
+
+    每次试验在假后端逐字输入指令的过程中随机时刻把光标移到左上角，
+    返回 (检测延迟列表, 停止延迟列表)，单位秒。
+    """
+    detect_latencies = []
+    stop_latencies = []
+    for _ in range(trials):
+        cancel_event = threading.Event()
+        backend = FakeInputBackend(chat_open_delay=0.15, type_interval=type_interval)
+        backend.cancel_event = cancel_event
+        watcher = StopWatcher(cancel_event, [corner_check(backend.position)]).start()
+        finished = {}
+
+        def worker():
+            try:
+                while True:
+                    send_chat_command(backend, ".b goto 637 177 -1139")
+            except StopRequested:
+                finished["at"] = time.monotonic()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        time.sleep(random.uniform(0.2, 1.5))
+        moved_at = time.monotonic()
+        backend.cursor = (0, 0)
+        thread.join()
+        watcher.stop()
+
+        detect_latencies.append(watcher.triggered_at - moved_at)
+        stop_latencies.append(finished["at"] - moved_at)
+    return detect_latencies, stop_latencies
+
+
+if __name__ == "__main__":
+    detect, stop = measure_stop_latency()
+    print(f"检测延迟: 平均 {sum(detect) / len(detect) * 1000:.1f} ms, 最大 {max(detect) * 1000:.1f} ms")
+    print(f"停止延迟: 平均 {sum(stop) / len(stop) * 1000:.1f} ms, 最大 {max(stop) * 1000:.1f} ms")
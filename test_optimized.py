@@ -1,26 +1,82 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 import threading
-import time
-import pyautogui
-import json
+import queue
 import os
 
+from arrival_detector import ArrivalDetector, default_log_path
+from checkpoint import CheckpointStore
+from hot_reload import ConfigWatcher, PlanReloader
+from input_backend import BACKEND_CHOICES, DEFAULT_BACKEND, create_backend
+from metrics import EngineMetrics, MetricsExporter
+from route_list_view import RouteListView
+from route_engine import EngineBase, RouteEngine
+from route_model import Route, RoutePoint, format_coords, format_delay
+from route_plan import PlanError, compile_plan, format_duration
+from route_store import (
+    STARTUP_PROBE_ENV, RouteJournal, load_preferences, load_route_file, save_preferences, save_route_file,
+)
+from scheduler import MonotonicClock
+from stop_watcher import DEFAULT_HOTKEY, StopWatcher, hotkey_checks
+from waypoints import WaypointRegistry
+
+UI_REFRESH_MS = 100  # 界面刷新间隔(毫秒)
+PLAN_PREVIEW_LIMIT = 2000  # 预览计划时最多列出的步数
+RETIMED_PREVIEW_LIMIT = 20  # 优化路线时最多列出的重新估算等待时间的点
+
+
+def safety_notice():
+    """使用说明文本"""
+    return (
+        "1. 确保游戏窗口处于前台（建议窗口化模式）\n"
+        "2. 游戏分辨率建议设置为1920x1080\n"
+        "3. 按F3+G显示区块边界辅助定位\n"
+        f"4. 快速停止：将鼠标拖动到屏幕左上角，或按 {DEFAULT_HOTKEY.upper()}（Windows）\n"
+        "5. 使用Baritone模组的.b goto指令进行寻路\n"
+        "6. 程序启动时会自动尝试加载 mc_route_config.json 路径配置文件,如果文件不存在，则加载默认示例点"
+    )
+
 
 class MinecraftAutoGotoApp:
     def __init__(self, root):
         self.root = root
         self.root.title("MC自动寻路配置系统")
         self.root.geometry("650x450")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.is_running = False
-        self.cycle_count = 0
-        self.total_cycles = 0
-        self.route_points = []  # 存储所有路线点
+        self.route_points = Route()  # 存储所有路线点
+        self.input_backend = None  # 当前循环使用的输入后端
+        self.arrival_detector = None  # 当前循环使用的到达检测器
+        self.chat_probe = None  # 当前循环使用的聊天框检测
+        self.chat_latencies = None  # 聊天框打开、关闭的历史延迟，首次启用检测时加载
+        self.cancel_event = threading.Event()  # 停止请求，所有等待和按键都会检查
+        self.stop_watcher = None  # 紧急停止监视线程
+        self.clock = MonotonicClock()  # 执行循环使用的时钟
+        self.engine = None
+        self.reloader = None  # 运行中把界面编辑和配置文件的修改交给引擎
+        self.profile = None  # 本次执行的性能分析，未启用时为 None
+        self.profile_cycles = 0  # 性能分析的循环次数，0 表示整个执行
+        self.async_bridge = None  # 使用 asyncio 引擎时在 Tk 主循环中推进事件循环，首次使用时创建
+        self.metrics = EngineMetrics()  # 程序运行期间累计的计时统计
+        self.metrics_exporter = MetricsExporter(self.metrics)
+        self.checkpoints = CheckpointStore()  # 每步记录的断点，用于继续上次中断的循环
+        self.travel_log = None  # 实测路段耗时，首次使用时加载
+        self.run_history = None  # 每次执行的循环耗时记录，首次使用时创建
+        self.route_library = None  # 配置目录中所有路线的空间索引，首次使用时创建
+        self.waypoints = WaypointRegistry()  # 本次游戏会话中已注册的 Baritone 航点
+        self.preferences = load_preferences()  # 界面偏好设置
+        self.log_path = default_log_path()  # Minecraft 客户端日志路径
         self.config_file = "mc_route_config.json"  # 默认配置文件
+        self.journal = RouteJournal(self.config_file)  # 未保存编辑的自动保存日志
+        self.ui_queue = queue.Queue()  # 工作线程投递的界面状态事件
+        self._ui_rendered = {}  # 已渲染到界面的状态，避免重复刷新
 
         # 初始化UI组件
         self.create_widgets()
 
+        # 启动界面刷新循环
+        self.root.after(UI_REFRESH_MS, self.drain_ui_queue)
+
         # 尝试加载默认配置文件
         self.load_config(self.config_file)
 
@@ -28,8 +84,9 @@ class MinecraftAutoGotoApp:
         if not self.route_points:
             self.add_example_points()
 
-        # 安全提示
-        self.show_safety_warning()
+        # 安全提示：显示在窗口顶部，不阻塞界面；选择"不再显示"后不再出现
+        if not self.preferences.get("safety_notice_dismissed"):
+            self.show_safety_banner()
 
     def create_widgets(self):
         """创建UI界面组件"""
@@ -44,11 +101,31 @@ class MinecraftAutoGotoApp:
         file_menu.add_command(label="打开配置", command=self.open_config)
         file_menu.add_command(label="保存配置", command=self.save_config)
         file_menu.add_command(label="另存为", command=self.save_config_as)
+        file_menu.add_command(label="附近的路线", command=self.show_nearby_routes)
+        file_menu.add_command(label="运行记录", command=self.show_run_history)
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.root.quit)
 
+        # 设置菜单
+        settings_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="设置", menu=settings_menu)
+        settings_menu.add_command(label="选择客户端日志", command=self.choose_log_path)
+        settings_menu.add_command(label="重置航点会话", command=self.reset_waypoints)
+        self.async_var = tk.BooleanVar(value=False)
+        settings_menu.add_checkbutton(label="使用 asyncio 引擎", variable=self.async_var)
+        self.profile_var = tk.BooleanVar(value=False)
+        settings_menu.add_checkbutton(label="性能分析", variable=self.profile_var, command=self.toggle_profiling)
+        settings_menu.add_command(label="使用说明", command=self.show_safety_warning)
+
+        # 安全提示横幅（默认隐藏）
+        self.banner = ttk.Frame(self.root, padding=(10, 10, 10, 0))
+        ttk.Label(self.banner, text=safety_notice(), wraplength=460, justify=tk.LEFT).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(self.banner, text="不再显示", command=lambda: self.hide_safety_banner(forever=True)).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(self.banner, text="关闭", command=self.hide_safety_banner).pack(side=tk.RIGHT, padx=2)
+
         main_frame = ttk.Frame(self.root, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
+        self.main_frame = main_frame
 
         # 左侧：路线点管理
         left_frame = ttk.LabelFrame(main_frame, text="路线点配置", padding=10)
@@ -56,7 +133,8 @@ class MinecraftAutoGotoApp:
 
         # 路线点列表
         columns = ("#", "坐标", "等待时间(s)", "描述")
-        self.points_tree = ttk.Treeview(left_frame, columns=columns, show="headings", height=10)
+        self.points_view = RouteListView(left_frame, columns, self.format_point_row, height=10)
+        self.points_tree = self.points_view.tree
 
         for col in columns:
             self.points_tree.heading(col, text=col)
@@ -64,7 +142,7 @@ class MinecraftAutoGotoApp:
 
         self.points_tree.column("#", width=40)
         self.points_tree.column("描述", width=150)
-        self.points_tree.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.points_view.frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
 
         # 点操作按钮
         btn_frame = ttk.Frame(left_frame)
@@ -75,6 +153,7 @@ class MinecraftAutoGotoApp:
         ttk.Button(btn_frame, text="删除点", command=self.delete_point).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="上移", command=self.move_up).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="下移", command=self.move_down).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="优化路线", command=self.optimize_points).pack(side=tk.LEFT, padx=2)
 
         # 右侧：控制面板
         right_frame = ttk.LabelFrame(main_frame, text="控制面板", padding=10)
@@ -99,6 +178,39 @@ class MinecraftAutoGotoApp:
         self.end_var = tk.StringVar(value="0")
         ttk.Entry(cycle_frame, textvariable=self.end_var, width=10).grid(row=2, column=1, padx=5, pady=2)
 
+        # 输入方式设置
+        ttk.Label(cycle_frame, text="输入方式:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=2)
+        self.backend_var = tk.StringVar(value=DEFAULT_BACKEND)
+        ttk.Combobox(cycle_frame, textvariable=self.backend_var, values=BACKEND_CHOICES,
+                     state="readonly", width=10).grid(row=3, column=1, padx=5, pady=2)
+
+        # 到达检测设置
+        self.arrival_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cycle_frame, text="日志到达检测", variable=self.arrival_var).grid(
+            row=4, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+        # 对齐周期设置
+        ttk.Label(cycle_frame, text="对齐周期(s):").grid(row=5, column=0, sticky=tk.W, padx=5, pady=2)
+        self.period_var = tk.StringVar(value="0")
+        ttk.Entry(cycle_frame, textvariable=self.period_var, width=10).grid(row=5, column=1, padx=5, pady=2)
+        ttk.Label(cycle_frame, text="(0=不对齐)").grid(row=5, column=2, padx=5, pady=2)
+
+        # 航点模式设置
+        self.waypoint_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cycle_frame, text="Baritone航点模式", variable=self.waypoint_var).grid(
+            row=6, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+        # 分段设置
+        ttk.Label(cycle_frame, text="分段:").grid(row=7, column=0, sticky=tk.W, padx=5, pady=2)
+        self.segments_var = tk.StringVar(value="")
+        ttk.Entry(cycle_frame, textvariable=self.segments_var, width=10).grid(row=7, column=1, padx=5, pady=2)
+        ttk.Label(cycle_frame, text="(如 0-3,5-8x2)").grid(row=7, column=2, padx=5, pady=2)
+
+        # 聊天框检测设置
+        self.probe_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cycle_frame, text="聊天框检测（自适应等待）", variable=self.probe_var).grid(
+            row=8, column=0, columnspan=3, sticky=tk.W, padx=5, pady=2)
+
         # 控制按钮
         control_frame = ttk.Frame(right_frame)
         control_frame.pack(fill=tk.X, pady=10)
@@ -109,6 +221,19 @@ class MinecraftAutoGotoApp:
         self.stop_btn = ttk.Button(control_frame, text="停止循环", command=self.stop_loop, state=tk.DISABLED, width=15)
         self.stop_btn.pack(pady=5)
 
+        self.resume_btn = ttk.Button(control_frame, text="继续上次", command=self.resume_loop, width=15)
+        self.resume_btn.pack(pady=5)
+
+        self.nearest_btn = ttk.Button(control_frame, text="就近开始", command=self.start_nearest, width=15)
+        self.nearest_btn.pack(pady=5)
+
+        self.mark_btn = ttk.Button(control_frame, text="标记到达", command=self.mark_arrived, state=tk.DISABLED,
+                                   width=15)
+        self.mark_btn.pack(pady=5)
+
+        ttk.Button(control_frame, text="预览计划", command=self.show_plan, width=15).pack(pady=5)
+        ttk.Button(control_frame, text="调整等待", command=self.show_delay_tuning, width=15).pack(pady=5)
+
         # 状态信息
         status_frame = ttk.LabelFrame(right_frame, text="状态信息", padding=5)
         status_frame.pack(fill=tk.X, pady=5)
@@ -128,23 +253,44 @@ class MinecraftAutoGotoApp:
     def new_config(self):
         """新建配置"""
         if messagebox.askyesno("确认", "确定要新建配置吗？未保存的更改将丢失。"):
-            self.route_points = []
+            self.route_points = Route()
             self.cycle_var.set("1")
             self.start_var.set("0")
             self.end_var.set("0")
+            self.period_var.set("0")
+            self.segments_var.set("")
             self.update_points_tree()
             self.config_file = "mc_route_config.json"
+            self.journal.close()
+            self.journal = RouteJournal(self.config_file)
+            self.journal_snapshot()
 
     def open_config(self):
         """打开配置文件"""
         file_path = filedialog.askopenfilename(
             title="打开配置文件",
-            filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")]
+            filetypes=[("JSON文件", "*.json"), ("JSON Lines 路线", "*.jsonl"), ("所有文件", "*.*")]
         )
 
         if file_path:
             self.load_config(file_path)
 
+    def choose_log_path(self):
+        """选择用于到达检测的客户端日志文件"""
+        file_path = filedialog.askopenfilename(
+            title="选择客户端日志 (latest.log)",
+            initialfile="latest.log",
+            filetypes=[("日志文件", "*.log"), ("所有文件", "*.*")]
+        )
+
+        if file_path:
+            self.log_path = file_path
+
+    def reset_waypoints(self):
+        """重新进入游戏或切换世界后，下次启动时重新注册航点"""
+        self.waypoints.reset()
+        self.update_status("航点会话已重置")
+
     def save_config(self):
         """保存配置文件"""
         if self.config_file and os.path.exists(self.config_file):
@@ -157,29 +303,70 @@ class MinecraftAutoGotoApp:
         file_path = filedialog.asksaveasfilename(
             title="保存配置文件",
             defaultextension=".json",
-            filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")]
+            filetypes=[("JSON文件", "*.json"), ("JSON Lines 路线", "*.jsonl"), ("所有文件", "*.*")]
         )
 
         if file_path:
-            self.save_config_to_file(file_path)
-            self.config_file = file_path
+            if self.save_config_to_file(file_path):
+                self.journal.clear()
+                self.config_file = file_path
+                self.journal = RouteJournal(file_path)
 
     def save_config_to_file(self, file_path):
         """保存配置到文件"""
         try:
-            config_data = {
-                "cycle_count": self.cycle_var.get(),
-                "start_index": self.start_var.get(),
-                "end_index": self.end_var.get(),
-                "route_points": self.route_points
-            }
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, ensure_ascii=False, indent=2)
+            # 先写临时文件再原子替换，保存中途崩溃不会损坏原配置
+            save_route_file(file_path, self.current_settings(), self.route_points)
+            if file_path == self.journal.config_path:
+                self.journal.clear()
 
             messagebox.showinfo("成功", f"配置已保存到 {file_path}")
+            return True
         except Exception as e:
             messagebox.showerror("错误", f"保存配置失败: {str(e)}")
+            return False
+
+    def current_settings(self):
+        """当前界面中的循环设置"""
+        return {
+            "cycle_count": self.cycle_var.get(),
+            "start_index": self.start_var.get(),
+            "end_index": self.end_var.get(),
+            "cycle_period": self.period_var.get(),
+            "segments": self.segments_var.get()
+        }
+
+    def apply_settings(self, settings):
+        """把循环设置填入界面"""
+        self.cycle_var.set(settings["cycle_count"])
+        self.start_var.set(settings["start_index"])
+        self.end_var.set(settings["end_index"])
+        self.period_var.set(settings["cycle_period"])
+        self.segments_var.set(settings["segments"])
+
+    def journal_edit(self, op, *args):
+        """把一次编辑追加到自动保存日志，日志写入失败不影响编辑"""
+        try:
+            getattr(self.journal, f"record_{op}")(*args)
+            self.journal.maybe_compact(self.current_settings(), self.route_points)
+        except OSError:
+            pass
+        self.push_edits()
+
+    def push_edits(self):
+        """循环运行中时把修改后的路线交给引擎，在下一步开始前生效，无效的修改不影响执行"""
+        if not self.is_running or self.reloader is None:
+            return
+        try:
+            plan = compile_plan(self.route_points, self.current_settings())
+        except ValueError as e:
+            self.update_status(f"修改无效，继续按原路线执行: {str(e)}")
+            return
+        self.reloader.submit(plan)
+
+    def journal_snapshot(self):
+        """把整条路线作为快照写入自动保存日志"""
+        self.journal_edit("snapshot", self.current_settings(), self.route_points)
 
     def load_config(self, file_path):
         """从文件加载配置"""
@@ -187,19 +374,27 @@ class MinecraftAutoGotoApp:
             return False
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            # 先解析并校验全部路线点，无效的文件不会加载一半
+            settings, route = load_route_file(file_path)
+
+            # 检查上次未保存的编辑
+            journal = RouteJournal(file_path)
+            if journal.has_pending():
+                if messagebox.askyesno("恢复", "检测到该配置有未保存的编辑记录，是否恢复？"):
+                    settings, route = journal.replay(settings, route)
+                else:
+                    journal.clear()
 
             # 加载循环设置
-            self.cycle_var.set(config_data.get("cycle_count", "1"))
-            self.start_var.set(config_data.get("start_index", "0"))
-            self.end_var.set(config_data.get("end_index", "0"))
+            self.apply_settings(settings)
 
             # 加载路线点
-            self.route_points = config_data.get("route_points", [])
+            self.route_points = route
             self.update_points_tree()
 
             self.config_file = file_path
+            self.journal.close()
+            self.journal = journal
             return True
         except Exception as e:
             messagebox.showerror("错误", f"加载配置失败: {str(e)}")
@@ -214,149 +409,443 @@ class MinecraftAutoGotoApp:
             {"coords": "637 177 -1139", "delay": 60, "desc": "返回起点"}
         ]
 
-        for point in example_points:
-            self.route_points.append(point)
-            self.update_points_tree()
+        self.route_points = Route.from_dicts(example_points)
+        self.update_points_tree()
+
+    def format_point_row(self, idx, point):
+        """生成路线点列表中一行的显示数据"""
+        return (
+            idx,
+            point.coords,
+            format_delay(point.delay),
+            point.desc + (" [固定]" if point.pinned else "")
+        )
 
     def update_points_tree(self):
-        """更新路线点列表显示"""
-        # 清空现有列表
-        for item in self.points_tree.get_children():
-            self.points_tree.delete(item)
-
-        # 添加新点
-        for idx, point in enumerate(self.route_points):
-            self.points_tree.insert("", "end", values=(
-                idx,
-                point["coords"],
-                point["delay"],
-                point["desc"]
-            ))
+        """整体刷新路线点列表（加载、新建配置或重排后调用）"""
+        self.points_view.set_points(self.route_points)
+
+    def get_selected_index(self):
+        """返回选中路线点的索引，未选中时提示并返回 None"""
+        index = self.points_view.selected_index()
+        if index is None:
+            messagebox.showwarning("警告", "请先选择一个路线点")
+        return index
 
     def add_point(self):
         """添加新路线点"""
         dialog = PointDialog(self.root, "添加路线点")
         if dialog.result:
             self.route_points.append(dialog.result)
-            self.update_points_tree()
+            self.journal_edit("insert", len(self.route_points) - 1, dialog.result)
+            self.points_view.inserted(len(self.route_points) - 1)
+            self.points_view.select(len(self.route_points) - 1)
 
     def edit_point(self):
         """编辑选中的路线点"""
-        selected = self.points_tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请先选择一个路线点")
+        index = self.get_selected_index()
+        if index is None:
             return
 
-        index = int(self.points_tree.item(selected[0], "values")[0])
         point = self.route_points[index]
 
         dialog = PointDialog(
             self.root,
             "编辑路线点",
-            coords=point["coords"],
-            delay=point["delay"],
-            desc=point["desc"]
+            coords=point.coords,
+            delay=format_delay(point.delay),
+            desc=point.desc,
+            pinned=point.pinned
         )
 
         if dialog.result:
             self.route_points[index] = dialog.result
-            self.update_points_tree()
+            self.journal_edit("update", index, dialog.result)
+            self.points_view.updated(index)
 
     def delete_point(self):
         """删除选中的路线点"""
-        selected = self.points_tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请先选择一个路线点")
+        index = self.get_selected_index()
+        if index is None:
             return
 
-        index = int(self.points_tree.item(selected[0], "values")[0])
         self.route_points.pop(index)
-        self.update_points_tree()
+        self.journal_edit("delete", index)
+        self.points_view.deleted(index)
 
     def move_up(self):
         """上移选中的路线点"""
-        selected = self.points_tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请先选择一个路线点")
+        index = self.get_selected_index()
+        if index is None:
             return
 
-        index = int(self.points_tree.item(selected[0], "values")[0])
         if index > 0:
             # 交换位置
-            self.route_points[index], self.route_points[index - 1] = self.route_points[index - 1], self.route_points[
-                index]
-            self.update_points_tree()
+            self.route_points.swap(index, index - 1)
+            self.journal_edit("swap", index, index - 1)
+            self.points_view.swapped(index, index - 1)
             # 重新选中移动后的点
-            self.points_tree.selection_set(self.points_tree.get_children()[index - 1])
+            self.points_view.select(index - 1)
 
     def move_down(self):
         """下移选中的路线点"""
-        selected = self.points_tree.selection()
-        if not selected:
-            messagebox.showwarning("警告", "请先选择一个路线点")
+        index = self.get_selected_index()
+        if index is None:
             return
 
-        index = int(self.points_tree.item(selected[0], "values")[0])
         if index < len(self.route_points) - 1:
             # 交换位置
-            self.route_points[index], self.route_points[index + 1] = self.route_points[index + 1], self.route_points[
-                index]
-            self.update_points_tree()
+            self.route_points.swap(index, index + 1)
+            self.journal_edit("swap", index, index + 1)
+            self.points_view.swapped(index, index + 1)
             # 重新选中移动后的点
-            self.points_tree.selection_set(self.points_tree.get_children()[index + 1])
+            self.points_view.select(index + 1)
 
-    def show_safety_warning(self):
-        """显示安全警告"""
+    def optimize_points(self):
+        """按三维距离优化起点与终点之间的路线点顺序"""
+        if self.is_running:
+            messagebox.showwarning("警告", "请先停止循环")
+            return
+        if len(self.route_points) < 3:
+            messagebox.showinfo("提示", "路线点少于3个，无需优化")
+            return
+
+        from route_optimizer import optimize_route
+
+        try:
+            result = optimize_route(self.route_points, self.start_var.get(), self.end_var.get())
+        except (TypeError, ValueError) as e:
+            messagebox.showerror("错误", f"优化路线失败: {str(e)}")
+            return
+
+        if result.distance_after >= result.distance_before - 1e-6:
+            messagebox.showinfo("优化路线", f"当前顺序已是最优\n预计距离: {result.distance_before:.1f} 格")
+            return
+
+        saved = result.distance_before - result.distance_after
+        retimed = ", ".join(str(index) for index in result.retimed[:RETIMED_PREVIEW_LIMIT])
+        if len(result.retimed) > RETIMED_PREVIEW_LIMIT:
+            retimed += " ..."
         message = (
-            "MC自动寻路脚本 - 使用说明\n\n"
-            "1. 确保游戏窗口处于前台（建议窗口化模式）\n"
-            "2. 游戏分辨率建议设置为1920x1080\n"
-            "3. 按F3+G显示区块边界辅助定位\n"
-            "4. 快速停止：将鼠标拖动到屏幕左上角\n"
-            "5. 使用Baritone模组的.b goto指令进行寻路\n"
-            "6. 程序启动时会自动尝试加载 mc_route_config.json 路径配置文件,如果文件不存在，则加载默认示例点"
+            f"优化前预计距离: {result.distance_before:.1f} 格\n"
+            f"优化后预计距离: {result.distance_after:.1f} 格\n"
+            f"每次循环减少: {saved:.1f} 格 ({saved / result.distance_before:.0%})\n"
+            f"{len(result.retimed)} 个点的上一点改变，等待时间已按距离重新估算，请在列表中检查"
+            f"（含刷新等待的点需手动调整）: {retimed or '无'}\n"
+            "起点、终点和固定点的等待时间不变\n\n"
+            "是否应用新的顺序？（起点、终点和固定点位置不变）"
         )
-        messagebox.showinfo("使用说明", message)
+        if messagebox.askyesno("优化路线", message):
+            self.route_points = result.points
+            self.journal_snapshot()
+            self.update_points_tree()
+
+    def show_plan(self):
+        """显示执行计划和预计总耗时"""
+        try:
+            plan = compile_plan(self.route_points, self.current_settings())
+        except PlanError as e:
+            messagebox.showerror("错误", f"循环设置无效: {str(e)}")
+            return
+
+        cycles = "无限" if plan.cycles == 0 else f"{plan.cycles} 次"
+        summary = (f"每次循环 {len(plan)} 步，预计 {format_duration(plan.cycle_time)}；"
+                   f"循环 {cycles}，预计总耗时 {format_duration(plan.estimated_runtime())}")
+        self.show_text_window("执行计划", summary, "\n".join(plan.describe(limit=PLAN_PREVIEW_LIMIT)))
+
+    def show_text_window(self, title, summary, content, geometry="520x400"):
+        """显示带摘要标题的只读文本窗口"""
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        window.geometry(geometry)
+        ttk.Label(window, text=summary, padding=5).pack(fill=tk.X)
+
+        text_frame = ttk.Frame(window)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        text = tk.Text(text_frame, wrap=tk.NONE)
+        scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        text.insert(tk.END, content)
+        text.configure(state=tk.DISABLED)
+
+    def load_travel_log(self):
+        """第一次使用时加载路段耗时记录"""
+        if self.travel_log is None:
+            from travel_model import TravelLog
+            self.travel_log = TravelLog.load()
+        return self.travel_log
+
+    def load_run_history(self):
+        """第一次使用时打开运行历史"""
+        if self.run_history is None:
+            from run_history import RunHistory
+            self.run_history = RunHistory()
+        return self.run_history
+
+    def run_recorder(self):
+        """本次执行的运行历史记录器，路线名称为配置文件名"""
+        from run_history import RunRecorder, route_name
+        return RunRecorder(self.load_run_history(), route_name(self.config_file))
+
+    def show_run_history(self):
+        """按天、按路线汇总运行历史中的循环耗时，或列出当前路线各点的耗时"""
+        from run_history import route_name
+
+        history = self.load_run_history()
+        history.flush()  # 包括刚结束的执行
+        modes = {"按天": "day", "按路线": "route", "按路线和天": "route_day", "当前路线各点": None}
+
+        window = tk.Toplevel(self.root)
+        window.title("运行记录")
+        window.geometry("600x400")
+
+        top = ttk.Frame(window, padding=5)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="汇总方式:").pack(side=tk.LEFT)
+        mode_var = tk.StringVar(value="按天")
+        ttk.Combobox(top, textvariable=mode_var, values=list(modes), state="readonly",
+                     width=14).pack(side=tk.LEFT, padx=5)
+        summary_label = ttk.Label(window, padding=5)
+        summary_label.pack(fill=tk.X)
+
+        columns = ("key", "count", "median", "best", "worst")
+        tree = ttk.Treeview(window, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(columns, ("分组", "循环数", "中位数(s)", "最快(s)", "最慢(s)"),
+                                          (220, 70, 90, 90, 90)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W if column == "key" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        def refresh(*_):
+            mode = modes[mode_var.get()]
+            if mode is None:
+                tree.heading("key", text="点序号")
+                stats = history.point_stats(route_name(self.config_file))
+            else:
+                tree.heading("key", text="分组")
+                stats = history.cycle_stats(mode)
+            tree.delete(*tree.get_children())
+            for stat in stats:
+                tree.insert("", tk.END, values=(stat.key, stat.count, f"{stat.median:.1f}",
+                                                f"{stat.best:.1f}", f"{stat.worst:.1f}"))
+            runs = history.recent_runs(1)
+            if runs:
+                run = runs[0]
+                summary_label.config(text=f"最近一次: {run.route}，{run.cycles} 次循环，"
+                                          f"耗时 {format_duration(run.end - run.start)}，结束原因 {run.reason}")
+            else:
+                summary_label.config(text="还没有运行记录")
+
+        mode_var.trace_add("write", refresh)
+        refresh()
+
+    def mark_arrived(self):
+        """手动确认已到达当前点，记录该路段的实测耗时"""
+        engine = self.engine
+        seconds = engine.mark_arrived() if isinstance(engine, EngineBase) else None
+        if seconds is None:
+            self.update_status("当前路段无法记录（第一步或已记录）")
+        else:
+            self.update_status(f"已记录路段耗时: {seconds:.1f}s")
+
+    def show_delay_tuning(self):
+        """根据实测路段耗时建议各点的等待时间，预览节省的时间后应用到所选点"""
+        from travel_model import DEFAULT_MARGIN, projected_cycle_time, suggest_delays
+
+        log = self.load_travel_log()
+        try:
+            compile_plan(self.route_points, self.current_settings())
+        except PlanError as e:
+            messagebox.showerror("错误", f"循环设置无效: {str(e)}")
+            return
+        if not log.samples:
+            messagebox.showinfo("提示", "还没有实测耗时：启用到达检测，或在到达时点击“标记到达”后再试")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("调整等待时间")
+        window.geometry("640x400")
+
+        top = ttk.Frame(window, padding=5)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="安全余量(%):").pack(side=tk.LEFT)
+        margin_var = tk.StringVar(value=f"{DEFAULT_MARGIN * 100:g}")
+        ttk.Spinbox(top, from_=0, to=200, increment=5, textvariable=margin_var, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(top, text="选中的点将被应用（包含刷新等待的点请取消选择）").pack(side=tk.LEFT, padx=5)
+        summary_label = ttk.Label(window, padding=5)
+        summary_label.pack(fill=tk.X)
+
+        columns = ("desc", "distance", "current", "suggested", "samples")
+        tree = ttk.Treeview(window, columns=columns, show="headings", selectmode="extended")
+        for column, heading, width in zip(columns, ("描述", "距离", "当前(s)", "建议(s)", "样本"),
+                                          (200, 80, 80, 80, 60)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W if column == "desc" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5)
+        state = {"suggestions": []}
+
+        def selected():
+            return {int(iid) for iid in tree.selection()}
+
+        def update_summary(*_):
+            before, after = projected_cycle_time(self.route_points, self.current_settings(),
+                                                 state["suggestions"], selected())
+            change = "节省" if after <= before else "增加"
+            rates = f"，每小时循环 {3600 / before:.1f} → {3600 / after:.1f}" if before > 0 and after > 0 else ""
+            summary_label.config(text=f"每次循环 {format_duration(before)} → {format_duration(after)}"
+                                      f"（{change} {format_duration(abs(before - after))}）{rates}")
+
+        def refresh(*_):
+            try:
+                margin = float(margin_var.get()) / 100
+            except ValueError:
+                return
+            try:
+                suggestions = suggest_delays(self.route_points, self.current_settings(), log, margin)
+            except PlanError:
+                return
+            state["suggestions"] = suggestions
+            tree.delete(*tree.get_children())
+            for s in suggestions:
+                suggested = "-" if s.suggested is None else f"{s.suggested:g}"
+                tree.insert("", tk.END, iid=str(s.index),
+                            values=(s.desc, f"{s.distance:.0f}", format_delay(s.current), suggested, s.samples))
+            tree.selection_set([str(s.index) for s in suggestions
+                                if s.suggested is not None and s.suggested != s.current])
+            update_summary()
+
+        def apply():
+            indices = selected()
+            count = 0
+            for s in state["suggestions"]:
+                if s.index in indices and s.suggested is not None:
+                    point = self.route_points[s.index]
+                    point.delay = s.suggested
+                    self.route_points[s.index] = point
+                    self.journal_edit("update", s.index, point)
+                    self.points_view.updated(s.index)
+                    count += 1
+            self.update_status(f"已调整 {count} 个点的等待时间")
+            refresh()
+
+        ttk.Button(window, text="应用所选", command=apply).pack(pady=5)
+        tree.bind("<<TreeviewSelect>>", update_summary)
+        margin_var.trace_add("write", refresh)
+        refresh()
+
+    def toggle_profiling(self):
+        """启用性能分析时询问分析的循环次数"""
+        if not self.profile_var.get():
+            return
+        cycles = simpledialog.askinteger("性能分析", "分析前多少次循环（0 表示整个执行）：",
+                                         initialvalue=self.profile_cycles, minvalue=0, parent=self.root)
+        if cycles is None:
+            self.profile_var.set(False)
+            return
+        self.profile_cycles = cycles
+
+    def begin_profile(self):
+        """创建本次执行的性能分析，并为界面更新和停止检测加上计时区间；失败时本次不分析"""
+        try:
+            from profiling import ProfileSession  # 延迟导入 cProfile，不影响启动耗时
+
+            self.profile = ProfileSession(cycles=self.profile_cycles)
+        except Exception as e:
+            self.profile = None
+            messagebox.showwarning("警告", f"无法启用性能分析，本次不分析: {str(e)}")
+            return
+        for method in ("post_ui_event", "drain_ui_queue", "render_ui_event", "check_mouse_position"):
+            self.profile.spans.wrap(self, method)
+
+    def finish_profile(self):
+        """保存性能分析结果并在界面中显示摘要"""
+        profile, self.profile = self.profile, None
+        if profile is None:
+            return
+        try:
+            stats_path, summary_path, text = profile.finish()
+        except OSError as e:
+            self.post_ui_event("status", f"保存性能分析失败: {str(e)}")
+            return
+        self.post_ui_event("profile", (f"已保存 {stats_path or '（无分析数据）'} 和 {summary_path}", text))
+
+    def show_safety_warning(self):
+        """显示安全警告"""
+        messagebox.showinfo("使用说明", "MC自动寻路脚本 - 使用说明\n\n" + safety_notice())
+
+    def show_safety_banner(self):
+        """在主界面上方显示安全提示横幅"""
+        self.banner.pack(fill=tk.X, before=self.main_frame)
+
+    def hide_safety_banner(self, forever=False):
+        """关闭安全提示横幅，forever 为 True 时记住选择"""
+        self.banner.pack_forget()
+        if forever:
+            self.preferences["safety_notice_dismissed"] = True
+            try:
+                save_preferences(self.preferences)
+            except OSError as e:
+                messagebox.showerror("错误", f"保存设置失败: {str(e)}")
+
+    def post_ui_event(self, key, value):
+        """投递界面状态事件（线程安全，不阻塞工作线程）"""
+        self.ui_queue.put((key, value))
+
+    def drain_ui_queue(self):
+        """在Tk线程中按固定频率合并并渲染界面状态事件"""
+        pending = {}
+        try:
+            while True:
+                key, value = self.ui_queue.get_nowait()
+                pending[key] = value  # 同类事件只保留最新值
+        except queue.Empty:
+            pass
+
+        for key, value in pending.items():
+            if self._ui_rendered.get(key) == value:
+                continue
+            self._ui_rendered[key] = value
+            self.render_ui_event(key, value)
+
+        self.root.after(UI_REFRESH_MS, self.drain_ui_queue)
+
+    def render_ui_event(self, key, value):
+        """将单个状态事件渲染到对应控件"""
+        if key == "status":
+            self.status_label.config(text=f"状态: {value}")
+        elif key == "action":
+            self.current_action_label.config(text=f"当前动作: {value}")
+        elif key == "cycle":
+            self.cycle_label.config(text=f"循环次数: {value}")
+        elif key == "point":
+            self.current_point_label.config(text=f"当前坐标点: {value}")
+        elif key == "profile":
+            self.show_text_window("性能分析", *value, geometry="900x500")
+        elif key == "running":
+            self.start_btn.config(state=tk.DISABLED if value else tk.NORMAL)
+            self.resume_btn.config(state=tk.DISABLED if value else tk.NORMAL)
+            self.nearest_btn.config(state=tk.DISABLED if value else tk.NORMAL)
+            self.stop_btn.config(state=tk.NORMAL if value else tk.DISABLED)
+            self.mark_btn.config(state=tk.NORMAL if value else tk.DISABLED)
 
     def update_status(self, message):
         """更新状态标签"""
-        self.status_label.config(text=f"状态: {message}")
-        self.root.update()
+        self.post_ui_event("status", message)
 
     def update_current_action(self, action):
         """更新当前动作显示"""
-        self.current_action_label.config(text=f"当前动作: {action}")
-        self.root.update()
-
-    def update_cycle_count(self):
-        """更新循环次数显示"""
-        total = "∞" if self.total_cycles == 0 else self.total_cycles
-        self.cycle_label.config(text=f"循环次数: {self.cycle_count}/{total}")
-        self.root.update()
+        self.post_ui_event("action", action)
 
     def update_current_point(self, point):
         """更新当前坐标点显示"""
-        self.current_point_label.config(text=f"当前坐标点: {point}")
-        self.root.update()
-
-    def send_command(self, coords):
-        """发送命令函数"""
-        try:
-            self.update_current_action(f"输入指令: .b goto {coords}")
-            pyautogui.click(x=960, y=540)  # 确保游戏窗口激活
-            pyautogui.press('t')  # 打开聊天框
-            time.sleep(1.5)
-            pyautogui.write(f".b goto {coords}", interval=0.1)  # 输入指令
-            time.sleep(0.3)
-            pyautogui.press('enter')  # 发送指令
-            time.sleep(0.5)
-        except Exception as e:
-            self.update_status(f"输入失败: {str(e)}")
+        self.post_ui_event("point", point)
 
     def check_mouse_position(self):
         """检查鼠标是否在屏幕左上角附近"""
         try:
-            x, y = pyautogui.position()
+            x, y = self.input_backend.position()
             # 如果鼠标在左上角10像素范围内，则停止程序
             if x < 10 and y < 10:
                 return True
@@ -364,98 +853,287 @@ class MinecraftAutoGotoApp:
             pass
         return False
 
-    def execute_sequence(self):
-        """执行坐标序列操作"""
+    def execute_sequence(self, engine):
+        """在工作线程中运行执行引擎（引擎只通过事件队列更新界面）"""
+        if self.profile is not None:
+            self.profile.start()
         try:
-            self.update_status("启动中...")
-            time.sleep(3)  # 给用户切换窗口的时间
-
-            # 获取起点和终点索引
-            start_idx = max(0, min(len(self.route_points) - 1, int(self.start_var.get())))
-            end_idx = max(0, min(len(self.route_points) - 1, int(self.end_var.get())))
+            engine.run()
+        finally:
+            self.finish_run()
 
-            # 确保终点索引不小于起点索引
-            if end_idx < start_idx:
-                start_idx, end_idx = end_idx, start_idx
+    async def execute_async(self, engine):
+        """在 Tk 主循环推进的事件循环中运行 asyncio 引擎"""
+        try:
+            await engine.run()
+        finally:
+            self.finish_run()
+            self.root.after_idle(self.close_async_bridge)  # 事件循环停止推进后才能关闭
+
+    def close_async_bridge(self):
+        """关闭 asyncio 引擎的事件循环，下次启动时重新创建"""
+        if self.async_bridge is not None and not self.is_running:
+            self.async_bridge.close()
+            self.async_bridge = None
+
+    def on_close(self):
+        """关闭窗口：停止正在执行的循环并关闭事件循环"""
+        if self.is_running:
+            self.stop_loop()
+        if self.async_bridge is not None:
+            self.async_bridge.close()  # 取消仍在运行的任务，执行结束时的清理在这里完成
+            self.async_bridge = None
+        self.root.destroy()
+
+    def finish_run(self):
+        """一次执行结束后停止监视线程并释放资源"""
+        if self.stop_watcher:
+            self.stop_watcher.stop()
+            self.stop_watcher = None
+        self.finish_profile()
+        self.is_running = False
+        self.release_run_resources()
+        self.post_ui_event("running", False)
 
-            # 获取循环次数
+    def release_run_resources(self):
+        """关闭本次循环使用的输入后端、到达检测器和聊天框检测，并保存测得的聊天框延迟"""
+        if self.input_backend is not None:
             try:
-                self.total_cycles = int(self.cycle_var.get())
-            except:
-                self.total_cycles = 1
-
-            self.cycle_count = 0
-            self.update_cycle_count()
-
-            while self.is_running and (self.total_cycles == 0 or self.cycle_count < self.total_cycles):
-                self.cycle_count += 1
-                self.update_cycle_count()
-                self.update_status(f"第 {self.cycle_count} 次循环")
-
-                # 执行选定范围内的点
-                for i in range(start_idx, end_idx + 1):
-                    if not self.is_running:
-                        break
-
-                    # 检查鼠标位置以快速停止
-                    if self.check_mouse_position():
-                        self.is_running = False
-                        break
-
-                    point = self.route_points[i]
-                    self.update_current_point(point["desc"])
-                    self.send_command(point["coords"])
-                    self.update_status(f"前往: {point['desc']}")
-
-                    # 等待该点设置的延迟时间
-                    total_wait = point["delay"]
-                    if total_wait > 0:
-                        for remaining in range(total_wait, 0, -1):
-                            if not self.is_running:
-                                break
-                            if self.check_mouse_position():
-                                self.is_running = False
-                                break
-                            self.update_current_action(f"{point['desc']} - 等待: {remaining}s")
-                            time.sleep(1)
-
-            self.update_status("已停止")
-        except Exception as e:
-            self.update_status(f"错误: {str(e)}")
-        finally:
-            self.is_running = False
-            self.start_btn.config(state=tk.NORMAL)
-            self.stop_btn.config(state=tk.DISABLED)
-            self.update_current_action("无")
-            self.update_current_point("无")
-
-    def start_loop(self):
-        """启动循环线程"""
+                self.input_backend.close()
+            except Exception:
+                pass
+            self.input_backend = None
+        if self.profile is not None:  # 启动前失败时丢弃性能分析
+            self.profile.spans.restore()
+            self.profile = None
+        if self.arrival_detector:
+            self.arrival_detector.close()
+            self.arrival_detector = None
+        if self.chat_probe:
+            self.chat_probe.screen.close()
+            self.chat_probe = None
+            try:
+                self.chat_latencies.save()
+            except OSError:
+                pass
+
+    def ask_position(self, title):
+        """询问当前位置，默认使用剪贴板中 F3+C 复制的坐标或客户端日志中最近的传送位置"""
+        from route_library import parse_position, position_from_log
+
+        default = None
+        try:
+            default = parse_position(self.root.clipboard_get())
+        except tk.TclError:
+            pass  # 剪贴板为空
+        if default is None:
+            default = position_from_log(self.log_path)
+        text = simpledialog.askstring(title, "当前位置（x y z，或粘贴 F3+C 复制的内容）:",
+                                      initialvalue=format_coords(*map(round, default)) if default else "",
+                                      parent=self.root)
+        if not text:
+            return None
+        position = parse_position(text)
+        if position is None:
+            messagebox.showerror("错误", f"无法解析坐标: {text}")
+        return position
+
+    def start_nearest(self):
+        """从离当前位置最近的路线点开始循环"""
+        position = self.ask_position("就近开始")
+        if position is not None:
+            self.start_loop(entry=position)
+
+    def show_nearby_routes(self):
+        """列出配置目录中经过当前位置附近的路线，双击打开"""
+        from route_library import NEAR_RADIUS, RouteLibrary
+
+        position = self.ask_position("附近的路线")
+        if position is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        if self.route_library is None or self.route_library.directory != directory:
+            self.route_library = RouteLibrary(directory)
+        self.route_library.refresh()
+        hits = self.route_library.near(position, NEAR_RADIUS)
+        if not hits:
+            nearest = self.route_library.nearest(position)
+            detail = f"，最近的是 {nearest.name}（{nearest.distance:.0f} 格）" if nearest else ""
+            messagebox.showinfo("附近的路线", f"{NEAR_RADIUS} 格内没有路线经过{detail}")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("附近的路线")
+        window.geometry("480x300")
+        columns = ("name", "distance", "index")
+        tree = ttk.Treeview(window, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(columns, ("路线", "距离(格)", "最近的点"), (260, 90, 90)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W if column == "name" else tk.E)
+        for hit in hits:
+            tree.insert("", tk.END, iid=hit.path, values=(hit.name, f"{hit.distance:.0f}", hit.index))
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        def open_selected(_event=None):
+            selection = tree.selection()
+            if selection:
+                window.destroy()
+                self.load_config(selection[0])
+
+        tree.bind("<Double-1>", open_selected)
+        ttk.Button(window, text="打开", command=open_selected).pack(pady=5)
+
+    def resume_loop(self):
+        """从上次中断的断点继续循环"""
+        self.start_loop(resume=True)
+
+    def start_loop(self, resume=False, entry=None):
+        """启动循环线程，resume 为真时从断点继续，entry 为当前位置时从最近的点开始"""
         if not self.route_points:
             messagebox.showwarning("警告", "请先添加路线点")
             return
 
         if not self.is_running:
+            use_async = self.async_var.get()
+            if use_async:
+                # 延迟导入 asyncio，不影响启动耗时；在获取任何资源之前导入，失败时不需要释放
+                try:
+                    from async_engine import AsyncRouteEngine, TkAsyncBridge
+                except ImportError as e:
+                    messagebox.showerror("错误", f"无法加载 asyncio 引擎: {str(e)}")
+                    return
+
+            try:
+                self.input_backend = create_backend(self.backend_var.get())
+            except Exception as e:
+                messagebox.showerror("错误", f"初始化输入方式失败: {str(e)}")
+                return
+
+            self.chat_probe = None
+            if self.probe_var.get() and use_async:
+                messagebox.showwarning("警告", "asyncio 引擎暂不支持聊天框检测，本次按固定延迟输入")
+            elif self.probe_var.get():
+                from chat_probe import ChatProbe, LatencyModel, create_screen
+
+                try:
+                    screen = create_screen()
+                except Exception as e:
+                    messagebox.showerror("错误", f"初始化聊天框检测失败: {str(e)}")
+                    self.release_run_resources()
+                    return
+                if self.chat_latencies is None:
+                    self.chat_latencies = LatencyModel.load()
+                self.chat_probe = ChatProbe(screen, latencies=self.chat_latencies)
+
+            self.arrival_detector = None
+            if self.arrival_var.get():
+                if not os.path.exists(self.log_path):
+                    messagebox.showwarning("警告", f"找不到客户端日志: {self.log_path}")
+                    self.release_run_resources()
+                    return
+                self.arrival_detector = ArrivalDetector(self.log_path)
+
+            # 每次启动使用新的取消事件，输入后端和停止监视线程共享该事件
+            self.cancel_event = threading.Event()
+            if self.profile_var.get():
+                self.begin_profile()  # 在创建引擎之前包装，引擎和停止检测使用计时后的方法
+            # 运行期间使用路线快照，界面中的编辑和保存到配置文件的修改在下一步开始前生效
+            watcher = None
+            if os.path.exists(self.config_file):
+                watcher = ConfigWatcher(self.config_file, self.current_settings())
+            self.reloader = PlanReloader(watcher)
+            try:
+                if use_async:
+                    engine = AsyncRouteEngine.from_settings(
+                        self.route_points.copy(),
+                        self.current_settings(),
+                        self.input_backend,
+                        arrival_detector=self.arrival_detector,
+                        on_event=self.post_ui_event,
+                        metrics=self.metrics,
+                        exporter=self.metrics_exporter,
+                        waypoints=self.waypoints if self.waypoint_var.get() else None,
+                        checkpoints=self.checkpoints,
+                        travel_log=self.load_travel_log(),
+                        reloader=self.reloader,
+                        history=self.run_recorder()
+                    )
+                else:
+                    engine = RouteEngine.from_settings(
+                        self.route_points.copy(),
+                        self.current_settings(),
+                        self.input_backend,
+                        clock=self.clock,
+                        cancel_event=self.cancel_event,
+                        arrival_detector=self.arrival_detector,
+                        on_event=self.post_ui_event,
+                        metrics=self.metrics,
+                        exporter=self.metrics_exporter,
+                        waypoints=self.waypoints if self.waypoint_var.get() else None,
+                        chat_probe=self.chat_probe,
+                        checkpoints=self.checkpoints,
+                        travel_log=self.load_travel_log(),
+                        reloader=self.reloader,
+                        history=self.run_recorder()
+                    )
+            except ValueError as e:
+                messagebox.showerror("错误", f"循环设置无效: {str(e)}")
+                self.release_run_resources()
+                return
+            except Exception as e:
+                messagebox.showerror("错误", f"创建执行引擎失败: {str(e)}")
+                self.release_run_resources()
+                return
+            if entry is not None:
+                from route_library import nearest_entry
+                engine.resume, _ = nearest_entry(engine.plan, entry)
+            elif resume:
+                engine.resume = self.checkpoints.resume_point(engine.plan)
+                if engine.resume is None:
+                    messagebox.showinfo("提示", "没有可继续的断点（路线或分段已修改，或上次已全部完成）")
+                    self.release_run_resources()
+                    return
+            if self.profile is not None:
+                if not use_async:  # 协程方法的计时只包含创建协程，不包含实际输入
+                    self.profile.spans.wrap(engine, "send_command")
+                self.profile.wrap_events(engine)
+
+            checks = [self.check_mouse_position] + hotkey_checks()
+
+            def on_emergency_stop():
+                engine.stop(self.stop_watcher.triggered_at)
+                self.update_status("检测到紧急停止")
+
+            self.stop_watcher = StopWatcher(self.cancel_event, checks, on_stop=on_emergency_stop).start()
+
+            self.engine = engine
             self.is_running = True
-            self.start_btn.config(state=tk.DISABLED)
-            self.stop_btn.config(state=tk.NORMAL)
-            threading.Thread(target=self.execute_sequence, daemon=True).start()
+            self.post_ui_event("running", True)
+            if use_async:
+                if self.async_bridge is None:
+                    self.async_bridge = TkAsyncBridge(self.root)
+                if self.profile is not None:
+                    self.profile.start()  # asyncio 引擎在主线程中运行，同时分析 Tk 的界面更新
+                self.async_bridge.start(self.execute_async(engine))
+            else:
+                threading.Thread(target=self.execute_sequence, args=(engine,), daemon=True).start()
 
     def stop_loop(self):
         """停止循环"""
-        self.is_running = False
-        self.start_btn.config(state=tk.NORMAL)
-        self.stop_btn.config(state=tk.DISABLED)
+        if self.engine is not None:
+            self.engine.stop()
+        self.cancel_event.set()
         self.update_status("正在停止...")
 
 
 class PointDialog(simpledialog.Dialog):
     """自定义点编辑对话框"""
 
-    def __init__(self, parent, title, coords="", delay=0, desc=""):
+    def __init__(self, parent, title, coords="", delay=0, desc="", pinned=False):
         self.coords = coords
         self.delay = delay
         self.desc = desc
+        self.pinned = pinned
         self.result = None
         super().__init__(parent, title)
 
@@ -475,26 +1153,21 @@ class PointDialog(simpledialog.Dialog):
         self.desc_entry.grid(row=2, column=1, padx=5, pady=5)
         self.desc_entry.insert(0, self.desc)
 
+        self.pinned_var = tk.BooleanVar(value=self.pinned)
+        ttk.Checkbutton(master, text="优化路线时固定位置", variable=self.pinned_var).grid(
+            row=3, column=1, padx=5, pady=5, sticky=tk.W)
+
         return self.coords_entry  # 初始焦点
 
     def validate(self):
         try:
-            # 验证坐标格式
-            coords = self.coords_entry.get()
-            parts = coords.split()
-            if len(parts) != 3:
-                raise ValueError("坐标格式错误")
-
-            # 验证等待时间
-            delay = int(self.delay_entry.get())
-            if delay < 0:
-                raise ValueError("等待时间不能为负数")
-
-            self.result = {
-                "coords": coords,
-                "delay": delay,
-                "desc": self.desc_entry.get()
-            }
+            # 解析并验证坐标和等待时间（支持小数秒）
+            self.result = RoutePoint.parse(
+                self.coords_entry.get(),
+                self.delay_entry.get(),
+                self.desc_entry.get(),
+                self.pinned_var.get()
+            )
             return True
         except Exception as e:
             messagebox.showerror("输入错误", str(e))
@@ -504,4 +1177,6 @@ class PointDialog(simpledialog.Dialog):
 if __name__ == "__main__":
     root = tk.Tk()
     app = MinecraftAutoGotoApp(root)
+    if os.environ.get(STARTUP_PROBE_ENV):
+        root.after_idle(root.destroy)
     root.mainloop()
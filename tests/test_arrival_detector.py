@@ -0,0 +1,104 @@
+"""到达检测：检查日志增量读取、截断和轮转后的恢复，以及等待的各种结果"""
+import os
+
+from arrival_detector import FAILED, REACHED, STOPPED, TIMEOUT, ArrivalDetector, LogTailer
+from scheduler import VirtualClock
+
+REACHED_LINE = "[12:00:01] [Render thread/INFO]: [CHAT] [Baritone] Pathing complete\n"
+FAILED_LINE = "[12:00:01] [Render thread/INFO]: [CHAT] [Baritone] Failed to compute path\n"
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_tailer_reads_only_new_complete_lines(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "old\n")
+    tailer = LogTailer(str(path))
+    assert tailer.read_lines() == []
+    append(path, "one\ntw")
+    assert tailer.read_lines() == ["one"]
+    append(path, "o\r\n")
+    assert tailer.read_lines() == ["two"]
+    tailer.close()
+
+
+def test_tailer_restarts_after_truncation(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "a long line from the previous session\n")
+    tailer = LogTailer(str(path))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("new\n")
+    assert tailer.read_lines() == ["new"]
+    tailer.close()
+
+
+def test_tailer_follows_rotated_file(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "first\n")
+    tailer = LogTailer(str(path), from_end=False)
+    assert tailer.read_lines() == ["first"]
+    os.replace(path, tmp_path / "2026-10-18-1.log")
+    # 新文件比旧偏移更长，只能通过文件标识发现轮转
+    append(path, "after restart, a longer first line\n")
+    assert tailer.read_lines() == ["after restart, a longer first line"]
+    tailer.close()
+
+
+def test_tailer_waits_for_missing_file(tmp_path):
+    path = tmp_path / "latest.log"
+    tailer = LogTailer(str(path))
+    assert tailer.read_lines() == []
+    append(path, "created\n")
+    assert tailer.read_lines() == ["created"]
+    tailer.close()
+
+
+def make_detector(path):
+    clock = VirtualClock()
+    return ArrivalDetector(str(path), clock=clock.now, sleep=clock.sleep), clock
+
+
+def test_wait_detects_reached_and_failed(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, REACHED_LINE)  # 之前的消息不算
+    detector, _ = make_detector(path)
+    detector.arm()
+    append(path, FAILED_LINE)
+    assert detector.wait(5.0) == FAILED
+    append(path, REACHED_LINE)
+    assert detector.wait(5.0) == REACHED
+    assert "Pathing complete" in detector.last_line
+    detector.close()
+
+
+def test_wait_times_out(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "")
+    detector, clock = make_detector(path)
+    detector.arm()
+    assert detector.wait(1.0) == TIMEOUT
+    assert clock.now() == 1.0
+    detector.close()
+
+
+def test_wait_returns_when_stop_requested(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "")
+    detector, clock = make_detector(path)
+    detector.arm()
+    assert detector.wait(10.0, should_stop=lambda: clock.now() >= 0.2) == STOPPED
+    assert clock.now() < 0.2 + detector.poll_interval + 1e-9
+    detector.close()
+
+
+def test_arrival_is_preferred_over_stop(tmp_path):
+    path = tmp_path / "latest.log"
+    append(path, "")
+    detector, _ = make_detector(path)
+    detector.arm()
+    append(path, REACHED_LINE)
+    assert detector.wait(10.0, should_stop=lambda: True) == REACHED
+    detector.close()
@@ -0,0 +1,104 @@
+"""聊天框就绪检测：用合成画面检查打开判定、超时重试、暗背景退回和超时收紧"""
+import pytest
+
+from chat_probe import (
+    MIN_OPEN_TIMEOUT, OPEN_TIMEOUT, OPEN_TIMEOUT_FACTOR, ChatNotReady, ChatProbe, FakeChatScreen, LatencyModel,
+)
+from input_backend import FakeInputBackend, send_chat_command
+from scheduler import VirtualClock
+
+
+def make_probe(latencies=None, **screen_kwargs):
+    clock = VirtualClock()
+    backend = FakeInputBackend.like("sendinput", clock=clock.now, sleep=clock.sleep)
+    screen = FakeChatScreen(backend, clock.now, **screen_kwargs)
+    probe = ChatProbe(screen, latencies=latencies or LatencyModel(path=None), clock=clock.now)
+    return probe, screen, backend, clock
+
+
+def pressed(backend):
+    return [key for _, action, key in backend.events if action == "press"]
+
+
+def test_detects_open_and_close():
+    probe, _, backend, _ = make_probe(open_latency=0.05, close_latency=0.03)
+    send_chat_command(backend, "/goto 1 2 3", probe=probe)
+    assert backend.typed_commands() == ["/goto 1 2 3"]
+    assert pressed(backend) == ["t", "enter"]
+    # 按实际画面变化记录延迟，误差不超过一次轮询间隔
+    assert probe.latencies.samples["open"][0] == pytest.approx(0.05, abs=probe.poll_interval + 1e-9)
+    assert probe.latencies.samples["close"][0] == pytest.approx(0.03, abs=probe.poll_interval + 1e-9)
+
+
+def test_lost_keypress_retries_once_after_esc():
+    probe, screen, backend, _ = make_probe(open_latency=None)
+    abort_chat = backend.abort_chat
+
+    def abort_and_recover():
+        abort_chat()
+        screen.open_latency = 0.05  # 第一次按 t 丢失，之后的按键正常
+
+    backend.abort_chat = abort_and_recover
+    send_chat_command(backend, "/goto 1 2 3", probe=probe)
+    assert pressed(backend) == ["t", "esc", "t", "enter"]
+    assert backend.typed_commands() == ["/goto 1 2 3"]
+    # 按 esc 关闭不计入正常的关闭延迟
+    assert len(probe.latencies.samples["close"]) == 1
+
+
+def test_gives_up_after_second_timeout():
+    probe, _, backend, _ = make_probe(open_latency=None)
+    with pytest.raises(ChatNotReady):
+        send_chat_command(backend, "/goto 1 2 3", probe=probe)
+    # 两次都没有打开：关闭聊天框，不输入指令
+    assert pressed(backend) == ["t", "esc", "t", "esc"]
+    assert backend.typed_commands() == []
+
+
+def test_dark_background_falls_back_to_typical_delay():
+    latencies = LatencyModel(path=None)
+    for _ in range(5):
+        latencies.record("open", 0.1)
+    probe, _, backend, clock = make_probe(latencies, open_latency=None, background=(5, 5, 5))
+    probe.capture_baseline()
+    backend.press("t")
+    started = clock.now()
+    probe.wait_open(backend)  # 无法判断时不抛出 ChatNotReady
+    assert clock.now() - started == pytest.approx(latencies.fallback_wait("open", backend.chat_open_delay))
+    assert len(latencies.samples["open"]) == 5
+
+
+def test_dark_background_without_history_uses_backend_delay():
+    probe, _, backend, clock = make_probe(open_latency=None, background=(5, 5, 5))
+    probe.capture_baseline()
+    started = clock.now()
+    probe.wait_open(backend)
+    assert clock.now() - started == pytest.approx(backend.chat_open_delay)
+
+
+@pytest.mark.parametrize("typical, expected", [
+    (None, OPEN_TIMEOUT),
+    (0.01, MIN_OPEN_TIMEOUT),
+    (0.2, 0.2 * OPEN_TIMEOUT_FACTOR),
+    (1.5, OPEN_TIMEOUT),
+])
+def test_open_wait_timeout_tightens_with_history(typical, expected):
+    latencies = LatencyModel(path=None)
+    if typical is not None:
+        for _ in range(10):
+            latencies.record("open", typical)
+    probe, _, _, _ = make_probe(latencies)
+    assert probe.open_wait_timeout() == pytest.approx(expected)
+
+
+def test_tightened_timeout_detects_lost_keypress_sooner():
+    latencies = LatencyModel(path=None)
+    for _ in range(10):
+        latencies.record("open", 0.05)
+    probe, _, backend, clock = make_probe(latencies, open_latency=None)
+    probe.capture_baseline()
+    backend.press("t")
+    started = clock.now()
+    with pytest.raises(ChatNotReady):
+        probe.wait_open(backend)
+    assert clock.now() - started == pytest.approx(MIN_OPEN_TIMEOUT, abs=probe.poll_interval + 1e-9)
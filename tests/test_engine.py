@@ -0,0 +1,265 @@
+"""执行引擎：用虚拟时钟和假输入后端检查循环次数、从断点继续和热加载"""
+import asyncio
+import sys
+
+import pytest
+
+from async_engine import AsyncRouteEngine, AsyncVirtualClock
+from checkpoint import ResumePoint
+from hot_reload import PlanReloader
+from input_backend import FakeInputBackend
+from metrics import EngineMetrics
+from route_engine import RouteEngine
+from route_model import Route, RoutePoint
+from route_plan import compile_plan
+from scheduler import VirtualClock
+
+SETTINGS = {"cycle_count": "2", "start_index": "0", "end_index": "3"}
+
+
+def make_route(count=4):
+    return Route([RoutePoint(index * 10, 64, 0, 5 + index, f"p{index}") for index in range(count)])
+
+
+def run_sync(plan, setup=None, **kwargs):
+    """用虚拟时钟执行到结束，setup(engine) 在开始前调用"""
+    kwargs.setdefault("countdown_interval", None)
+    clock = VirtualClock()
+    backend = FakeInputBackend.like("sendinput", clock=clock.now, sleep=clock.sleep)
+    engine = RouteEngine(plan, backend, clock=clock, startup_delay=0, **kwargs)
+    if setup is not None:
+        setup(engine)
+    engine.run()
+    return engine, clock
+
+
+def run_async(plan, setup=None, **kwargs):
+    kwargs.setdefault("countdown_interval", None)
+    clock = AsyncVirtualClock()
+    backend = FakeInputBackend.like("sendinput", clock=clock.now)
+    engine = AsyncRouteEngine(plan, backend, clock=clock, startup_delay=0, **kwargs)
+    if setup is not None:
+        setup(engine)
+    clock.run(engine.run())
+    return engine, clock
+
+
+@pytest.fixture(params=[run_sync, run_async], ids=["sync", "async"])
+def run(request):
+    return request.param
+
+
+def test_runs_all_cycles(run):
+    plan = compile_plan(make_route(), SETTINGS)
+    engine, clock = run(plan)
+    assert engine.cycle_count == 2
+    assert engine.outcome == "completed"
+    assert len(engine.backend.typed_commands()) == 2 * len(plan)
+    # 发送指令的耗时计入等待时间，两次循环共用截止时间
+    assert clock.now() == pytest.approx(2 * plan.step_time, abs=1.0)
+
+
+def test_resume_skips_completed_steps(run):
+    plan = compile_plan(make_route(), SETTINGS)
+    engine, clock = run(plan, resume=ResumePoint(1, 2, 1.5))
+    assert engine.cycle_count == 2
+    commands = engine.backend.typed_commands()
+    assert commands == [step.command for step in plan.steps[2:]]
+    # 第一步只等待断点中剩余的时间
+    assert clock.now() == pytest.approx(1.5 + plan.steps[3].delay, abs=1.0)
+
+
+def test_infinite_cycles_stop_request():
+    plan = compile_plan(make_route(), dict(SETTINGS, cycle_count="0"))
+    clock = VirtualClock()
+    backend = FakeInputBackend.like("sendinput", clock=clock.now, sleep=clock.sleep)
+
+    def on_event(key, value):
+        if key == "cycle" and engine.cycle_count == 3:
+            engine.stop()
+
+    engine = RouteEngine(plan, backend, clock=clock, startup_delay=0, countdown_interval=None, on_event=on_event)
+    engine.run()
+    assert engine.cycle_count == 3
+    assert engine.outcome == "stopped"
+
+
+def test_reload_keeps_position(run):
+    plan = compile_plan(make_route(), SETTINGS)
+    reloader = PlanReloader()
+    # 在第一次循环前面插入一个点，刚完成的点在新计划中的位置后移一位
+    route = make_route()
+    route.insert(0, RoutePoint(99, 64, 0, 3, "new"))
+    new_plan = compile_plan(route, dict(SETTINGS, end_index="4"))
+    events = []
+
+    def on_event(key, value):
+        events.append((key, value))
+        if key == "point" and value == "p1":
+            reloader.submit(new_plan)
+
+    engine, _ = run(plan, reloader=reloader, on_event=on_event)
+    assert engine.plan is new_plan
+    commands = engine.backend.typed_commands()
+    # 换用新计划后从 p2 继续（新计划的第 4 步），第二次循环执行新计划的全部 5 步
+    assert commands == [step.command for step in plan.steps] + [step.command for step in new_plan.steps]
+    assert ("status", "已应用修改，共 5 步，从第 4 步继续") in events
+
+
+def test_async_stop_cancels_task():
+    plan = compile_plan(make_route(), dict(SETTINGS, cycle_count="0"))
+    clock = AsyncVirtualClock()
+    backend = FakeInputBackend.like("sendinput", clock=clock.now)
+    engine = AsyncRouteEngine(plan, backend, clock=clock, startup_delay=0, countdown_interval=None)
+
+    async def main():
+        async def stop_later():
+            await clock.sleep(30)
+            engine.stop()
+
+        await asyncio.gather(engine.run(), stop_later())
+
+    clock.run(main())
+    assert engine.stop_requested_at == 30
+    assert engine.cycle_count == 2  # 每次循环 26 秒，在第二次循环中被取消
+    engine.stop()  # 执行结束后再次停止不出错
+
+
+def test_stop_during_last_step_records_no_cycle(run):
+    plan = compile_plan(make_route(), SETTINGS)
+    metrics = EngineMetrics()
+    history = RecordingHistory()
+    engines = []
+
+    def on_event(key, value):
+        # 倒计时在等待期间刷新，第一次循环最后一步等待期间停止
+        if key == "action" and value.startswith("p3 - 等待") and engines[0].stop_requested_at is None:
+            engines[0].stop()
+
+    engine, _ = run(plan, setup=engines.append, on_event=on_event, countdown_interval=1.0, metrics=metrics,
+                    history=history)
+    assert engine.outcome == "stopped"
+    assert engine.cycle_count == 1
+    assert metrics.cycle.count == 0
+    assert "cycle" not in history.calls
+    assert metrics.wait_error.count == len(plan) - 1  # 被打断的最后一步也不记录
+    assert history.calls[-1] == "finish"
+
+
+class RecordingHistory:
+    """只记录调用顺序的 run_history.RunRecorder 替身"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = None
+
+    def start(self, plan):
+        self.started = 0.0
+        self.calls.append("start")
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append(name)
+
+
+def test_countdown_text_matches_between_engines():
+    plan = compile_plan(make_route(), dict(SETTINGS, cycle_count="1", cycle_period="40"))
+    texts = {}
+    for runner in (run_sync, run_async):
+        events = []
+        runner(plan, countdown_interval=1.0, on_event=lambda key, value: key == "action" and events.append(value))
+        texts[runner] = [text for text in events if "等待" in text]
+    assert texts[run_sync] == texts[run_async]
+    assert texts[run_sync][0] == "p0 - 等待: 5s"
+
+
+class FakeTkRoot:
+    """只实现 after / after_cancel 的 Tk 根窗口替身，由测试手动触发回调"""
+
+    def __init__(self):
+        self.pending = {}
+        self._ids = 0
+
+    def after(self, ms, callback):
+        self._ids += 1
+        self.pending[self._ids] = callback
+        return self._ids
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_pending(self):
+        callbacks, self.pending = list(self.pending.values()), {}
+        for callback in callbacks:
+            callback()
+
+
+def test_tk_bridge_close():
+    from async_engine import TkAsyncBridge
+
+    root = FakeTkRoot()
+    bridge = TkAsyncBridge(root)
+    finished = []
+
+    async def short():
+        await asyncio.sleep(0)
+        finished.append(True)
+
+    async def forever():
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            finished.append("cancelled")
+
+    bridge.start(short())
+    for _ in range(3):
+        root.run_pending()
+    assert finished == [True]
+    assert not root.pending  # 没有任务时不再推进
+
+    bridge.start(forever())
+    root.run_pending()
+    bridge.close()
+    assert finished == [True, "cancelled"]
+    assert bridge.loop.is_closed()
+    assert not root.pending
+    bridge.close()  # 重复关闭不出错
+
+
+def test_reload_applies_renamed_points(run):
+    plan = compile_plan(make_route(), SETTINGS)
+    reloader = PlanReloader()
+    route = make_route()
+    route[3] = RoutePoint(30, 64, 0, 8, "改名")
+    renamed = compile_plan(route, SETTINGS)
+    points = []
+
+    def on_event(key, value):
+        if key == "point":
+            points.append(value)
+            if value == "p1":
+                reloader.submit(renamed)
+
+    engine, _ = run(plan, reloader=reloader, on_event=on_event)
+    assert engine.plan is renamed
+    assert points[:4] == ["p0", "p1", "p2", "改名"]
+
+
+def test_reload_keeps_old_plan_when_remap_fails(run, monkeypatch):
+    monkeypatch.setitem(sys.modules, "difflib", None)  # 如打包时排除了 difflib
+    plan = compile_plan(make_route(), SETTINGS)
+    reloader = PlanReloader()
+    route = make_route()
+    route.insert(0, RoutePoint(99, 64, 0, 3, "new"))
+    statuses = []
+
+    def on_event(key, value):
+        if key == "status":
+            statuses.append(value)
+        if key == "point" and value == "p1":
+            reloader.submit(compile_plan(route, dict(SETTINGS, end_index="4")))
+
+    engine, _ = run(plan, reloader=reloader, on_event=on_event)
+    assert engine.plan is plan
+    assert engine.outcome == "completed"
+    assert engine.backend.typed_commands() == [step.command for step in plan.steps] * 2
+    assert any(status.startswith("无法应用修改，继续按原路线执行") for status in statuses)
@@ -0,0 +1,55 @@
+"""hot_reload.remap_position：修改计划后从刚完成的一步的下一步继续"""
+from hot_reload import remap_position, same_plan
+from route_model import Route, RoutePoint
+from route_plan import compile_plan
+
+
+def make_plan(points):
+    route = Route([RoutePoint(x, 64, 0, delay, desc) for x, delay, desc in points])
+    return compile_plan(route, {"cycle_count": "1", "start_index": "0", "end_index": str(len(route) - 1)})
+
+
+OLD = make_plan([(0, 5, "a"), (10, 5, "b"), (20, 5, "c"), (30, 5, "d")])
+
+
+def test_start_of_cycle():
+    assert remap_position(OLD, OLD, 0) == 0
+
+
+def test_delay_change_keeps_position():
+    new = make_plan([(0, 5, "a"), (10, 9, "b"), (20, 5, "c"), (30, 5, "d")])
+    assert not same_plan(OLD, new)
+    assert remap_position(OLD, new, 2) == 2
+
+
+def test_insert_before_shifts_position():
+    new = make_plan([(0, 5, "a"), (5, 5, "x"), (10, 5, "b"), (20, 5, "c"), (30, 5, "d")])
+    assert remap_position(OLD, new, 2) == 3
+
+
+def test_insert_after_keeps_position():
+    new = make_plan([(0, 5, "a"), (10, 5, "b"), (20, 5, "c"), (25, 5, "x"), (30, 5, "d")])
+    assert remap_position(OLD, new, 2) == 2
+
+
+def test_deleted_point_continues_from_gap():
+    new = make_plan([(0, 5, "a"), (20, 5, "c"), (30, 5, "d")])
+    assert remap_position(OLD, new, 2) == 1
+
+
+def test_moved_point_matches_in_order():
+    new = make_plan([(0, 5, "a"), (11, 5, "b"), (20, 5, "c"), (30, 5, "d")])
+    assert remap_position(OLD, new, 2) == 2
+
+
+def test_last_step_done():
+    new = make_plan([(0, 5, "a"), (10, 5, "b"), (20, 5, "c")])
+    assert remap_position(OLD, new, 4) == 3
+
+
+def test_renamed_point_is_a_change():
+    new = make_plan([(0, 5, "a"), (10, 5, "改名"), (20, 5, "c"), (30, 5, "d")])
+    assert not same_plan(OLD, new)
+    assert same_plan(OLD, make_plan([(0, 5, "a"), (10, 5, "b"), (20, 5, "c"), (30, 5, "d")]))
+    # 被改名的点按顺序对应，位置不变
+    assert remap_position(OLD, new, 2) == 2
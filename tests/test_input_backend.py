@@ -0,0 +1,50 @@
+"""输入后端：用假后端检查输入耗时模拟、指令记录和发送流程"""
+import pytest
+
+from input_backend import BACKENDS, FakeInputBackend, send_chat_command
+from scheduler import VirtualClock
+
+
+def make_backend(name="sendinput", **kwargs):
+    clock = VirtualClock()
+    return FakeInputBackend.like(name, clock=clock.now, sleep=clock.sleep, **kwargs), clock
+
+
+@pytest.mark.parametrize("name", ["sendinput", "clipboard", "typewrite"])
+def test_like_copies_backend_timing(name):
+    backend, _ = make_backend(name)
+    for attr in ("chat_open_delay", "pre_enter_delay", "post_enter_delay", "type_interval"):
+        assert getattr(backend, attr) == getattr(BACKENDS[name], attr)
+
+
+def test_like_accepts_overrides():
+    backend, _ = make_backend("typewrite", type_interval=0.0)
+    assert backend.type_interval == 0.0
+    assert backend.chat_open_delay == BACKENDS["typewrite"].chat_open_delay
+
+
+def test_send_chat_command_sequence_and_duration():
+    backend, clock = make_backend()
+    send_chat_command(backend, "/goto 1 2 3", focus=(10, 20))
+    actions = [(action, arg) for _, action, arg in backend.events]
+    assert actions == [("click", (10, 20)), ("press", "t"), ("write", "/goto 1 2 3"), ("press", "enter")]
+    assert backend.typed_commands() == ["/goto 1 2 3"]
+    expected = backend.chat_open_delay + backend.pre_enter_delay + backend.post_enter_delay
+    assert clock.now() == pytest.approx(expected)
+
+
+def test_per_character_typing_takes_interval_per_char():
+    backend, clock = make_backend(type_interval=0.01, chat_open_delay=0, pre_enter_delay=0, post_enter_delay=0)
+    send_chat_command(backend, "/home")
+    assert [arg for _, action, arg in backend.events if action == "key"] == list("/home")
+    assert backend.typed_commands() == ["/home"]
+    assert clock.now() == pytest.approx(0.05)
+
+
+def test_typed_commands_ignores_unsent_text():
+    backend, _ = make_backend()
+    send_chat_command(backend, "/goto 1 2 3")
+    backend.press("t")
+    backend.write_text("/half")
+    backend.abort_chat()
+    assert backend.typed_commands() == ["/goto 1 2 3"]
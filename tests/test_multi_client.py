@@ -0,0 +1,72 @@
+"""多客户端并行执行：检查共享输入锁、每条指令发到自己的窗口以及停止"""
+import threading
+import time
+
+import pytest
+
+from input_backend import FakeInputBackend
+from multi_client import ClientTarget, MultiClientRunner, commands_by_window, parse_region, region_center
+from route_model import Route, RoutePoint
+from route_plan import compile_plan
+from scheduler import VirtualClock
+
+REGIONS = [(0, 0, 960, 1040), (960, 0, 960, 1040)]
+SETTINGS = {"cycle_count": "2", "start_index": "0", "end_index": "2"}
+
+
+def make_client(index, settings):
+    route = Route([RoutePoint(index * 1000 + k * 10, 64, -k, 1 + k, f"c{index}p{k}") for k in range(3)])
+    return ClientTarget(f"#{index}", route, settings, REGIONS[index])
+
+
+def make_runner(settings=SETTINGS):
+    clock = VirtualClock()
+
+    def sleep(seconds):
+        clock.sleep(seconds)
+        time.sleep(0.0005)  # 逐字输入时让出线程，制造两个客户端争用输入的机会
+
+    backend = FakeInputBackend(clock=clock.now, sleep=sleep, type_interval=0.01)
+    clients = [make_client(index, settings) for index in range(len(REGIONS))]
+    return MultiClientRunner(clients, backend, clock=clock, startup_delay=0), clients
+
+
+def test_clients_share_lock_and_type_into_own_window():
+    runner, clients = make_runner()
+    assert all(engine.input_lock is runner.input_lock for engine in runner.engines)
+    assert [engine.focus for engine in runner.engines] == [region_center(region) for region in REGIONS]
+
+    runner.start()
+    assert runner.join(timeout=30)
+    # 指令输入过程中焦点被切换时 commands_by_window 会抛出 AssertionError
+    received = commands_by_window(runner.backend.events, REGIONS)
+    for index, client in enumerate(clients):
+        plan = compile_plan(client.route, client.settings)
+        assert received[index] == [step.command for step in plan.steps] * 2
+        assert runner.engines[index].outcome == "completed"
+
+
+def test_commands_by_window_detects_focus_switch_mid_command():
+    events = [
+        (0, "click", region_center(REGIONS[0])), (0, "press", "t"), (0, "key", "/"),
+        (0, "click", region_center(REGIONS[1])), (0, "key", "x"), (0, "press", "enter"),
+    ]
+    with pytest.raises(AssertionError):
+        commands_by_window(events, REGIONS)
+
+
+def test_stop_ends_all_clients():
+    runner, _ = make_runner(dict(SETTINGS, cycle_count="0"))  # 无限循环
+    runner.start()
+    stopper = threading.Timer(0.2, runner.stop)
+    stopper.start()
+    assert runner.join(timeout=10)
+    assert runner.cancel_event.is_set()
+
+
+def test_parse_region():
+    assert parse_region("960, 0, 960, 1040") == (960, 0, 960, 1040)
+    with pytest.raises(ValueError):
+        parse_region("0,0,0,100")
+    with pytest.raises(ValueError):
+        parse_region("1,2,3")
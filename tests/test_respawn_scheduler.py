@@ -0,0 +1,118 @@
+"""RespawnScheduler：选择下一条路线、离线推算与虚拟时钟下的实际执行"""
+import math
+
+import pytest
+
+from input_backend import FakeInputBackend
+from respawn_scheduler import FAILURE_BACKOFF, RespawnScheduler, ScheduledRoute, _single_pass
+from route_model import Route, RoutePoint
+from scheduler import VirtualClock
+
+
+def make_route(name, x, respawn, delays=(10, 20, 30)):
+    route = Route([RoutePoint(x + index, 64, 0, delay, f"{name}{index}") for index, delay in enumerate(delays)])
+    settings = {"start_index": "0", "end_index": str(len(route) - 1)}
+    return ScheduledRoute(name, f"{name}.json", _single_pass(route, settings), respawn)
+
+
+class CountingScheduler(RespawnScheduler):
+    """记录 choose() 计算过赶路耗时的路线"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.examined = []
+
+    def travel_time(self, source, target):
+        self.examined.append(target.name)
+        return super().travel_time(source, target)
+
+
+def test_travel_time():
+    a, b = make_route("A", 0, 100), make_route("B", 400, 100)
+    scheduler = RespawnScheduler([a, b], travel={"A.json": {"B.json": 45}}, default_speed=4.0)
+    assert scheduler.travel_time(None, a) == 0
+    assert scheduler.travel_time(a, b) == 45
+    assert scheduler.travel_time(b, a) == pytest.approx(math.dist(b.exit, a.entry) / 4.0)
+    # 连续执行同一条路线时从终点回到起点
+    assert scheduler.travel_time(a, a) == pytest.approx(2 / 4.0)
+
+
+def test_choose_prefers_later_ready_route_when_travel_dominates():
+    here, far, late = make_route("here", 0, 100), make_route("far", 4000, 100), make_route("late", 8, 100)
+    far.ready_at, here.ready_at, late.ready_at = 10.0, 50.0, 500.0
+    scheduler = CountingScheduler([far, here, late], default_speed=4.0)
+    queue = scheduler._queue()
+    route, start = scheduler.choose(queue, now=0.0, current=here)
+    # far 最早刷新，但赶路约 1000 秒；here 在 50 秒刷新且就在附近
+    assert route is here
+    assert start == 50.0
+    # late 的刷新时刻晚于当前最优值，不需要计算赶路耗时
+    assert scheduler.examined == ["far", "here"]
+    # 未选中的路线放回队列
+    assert sorted(index for _, index in queue) == [0, 2]
+
+
+def test_choose_returns_earliest_ready_when_travel_is_equal():
+    a, b = make_route("A", 0, 100), make_route("B", 0, 100)
+    a.ready_at, b.ready_at = 30.0, 20.0
+    scheduler = RespawnScheduler([a, b], travel={"A.json": {"B.json": 5}, "B.json": {"A.json": 5}})
+    assert scheduler.choose(scheduler._queue(), now=0.0, current=None) == (b, 20.0)
+
+
+def test_project_single_route_waits_for_respawn():
+    route = make_route("A", 0, respawn=300)
+    rates = RespawnScheduler([route]).project(hours=1.0)
+    # 第一次 60 秒完成；之后每次等待刷新后开始，第一步的等待时间与等待刷新重叠
+    period = route.plan.step_time - route.plan.steps[0].delay + route.respawn
+    expected = 1 + math.floor((3600 - 60) / period)
+    assert rates["A"] == expected
+    assert rates["总计"] == expected
+
+
+def test_project_prefers_ready_route():
+    a, b = make_route("A", 0, respawn=600), make_route("B", 40, respawn=600)
+    rates = RespawnScheduler([a, b], default_speed=4.0).project(hours=1.0)
+    assert rates["A"] > 0 and rates["B"] > 0
+    assert rates["总计"] == rates["A"] + rates["B"]
+    # 两条路线轮流执行，总击杀数多于单独执行任一条
+    assert rates["总计"] > max(RespawnScheduler([a]).project()["A"], RespawnScheduler([b]).project()["B"])
+
+
+def test_project_restores_state():
+    route = make_route("A", 0, respawn=300)
+    route.ready_at, route.kills = 123.0, 4
+    RespawnScheduler([route]).project()
+    assert (route.ready_at, route.kills) == (123.0, 4)
+
+
+def test_run_matches_projection():
+    clock = VirtualClock()
+    routes = [make_route("A", 0, respawn=200), make_route("B", 40, respawn=300)]
+    scheduler = RespawnScheduler(routes, default_speed=4.0, clock=clock)
+    projected = scheduler.project(hours=0.5)
+    backend = FakeInputBackend.like("sendinput", clock=clock.now, sleep=clock.sleep)
+    actual = scheduler.run(backend, hours=0.5, countdown_interval=None)
+    assert all(record.completed for record in scheduler.history)
+    for name in ("A", "B"):
+        assert abs(actual[name] - projected[name]) <= 2 / 0.5
+
+
+def test_failed_route_backs_off():
+    clock = VirtualClock()
+    good, bad = make_route("good", 0, respawn=600), make_route("bad", 40, respawn=60)
+    scheduler = RespawnScheduler([good, bad], default_speed=4.0, clock=clock)
+
+    def on_event(key, value):
+        if key == "point" and value == "bad1":
+            raise RuntimeError("模拟执行出错")
+
+    backend = FakeInputBackend.like("sendinput", clock=clock.now, sleep=clock.sleep)
+    scheduler.run(backend, hours=0.25, on_event=on_event, countdown_interval=None)
+    failures = [record for record in scheduler.history if record.name == "bad"]
+    assert failures and not any(record.completed for record in failures)
+    assert bad.kills == 0 and good.kills > 0
+    # 每次失败后推迟的时间加倍，不会立即重新选中（出错发生在第二步开始时，两次出错的间隔不小于推迟时间）
+    gaps = [later.finished - earlier.finished for earlier, later in zip(failures, failures[1:])]
+    assert len(gaps) >= 3
+    for number, gap in enumerate(gaps):
+        assert gap >= FAILURE_BACKOFF * 2 ** number - 1e-6
@@ -0,0 +1,113 @@
+"""路线库：检查最近点查找、附近路线查找和从最近的一步开始执行"""
+import math
+import random
+
+import pytest
+
+from route_library import CELL_SIZE, NEAREST_RINGS, RouteEntry, RouteLibrary, SpatialGrid, nearest_entry
+from route_model import Route, RoutePoint
+from route_optimizer import estimate_delay
+from route_plan import compile_plan
+
+
+def make_route(coords):
+    return Route([RoutePoint(x, y, z, 5, f"p{index}") for index, (x, y, z) in enumerate(coords)])
+
+
+def make_library(*routes):
+    library = RouteLibrary()
+    library.build([RouteEntry(f"r{index}.json", f"r{index}", make_route(coords))
+                   for index, coords in enumerate(routes)])
+    return library
+
+
+def test_empty_library():
+    library = make_library()
+    assert library.nearest((0, 0, 0)) is None
+    assert library.near((0, 0, 0), 1e6) == []
+
+
+def test_nearest_checks_next_ring_before_returning():
+    # 同一网格中的点较远，相邻网格中的点更近
+    library = make_library([(0, 0, 0), (33, 0, 0)])
+    hit = library.nearest((31, 0, 0))
+    assert (hit.index, hit.distance) == (1, pytest.approx(2))
+
+
+def test_nearest_stops_at_first_ring_that_settles(monkeypatch):
+    rings = []
+    shell = SpatialGrid.shell
+
+    def recording_shell(self, center, ring):
+        rings.append(ring)
+        return shell(self, center, ring)
+
+    monkeypatch.setattr(SpatialGrid, "shell", recording_shell)
+    library = make_library([(5, 5, 5), (5000, 5, 5)])
+    assert library.nearest((1, 1, 1)).index == 0
+    assert rings == [0, 1]  # 0 圈找到的点距离超过 0，还需查第 1 圈
+
+
+def test_nearest_falls_back_to_linear_scan_when_far():
+    far = (NEAREST_RINGS + 5) * CELL_SIZE
+    library = make_library([(far, 0, 0), (-far * 2, 0, 0)])
+    hit = library.nearest((0, 0, 0))
+    assert (hit.index, hit.distance) == (0, pytest.approx(far))
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(7)
+    routes = [[tuple(rng.randint(-2000, 2000) for _ in range(3)) for _ in range(50)] for _ in range(4)]
+    library = make_library(*routes)
+    points = [(route_id, index, point) for route_id, coords in enumerate(routes)
+              for index, point in enumerate(coords)]
+    for _ in range(200):
+        position = tuple(rng.uniform(-2500, 2500) for _ in range(3))
+        expected = min(math.dist(position, point) for _, _, point in points)
+        assert library.nearest(position).distance == pytest.approx(expected)
+
+
+def test_near_uses_segment_distance():
+    # 两个点都离位置很远，但它们之间的线段经过位置附近
+    library = make_library([(-500, 64, 0), (500, 64, 0)], [(0, 64, 1000), (10, 64, 1000)])
+    hits = library.near((0, 70, 0), 10)
+    assert [(hit.name, hit.index) for hit in hits] == [("r0", 0)]
+    assert hits[0].distance == pytest.approx(6)
+
+
+def test_near_sorted_by_distance_and_limited_by_radius():
+    library = make_library([(0, 0, 40), (10, 0, 40)], [(0, 0, 20), (10, 0, 20)], [(0, 0, 200), (10, 0, 200)])
+    assert [hit.name for hit in library.near((0, 0, 0), 64)] == ["r1", "r0"]
+
+
+def test_near_with_huge_radius_visits_only_occupied_cells():
+    library = make_library([(0, 0, 0), (100, 0, 0)], [(20000, 64, -20000), (20010, 64, -20000)])
+    # 范围约为 10^14 个网格，只能遍历已占用的网格
+    assert {hit.name for hit in library.near((0, 0, 0), 1e7)} == {"r0", "r1"}
+
+
+def test_grid_box_clamps_to_occupied_bounds():
+    grid = SpatialGrid()
+    grid.add((0, 0, 0), "a")
+    grid.add((3, 1, -2), "b")
+    assert sorted(grid.box((-10**6,) * 3, (10**6,) * 3)) == ["a", "b"]
+    assert list(grid.box((1, 0, 0), (2, 5, 5))) == []
+    assert list(grid.box((4, 0, 0), (9, 9, 9))) == []
+
+
+def test_nearest_entry_starts_from_closest_step():
+    route = make_route([(0, 64, 0), (100, 64, 0), (200, 64, 0), (300, 64, 0)])
+    plan = compile_plan(route, {"cycle_count": "1", "start_index": "0", "end_index": "3"})
+    resume, distance = nearest_entry(plan, (190, 64, 30))
+    expected = next(p for p, step in enumerate(plan.steps) if step.coords == (200, 64, 0))
+    assert resume.completed_cycles == 0
+    assert resume.step == expected
+    assert distance == pytest.approx(math.dist((190, 64, 30), (200, 64, 0)))
+    assert resume.delay == estimate_delay(distance)
+
+
+def test_nearest_entry_at_point_has_no_delay():
+    route = make_route([(0, 64, 0), (100, 64, 0), (200, 64, 0)])
+    plan = compile_plan(route, {"cycle_count": "1", "start_index": "0", "end_index": "2"})
+    resume, distance = nearest_entry(plan, plan.steps[1].coords)
+    assert (resume.step, distance, resume.delay) == (1, 0, 0)
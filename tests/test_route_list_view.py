@@ -0,0 +1,166 @@
+"""路线点列表：用内存中的假 Treeview 检查增量更新、选中和虚拟模式（不需要显示器）"""
+import types
+
+import pytest
+
+import route_list_view
+from route_list_view import VIRTUAL_THRESHOLD, RouteListView
+from route_model import RoutePoint
+
+COLUMNS = ("#", "坐标", "描述")
+
+
+class FakeWidget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+    def bind(self, sequence, callback):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, *args):
+        pass
+
+
+class FakeTreeview(FakeWidget):
+    """记录行顺序、行数据和操作次数的 Treeview"""
+
+    def __init__(self, parent, columns, **kwargs):
+        self.columns = columns
+        self.order = []
+        self.values = {}
+        self.selected = ()
+        self.calls = {"insert": 0, "delete": 0, "item": 0, "set": 0}
+
+    def insert(self, parent, index, iid, values=()):
+        self.calls["insert"] += 1
+        self.order.insert(len(self.order) if index == "end" else index, iid)
+        self.values[iid] = tuple(values)
+
+    def delete(self, *iids):
+        self.calls["delete"] += len(iids)
+        for iid in iids:
+            self.order.remove(iid)
+            del self.values[iid]
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def item(self, iid, values=None):
+        self.calls["item"] += 1
+        self.values[iid] = tuple(values)
+
+    def set(self, iid, column, value):
+        self.calls["set"] += 1
+        row = list(self.values[iid])
+        row[self.columns.index(column)] = value
+        self.values[iid] = tuple(row)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def selection_remove(self, *iids):
+        self.selected = ()
+
+    def focus(self, iid):
+        pass
+
+    def see(self, iid):
+        pass
+
+    def yview(self, *args):
+        pass
+
+    def rows(self):
+        return [self.values[iid] for iid in self.order]
+
+
+@pytest.fixture
+def make_view(monkeypatch):
+    fake_ttk = types.SimpleNamespace(Frame=FakeWidget, Treeview=FakeTreeview, Scrollbar=FakeWidget)
+    monkeypatch.setattr(route_list_view, "ttk", fake_ttk)
+
+    def make(count):
+        points = [RoutePoint(index, 64, 0, 5, f"p{index}") for index in range(count)]
+        view = RouteListView(None, COLUMNS, lambda index, point: (index, point.coords, point.desc), height=5)
+        view.set_points(points)
+        return view, points
+
+    return make
+
+
+def expected_rows(points):
+    return [(index, point.coords, point.desc) for index, point in enumerate(points)]
+
+
+def reset_calls(tree):
+    for name in tree.calls:
+        tree.calls[name] = 0
+
+
+def test_insert_adds_one_row_and_renumbers_tail(make_view):
+    view, points = make_view(6)
+    reset_calls(view.tree)
+    points.insert(2, RoutePoint(99, 64, 0, 5, "new"))
+    view.inserted(2)
+    assert view.tree.rows() == expected_rows(points)
+    assert view.tree.calls["insert"] == 1 and view.tree.calls["delete"] == 0
+    assert view.tree.calls["set"] == len(points) - 3  # 只刷新插入点之后的行号
+
+
+def test_delete_removes_one_row(make_view):
+    view, points = make_view(6)
+    reset_calls(view.tree)
+    del points[1]
+    view.deleted(1)
+    assert view.tree.rows() == expected_rows(points)
+    assert view.tree.calls["delete"] == 1 and view.tree.calls["insert"] == 0
+
+
+def test_update_and_swap_touch_only_affected_rows(make_view):
+    view, points = make_view(6)
+    reset_calls(view.tree)
+    points[3] = RoutePoint(3, 70, 0, 5, "edited")
+    view.updated(3)
+    points[0], points[1] = points[1], points[0]
+    view.swapped(0, 1)
+    assert view.tree.rows() == expected_rows(points)
+    assert view.tree.calls == {"insert": 0, "delete": 0, "item": 3, "set": 0}
+
+
+def test_selected_index_follows_edits(make_view):
+    view, points = make_view(6)
+    view.select(4)
+    assert view.selected_index() == 4
+    points.insert(0, RoutePoint(99, 64, 0, 5, "new"))
+    view.inserted(0)
+    assert view.selected_index() == 5  # 同一行，索引后移
+    del points[2]
+    view.deleted(2)
+    assert view.selected_index() == 4
+    view.tree.selection_remove()
+    assert view.selected_index() is None
+
+
+def test_switches_to_virtual_mode_over_threshold(make_view):
+    view, points = make_view(VIRTUAL_THRESHOLD)
+    assert not view.virtual
+    points.append(RoutePoint(0, 0, 0, 5, "last"))
+    view.inserted(len(points) - 1)
+    assert view.virtual
+    assert len(view.tree.rows()) == view.height
+    view.select(1000)
+    assert view.selected_index() == 1000
+    assert view.tree.values[view.tree.selection()[0]] == expected_rows(points)[1000]
+    del points[0]
+    view.deleted(0)
+    assert not view.virtual
+    assert view.tree.rows() == expected_rows(points)
@@ -0,0 +1,91 @@
+"""路线数据模型：坐标和等待时间的校验，以及按列存储的编辑操作"""
+import json
+
+import pytest
+
+from route_model import MAX_COORD, Route, RouteError, RoutePoint, parse_coords, parse_delay
+from route_store import load_route_file, save_route_file
+
+
+def make_route():
+    return Route([RoutePoint(0, 64, 0, 30, "起点"), RoutePoint(100, 70, -50, 24.5, "第二点", pinned=True),
+                  RoutePoint(-20, 64, 80, 0, "第三点")])
+
+
+def test_parse_coords():
+    assert parse_coords(" 10 64  -200 ") == (10, 64, -200)
+    assert parse_coords(f"{MAX_COORD} 0 -{MAX_COORD}") == (MAX_COORD, 0, -MAX_COORD)
+    for text in ("10 64", "1 2 3 4", "1.5 64 0", "a b c", ""):
+        with pytest.raises(RouteError):
+            parse_coords(text)
+
+
+@pytest.mark.parametrize("text", ["3000000000 64 0", "0 64 -3000000000", f"{MAX_COORD + 1} 64 0"])
+def test_coords_out_of_range(text):
+    with pytest.raises(RouteError, match="超出世界范围"):
+        parse_coords(text)
+
+
+def test_parse_delay():
+    assert parse_delay("2.5") == 2.5
+    assert parse_delay(0) == 0.0
+    for value in ("-1", "abc", None, "nan", "inf"):
+        with pytest.raises(RouteError):
+            parse_delay(value)
+
+
+def test_columns_and_commands():
+    route = make_route()
+    assert len(route) == 3
+    assert route.coords(1) == (100, 70, -50)
+    assert route.commands == [".b goto 0 64 0", ".b goto 100 70 -50", ".b goto -20 64 80"]
+    assert route[1] == RoutePoint(100, 70, -50, 24.5, "第二点", pinned=True)
+
+    route[2] = RoutePoint.parse("1 2 3", "4", "改")
+    assert route.commands[2] == ".b goto 1 2 3"
+    route.insert(0, RoutePoint(5, 5, 5, 1, "新"))
+    route.swap(0, 1)
+    assert [point.desc for point in route] == ["起点", "新", "第二点", "改"]
+    assert route.pop(1).desc == "新"
+    assert route.all_coords() == [(0, 64, 0), (100, 70, -50), (1, 2, 3)]
+
+
+def test_copy_and_reorder_are_independent():
+    route = make_route()
+    copy = route.copy()
+    copy[0] = RoutePoint(9, 9, 9, 9, "副本")
+    assert route[0].desc == "起点"
+    reordered = route.reordered([2, 0, 1])
+    assert [point.desc for point in reordered] == ["第三点", "起点", "第二点"]
+    assert reordered.pinned[2] and not reordered.pinned[0]
+    assert reordered.commands[0] == ".b goto -20 64 80"
+
+
+def test_dict_round_trip():
+    route = make_route()
+    assert Route.from_dicts(route.to_dicts()).to_dicts() == route.to_dicts()
+    assert route.to_dicts()[0] == {"coords": "0 64 0", "delay": 30, "desc": "起点"}
+    with pytest.raises(RouteError, match="第 1 个路线点"):
+        Route.from_dicts([{"coords": "0 64 0"}, {"delay": 3}])
+
+
+@pytest.mark.parametrize("name", ["route.json", "route.jsonl"])
+def test_load_reports_out_of_range_coords(tmp_path, name):
+    path = str(tmp_path / name)
+    save_route_file(path, {"cycle_count": "2"}, make_route())
+    settings, loaded = load_route_file(path)
+    assert settings["cycle_count"] == "2"
+    assert loaded.to_dicts() == make_route().to_dicts()
+
+    # 把第二个点的 x 改为超出 int32 的值，加载时报告无效的点而不是抛出 OverflowError
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        if name.endswith(".jsonl"):
+            f.write(text.replace("[100,70,-50,", "[3000000000,70,-50,"))
+        else:
+            data = json.loads(text)
+            data["route_points"][1]["coords"] = "3000000000 70 -50"
+            json.dump(data, f)
+    with pytest.raises(RouteError, match="超出世界范围"):
+        load_route_file(path)
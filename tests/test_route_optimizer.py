@@ -0,0 +1,99 @@
+"""路线顺序优化：检查距离不增加、固定点和区间端点保持原位、等待时间的重新估算"""
+import random
+
+import pytest
+
+from route_model import Route, RoutePoint
+from route_optimizer import (
+    DEFAULT_SPEED, distance_matrix, estimate_delay, nearest_neighbor_path, optimize_route, optimize_segment,
+    path_length,
+)
+
+
+def random_route(count, seed, pinned=()):
+    rng = random.Random(seed)
+    return Route([RoutePoint(rng.randint(-500, 500), rng.randint(0, 128), rng.randint(-500, 500),
+                             10 + index, f"p{index}", index in pinned)
+                  for index in range(count)])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_never_worsens_distance(seed):
+    route = random_route(40, seed)
+    result = optimize_route(route, 0, len(route) - 1)
+    assert result.distance_after <= result.distance_before + 1e-6
+    assert sorted(result.order) == list(range(len(route)))
+    matrix = distance_matrix(route.all_coords())
+    assert path_length(result.order, matrix) == pytest.approx(result.distance_after)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_local_search_never_worse_than_nearest_neighbor(seed):
+    coords = random_route(60, seed).all_coords()
+    matrix = distance_matrix(coords)
+    free = list(range(1, len(coords) - 1))
+    greedy = nearest_neighbor_path(0, len(coords) - 1, free, matrix)
+    optimized = optimize_segment(0, len(coords) - 1, free, matrix)
+    assert optimized[0] == 0 and optimized[-1] == len(coords) - 1
+    assert path_length(optimized, matrix) <= path_length(greedy, matrix) + 1e-6
+
+
+def test_pinned_points_keep_positions():
+    pinned = {7, 15, 22}
+    route = random_route(30, 3, pinned)
+    result = optimize_route(route, 0, len(route) - 1)
+    for index in pinned:
+        assert result.order[index] == index
+        assert result.points.pinned[index]
+    # 固定点之间的点只在本段内重排
+    assert sorted(result.order[8:15]) == list(range(8, 15))
+
+
+def test_anchors_and_outside_points_kept():
+    route = random_route(30, 5)
+    result = optimize_route(route, 4, 20)
+    assert result.order[:5] == list(range(5))
+    assert result.order[20:] == list(range(20, 30))
+    assert sorted(result.order[5:20]) == list(range(5, 20))
+
+
+def test_anchor_and_pinned_delays_not_retimed():
+    # 终点配置了较长的刷新等待，重排后上一点改变也不应被估算值覆盖
+    route = Route([
+        RoutePoint(0, 64, 0, 5, "start"),
+        RoutePoint(300, 64, 0, 7, "far"),
+        RoutePoint(100, 64, 0, 8, "near"),
+        RoutePoint(200, 64, 0, 9, "pinned", True),
+        RoutePoint(250, 64, 0, 11, "mid"),
+        RoutePoint(240, 64, 0, 96, "end"),
+    ])
+    result = optimize_route(route, 0, len(route) - 1)
+    assert result.distance_after < result.distance_before
+    assert result.points.descs[0] == "start" and result.points.delays[0] == 5
+    assert result.points.descs[3] == "pinned" and result.points.delays[3] == 9
+    assert result.points.descs[-1] == "end" and result.points.delays[-1] == 96
+    assert 0 not in result.retimed and 3 not in result.retimed and len(route) - 1 not in result.retimed
+
+
+def test_retimed_points_use_distance_from_new_predecessor():
+    route = Route([
+        RoutePoint(0, 64, 0, 5, "start"),
+        RoutePoint(300, 64, 0, 7, "far"),
+        RoutePoint(100, 64, 0, 8, "near"),
+        RoutePoint(400, 64, 0, 96, "end"),
+    ])
+    result = optimize_route(route, 0, 3)
+    assert result.points.descs == ["start", "near", "far", "end"]
+    assert result.retimed == [1, 2]
+    assert result.points.delays[1] == estimate_delay(100, DEFAULT_SPEED)
+    assert result.points.delays[2] == estimate_delay(200, DEFAULT_SPEED)
+    assert result.points.delays[3] == 96
+    assert list(route.delays) == [5, 7, 8, 96]  # 原路线不变
+
+
+def test_already_optimal_route_not_retimed():
+    route = Route([RoutePoint(index * 10, 64, 0, 3, f"p{index}") for index in range(6)])
+    result = optimize_route(route, 0, 5)
+    assert result.order == list(range(6))
+    assert result.retimed == []
+    assert result.points.delays == route.delays
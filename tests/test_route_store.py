@@ -0,0 +1,107 @@
+"""路线文件存储：原子保存和自动保存日志的重放、压缩与基础摘要校验"""
+import os
+
+from route_model import Route, RoutePoint
+from route_store import RouteJournal, atomic_write, file_digest, load_route_file, save_route_file
+
+SETTINGS = {"cycle_count": "3", "start_index": "0", "end_index": "1", "cycle_period": "0", "segments": ""}
+
+
+def make_route():
+    return Route([RoutePoint(0, 64, 0, 30, "起点"), RoutePoint(100, 64, 0, 20, "第二点")])
+
+
+def saved_config(tmp_path):
+    path = str(tmp_path / "route.json")
+    save_route_file(path, SETTINGS, make_route())
+    return path
+
+
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    path = saved_config(tmp_path)
+    before = file_digest(path)
+
+    def fail(f):
+        f.write("{不完整")
+        raise RuntimeError("写到一半")
+
+    try:
+        atomic_write(path, fail)
+    except RuntimeError:
+        pass
+    assert file_digest(path) == before
+    assert os.listdir(tmp_path) == ["route.json"]  # 临时文件已删除
+
+
+def test_replay_edits(tmp_path):
+    path = saved_config(tmp_path)
+    journal = RouteJournal(path)
+    route = make_route()
+    journal.record_insert(1, RoutePoint(50, 64, 0, 10, "中间"))
+    journal.record_update(0, RoutePoint(1, 64, 1, 31, "起点改"))
+    journal.record_swap(1, 2)
+    journal.record_delete(1)
+    journal.close()
+    assert journal.has_pending()
+
+    settings, route = RouteJournal(path).replay(SETTINGS, route)
+    assert settings == SETTINGS
+    assert [point.desc for point in route] == ["起点改", "中间"]
+    assert route.coords(0) == (1, 64, 1)
+
+
+def test_replay_ignores_half_written_line(tmp_path):
+    path = saved_config(tmp_path)
+    journal = RouteJournal(path)
+    journal.record_delete(0)
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op":"insert","index":0,"point":{"coo')
+    replayed = RouteJournal(path)
+    _, route = replayed.replay(SETTINGS, make_route())
+    assert [point.desc for point in route] == ["第二点"]
+    assert replayed.entries == 1
+
+
+def test_compaction_keeps_result(tmp_path):
+    path = saved_config(tmp_path)
+    journal = RouteJournal(path, compact_threshold=5)
+    route = make_route()
+    for index in range(6):
+        point = RoutePoint(index, 64, 0, 1, f"p{index}")
+        route.append(point)
+        journal.record_insert(len(route) - 1, point)
+        journal.maybe_compact(dict(SETTINGS, cycle_count="7"), route)
+    # 第 5 条记录后压缩为一条快照，之后追加的记录接在快照后面
+    assert journal.entries == 2
+    journal.close()
+    with open(journal.path, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3  # 基础摘要 + 快照 + 一条插入
+
+    settings, replayed = RouteJournal(path).replay(SETTINGS, make_route())
+    assert settings["cycle_count"] == "7"
+    assert replayed.to_dicts() == route.to_dicts()
+
+
+def test_journal_for_other_base_is_not_pending(tmp_path):
+    path = saved_config(tmp_path)
+    journal = RouteJournal(path)
+    journal.record_delete(0)
+    journal.close()
+    assert journal.has_pending()
+
+    # 配置文件在日志之后被修改（如在其他地方保存），日志不再适用
+    save_route_file(path, dict(SETTINGS, cycle_count="9"), make_route())
+    assert not journal.has_pending()
+
+    journal.clear()
+    assert not os.path.exists(journal.path)
+    assert load_route_file(path)[0]["cycle_count"] == "9"
+
+
+def test_no_journal_is_not_pending(tmp_path):
+    path = saved_config(tmp_path)
+    journal = RouteJournal(path)
+    assert not journal.has_pending()
+    journal.compact(SETTINGS, make_route())
+    assert journal.has_pending()  # 快照也是编辑记录
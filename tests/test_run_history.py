@@ -0,0 +1,122 @@
+"""RunHistory：按大小轮转和聚合查询"""
+import os
+
+import pytest
+
+from run_history import RunHistory, RunRecorder
+from route_model import Route, RoutePoint
+from route_plan import compile_plan
+
+PLAN = compile_plan(Route([RoutePoint(0, 64, 0, 5, "a"), RoutePoint(10, 64, 0, 5, "b")]),
+                    {"cycle_count": "0", "start_index": "0", "end_index": "1"})
+
+
+class FakeWallClock:
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def record_run(history, route, wall_clock, cycles, seconds=10.0):
+    recorder = RunRecorder(history, route, wall_clock)
+    recorder.start(PLAN)
+    for _ in range(cycles):
+        recorder.begin_cycle(True)
+        recorder.step(0, seconds / 2)
+        recorder.step(1, seconds / 2)
+        wall_clock.now += seconds
+        recorder.cycle(seconds)
+    recorder.finish("stopped")
+    return recorder
+
+
+def test_rotation_keeps_size_bounded(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    history = RunHistory(path, max_bytes=2000, max_files=3)
+    wall_clock = FakeWallClock()
+    for _ in range(40):
+        record_run(history, "A", wall_clock, cycles=5)
+    files = history.files()
+    assert files == [f"{path}.2", f"{path}.1", path]
+    assert not os.path.exists(f"{path}.3")
+    for name in files:
+        # 每批写入前检查大小，单个文件最多超出一批记录
+        assert os.path.getsize(name) < 2000 + 1000
+    # 最旧的记录已被丢弃，剩下的记录从旧到新
+    runs = [record["start"] for record in history.records("r")]
+    assert len(runs) < 40
+    assert runs == sorted(runs)
+
+
+def test_queries(tmp_path):
+    history = RunHistory(str(tmp_path / "history.jsonl"))
+    wall_clock = FakeWallClock()
+    record_run(history, "A", wall_clock, cycles=3, seconds=10.0)
+    record_run(history, "B", wall_clock, cycles=2, seconds=30.0)
+    record_run(history, "A", wall_clock, cycles=1, seconds=40.0)
+
+    by_route = {stat.key: stat for stat in history.cycle_stats("route")}
+    assert by_route["A"].count == 4
+    assert by_route["A"].median == pytest.approx(10.0)
+    assert (by_route["A"].best, by_route["A"].worst) == (10.0, 40.0)
+    assert by_route["B"].count == 2
+
+    points = history.point_stats("A")
+    assert [stat.key for stat in points] == [0, 1]
+    assert points[0].worst == pytest.approx(20.0)
+
+    runs = history.recent_runs(2)
+    assert [run.route for run in runs] == ["A", "B"]
+    assert runs[0].cycles == 1
+
+    since = wall_clock.now - 20  # 只有最后一次循环
+    assert [record["s"] for record in history.records("c", since=since)] == [40.0]
+    assert len(list(history.records("c", route="B"))) == 2
+
+
+def test_partial_cycles_not_recorded(tmp_path):
+    history = RunHistory(str(tmp_path / "history.jsonl"))
+    recorder = RunRecorder(history, "A", FakeWallClock())
+    recorder.start(PLAN)
+    recorder.begin_cycle(False)  # 从断点中途开始
+    recorder.cycle(5.0)
+    recorder.begin_cycle(True)
+    recorder.use_plan(PLAN)  # 循环中途换用计划
+    recorder.cycle(5.0)
+    recorder.finish("completed")
+    assert list(history.records("c")) == []
+    assert history.recent_runs()[0].cycles == 2
+
+
+def test_route_prefilter_is_exact(tmp_path):
+    history = RunHistory(str(tmp_path / "history.jsonl"))
+    wall_clock = FakeWallClock()
+    record_run(history, "A", wall_clock, cycles=1)
+    record_run(history, "AB", wall_clock, cycles=2)
+    record_run(history, '名称"含引号', wall_clock, cycles=3)
+    # 字符串预筛时 "A" 是 "AB" 的前缀，解析后仍按路线名称精确过滤
+    assert len(list(history.records("c", route="A"))) == 1
+    assert len(list(history.records("c", route="AB"))) == 2
+    assert len(list(history.records("c", route='名称"含引号'))) == 3
+    assert [run.route for run in history.recent_runs()] == ['名称"含引号', "AB", "A"]
+
+
+def test_since_skips_old_rotated_files(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    history = RunHistory(path, max_bytes=500, max_files=3)
+    wall_clock = FakeWallClock()
+    for _ in range(3):
+        record_run(history, "A", wall_clock, cycles=3)
+    assert len(history.files()) > 1
+    # 轮转文件的最后修改时间早于查询起点时整个跳过，不读取其中的记录
+    old = wall_clock.now - 10_000
+    for name in history.files()[:-1]:
+        with open(name, "a", encoding="utf-8") as f:
+            f.write('{"k":"c","run":"x","route":"A","cfg":"","at":%d,"s":1,"pts":[]}\n' % wall_clock.now)
+        os.utime(name, (old, old))
+    since = wall_clock.now - 5
+    assert all(record["at"] >= since for record in history.records("c", since=since))
+    assert 1 not in [record["s"] for record in history.records("c", since=since)]
+    assert 1 in [record["s"] for record in history.records("c")]
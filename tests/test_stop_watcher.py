@@ -0,0 +1,82 @@
+"""紧急停止：检查等待被立即打断、停止条件触发取消事件和输入中途停止"""
+import threading
+import time
+
+import pytest
+
+from input_backend import FakeInputBackend, StopRequested, send_chat_command
+from scheduler import VirtualClock
+from stop_watcher import StopWatcher, corner_check
+
+
+def test_wait_is_interrupted_mid_sleep():
+    backend = FakeInputBackend()
+    backend.cancel_event = threading.Event()
+    timer = threading.Timer(0.05, backend.cancel_event.set)
+    started = time.monotonic()
+    timer.start()
+    try:
+        with pytest.raises(StopRequested):
+            backend.wait(5.0)
+    finally:
+        timer.cancel()
+    assert time.monotonic() - started < 1.0
+
+
+def test_input_is_refused_after_stop():
+    backend = FakeInputBackend()
+    backend.cancel_event = threading.Event()
+    backend.cancel_event.set()
+    with pytest.raises(StopRequested):
+        backend.press("t")
+    assert backend.events == []
+
+
+def test_stop_while_typing_closes_chat_without_sending():
+    clock = VirtualClock()
+    backend = FakeInputBackend(clock=clock.now, chat_open_delay=0.1, type_interval=0.01)
+    backend.cancel_event = threading.Event()
+
+    def sleep(seconds):
+        clock.sleep(seconds)
+        if len([event for event in backend.events if event[1] == "key"]) >= 3:
+            backend.cancel_event.set()  # 输入到第三个字符时请求停止
+
+    backend.sleep = sleep
+    with pytest.raises(StopRequested):
+        send_chat_command(backend, "/goto 1 2 3")
+    assert [key for _, action, key in backend.events if action == "press"] == ["t", "esc"]
+    assert backend.typed_commands() == []
+
+
+def test_watcher_sets_cancel_event_when_condition_met():
+    backend = FakeInputBackend()
+    cancel_event = threading.Event()
+    calls = []
+    watcher = StopWatcher(cancel_event, [corner_check(backend.position)],
+                          on_stop=lambda: calls.append(cancel_event.is_set())).start()
+    try:
+        assert not cancel_event.wait(0.05)
+        backend.cursor = (0, 0)
+        assert cancel_event.wait(1.0)
+    finally:
+        watcher.stop()
+    assert calls == [False]  # on_stop 先于取消事件调用
+    assert watcher.triggered_at is not None
+
+
+def test_failing_check_does_not_stop_watcher():
+    cancel_event = threading.Event()
+    state = {"calls": 0}
+
+    def flaky():
+        state["calls"] += 1
+        if state["calls"] < 3:
+            raise OSError("采样失败")
+        return True
+
+    watcher = StopWatcher(cancel_event, [flaky], interval=0.001).start()
+    try:
+        assert cancel_event.wait(1.0)
+    finally:
+        watcher.stop()
@@ -0,0 +1,101 @@
+"""路段耗时模型：用合成的实测记录检查拟合和建议等待时间"""
+import math
+
+import pytest
+
+from route_model import Route, RoutePoint
+from travel_model import (DELAY_STEP, TravelLog, TravelModel, TravelSample, apply_suggestions,
+                          projected_cycle_time, suggest_delays)
+
+SPEED = 4.0  # 合成记录的移动速度(方块/秒)
+OVERHEAD = 1.0  # 合成记录中每段的固定耗时(秒)，如输入指令
+
+
+def flat_seconds(start, end):
+    return OVERHEAD + math.dist(start, end) / SPEED
+
+
+def synthetic_log(segments, seconds=flat_seconds):
+    log = TravelLog(path=None)
+    for start, end in segments:
+        log.record(start, end, seconds(start, end))
+    return log
+
+
+def test_fit_needs_samples():
+    assert TravelModel.fit([]) is None
+    assert TravelModel.fit([TravelSample((0, 64, 0), (10, 64, 0), 3.5)] * 2) is None
+
+
+def test_fit_distance_model():
+    segments = [((0, 64, 0), (x, 64, 0)) for x in (8, 20, 40, 60)]
+    model = TravelModel.fit(synthetic_log(segments).samples)
+    assert not model.full
+    assert model.coefficients[0] == pytest.approx(OVERHEAD, abs=0.05)
+    assert model.coefficients[1] == pytest.approx(1 / SPEED, abs=0.01)
+    assert model.predict((0, 64, 0), (100, 64, 0)) == pytest.approx(OVERHEAD + 100 / SPEED, abs=0.5)
+    assert model.sigma == pytest.approx(0.0, abs=0.05)
+
+
+def test_fit_full_model_separates_climbing():
+    # 上升每格额外 0.5 秒，下降不额外耗时
+    def seconds(start, end):
+        horizontal = math.hypot(end[0] - start[0], end[2] - start[2])
+        return OVERHEAD + horizontal / SPEED + 0.5 * max(end[1] - start[1], 0)
+
+    segments = [((0, 64, 0), (x, 64 + dy, z)) for x, dy, z in
+                [(10, 0, 0), (20, 5, 0), (0, -5, 30), (40, 10, 10), (5, -10, 5), (30, 0, 30), (15, 3, 0), (0, 0, 50)]]
+    model = TravelModel.fit(synthetic_log(segments, seconds).samples)
+    assert model.full
+    assert model.predict((0, 64, 0), (0, 74, 40)) == pytest.approx(OVERHEAD + 10 + 5, abs=0.5)
+    assert model.predict((0, 74, 0), (0, 64, 40)) == pytest.approx(OVERHEAD + 10, abs=0.5)
+
+
+def make_route():
+    return Route([RoutePoint(0, 64, 0, 30, "起点"), RoutePoint(40, 64, 0, 30, "第二点"),
+                  RoutePoint(40, 64, 40, 30, "第三点"), RoutePoint(0, 64, 0, 96, "返回起点并等待")])
+
+
+SETTINGS = {"cycle_count": "1", "start_index": "0", "end_index": "3"}
+
+
+def test_suggest_delays_from_observations():
+    route = make_route()
+    coords = route.all_coords()
+    segments = [(coords[i - 1], coords[i]) for i in range(4)] * 3
+    suggestions = suggest_delays(route, SETTINGS, synthetic_log(segments), margin=0.2)
+    assert [s.index for s in suggestions] == [0, 1, 2, 3]
+    second = suggestions[1]
+    assert second.samples == 3
+    assert second.current == 30
+    expected = math.ceil(flat_seconds(coords[0], coords[1]) * 1.2 / DELAY_STEP - 1e-9) * DELAY_STEP
+    assert second.suggested == pytest.approx(expected, abs=DELAY_STEP)
+    # 第一步的上一点是循环的最后一点（坐标相同），只剩固定耗时
+    assert suggestions[0].distance == 0
+
+
+def test_apply_only_selected_suggestions():
+    route = make_route()
+    coords = route.all_coords()
+    log = synthetic_log([(coords[i - 1], coords[i]) for i in range(4)] * 3)
+    suggestions = suggest_delays(route, SETTINGS, log)
+    applied = apply_suggestions(route, suggestions, indices={1, 2})
+    assert applied[3].delay == 96  # 包含刷新等待的点不采用建议
+    assert applied[1].delay < 30 and applied[2].delay < 30
+    before, after = projected_cycle_time(route, SETTINGS, suggestions, indices={1, 2})
+    assert after < before
+
+
+def test_suggest_without_data():
+    suggestions = suggest_delays(make_route(), SETTINGS, TravelLog(path=None))
+    assert all(s.suggested is None and s.predicted is None for s in suggestions)
+
+
+def test_log_round_trip(tmp_path):
+    path = str(tmp_path / "travel.jsonl")
+    log = TravelLog(path)
+    log.record((0, 64, 0), (10, 64, 0), 3.25)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"from": [0, 64')  # 崩溃时只写了一半的行
+    loaded = TravelLog.load(path)
+    assert loaded.samples == [TravelSample((0, 64, 0), (10, 64, 0), 3.25)]
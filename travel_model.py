@@ -0,0 +1,228 @@
+"""路段耗时模型：记录实际行进耗时，拟合速度模型并建议最短的安全等待时间
+
+每次检测到到达（客户端日志）或手动标记到达时，把 (上一点坐标, 本点坐标, 耗时) 追加到 TravelLog。
+耗时从发送指令前开始计算，与等待时间的计算方式一致，因此已包含输入指令的时间。
+
+TravelModel 用最小二乘拟合  耗时 ≈ a + b×水平距离 + c×上升高度 + d×下降高度，
+样本较少时退化为  耗时 ≈ a + b×三维距离。
+建议等待时间 = max(模型预测 + 2×残差标准差, 该路段实测最大值) × (1 + 安全余量)，向上取整到 0.5 秒。
+包含刷新等待等非行进时间的点（如"返回起点并等待BOSS刷新"）不应采用建议值，应用时可以只选择部分点。
+
+直接运行本模块会输出配置文件各点的建议等待时间和预计节省的时间，--apply 写回配置文件。
+"""
+import json
+import math
+from collections import namedtuple
+
+from route_plan import compile_plan
+
+DEFAULT_TRAVEL_FILE = "mc_goto_travel.jsonl"
+DEFAULT_MARGIN = 0.2  # 安全余量（比例）
+DELAY_STEP = 0.5  # 建议值向上取整的粒度(秒)
+SIGMA_FACTOR = 2.0  # 预测值加上的残差标准差倍数
+MIN_SAMPLES = 3  # 拟合模型所需的最少样本数
+FULL_MODEL_SAMPLES = 8  # 使用区分水平距离和高度变化的完整模型所需的样本数
+RIDGE = 1e-3  # 正则化系数，样本集中在少数路段时保持方程可解
+MAX_SAMPLES = 5000  # 加载时只保留最近的样本
+
+TravelSample = namedtuple("TravelSample", ["start", "end", "seconds"])
+# index 为路线点序号，distance 为从上一点到该点的三维距离，predicted/suggested 无数据时为 None
+Suggestion = namedtuple("Suggestion", ["index", "desc", "distance", "current", "predicted", "suggested", "samples"])
+
+
+def _features(start, end, full):
+    dx, dy, dz = end[0] - start[0], end[1] - start[1], end[2] - start[2]
+    if full:
+        return (1.0, math.hypot(dx, dz), max(dy, 0), max(-dy, 0))
+    return (1.0, math.sqrt(dx * dx + dy * dy + dz * dz))
+
+
+def _solve(matrix, vector):
+    """高斯消元（部分主元）求解线性方程组"""
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        if abs(rows[col][col]) < 1e-12:
+            raise ValueError("样本不足以确定模型")
+        for r in range(col + 1, size):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, size + 1):
+                rows[r][c] -= factor * rows[col][c]
+    result = [0.0] * size
+    for r in range(size - 1, -1, -1):
+        result[r] = (rows[r][size] - sum(rows[r][c] * result[c] for c in range(r + 1, size))) / rows[r][r]
+    return result
+
+
+class TravelLog:
+    """实测路段耗时，追加保存到 JSON Lines 文件"""
+
+    def __init__(self, path=DEFAULT_TRAVEL_FILE):
+        self.path = path
+        self.samples = []
+
+    @classmethod
+    def load(cls, path=DEFAULT_TRAVEL_FILE):
+        log = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                        log.samples.append(TravelSample(tuple(data["from"]), tuple(data["to"]),
+                                                        float(data["seconds"])))
+                    except (ValueError, TypeError, KeyError):
+                        continue  # 崩溃时只写了一半的行
+        except OSError:
+            pass
+        del log.samples[:-MAX_SAMPLES]
+        return log
+
+    def record(self, start, end, seconds):
+        """记录一段行进耗时，写入失败时抛出 OSError（样本仍保留在内存中）"""
+        sample = TravelSample(tuple(start), tuple(end), seconds)
+        self.samples.append(sample)
+        if self.path:
+            line = json.dumps({"from": sample.start, "to": sample.end, "seconds": round(seconds, 3)})
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return sample
+
+    def by_segment(self):
+        """{(起点坐标, 终点坐标): [耗时, ...]}"""
+        segments = {}
+        for sample in self.samples:
+            segments.setdefault((sample.start, sample.end), []).append(sample.seconds)
+        return segments
+
+
+class TravelModel:
+    """按距离和高度变化预测路段耗时的线性模型"""
+
+    def __init__(self, coefficients, sigma, count):
+        self.coefficients = coefficients
+        self.full = len(coefficients) == 4
+        self.sigma = sigma  # 残差标准差(秒)
+        self.count = count
+
+    @classmethod
+    def fit(cls, samples):
+        """最小二乘拟合，样本不足时返回 None"""
+        if len(samples) < MIN_SAMPLES:
+            return None
+        full = len(samples) >= FULL_MODEL_SAMPLES
+        rows = [_features(s.start, s.end, full) for s in samples]
+        targets = [s.seconds for s in samples]
+        size = len(rows[0])
+        normal = [[sum(row[i] * row[j] for row in rows) + (RIDGE if i == j and i else 0.0) for j in range(size)]
+                  for i in range(size)]
+        rhs = [sum(row[i] * t for row, t in zip(rows, targets)) for i in range(size)]
+        try:
+            coefficients = _solve(normal, rhs)
+        except ValueError:
+            return None
+        residuals = [t - sum(c * x for c, x in zip(coefficients, row)) for row, t in zip(rows, targets)]
+        sigma = math.sqrt(sum(r * r for r in residuals) / max(1, len(samples) - size))
+        return cls(coefficients, sigma, len(samples))
+
+    def predict(self, start, end):
+        features = _features(start, end, self.full)
+        return max(0.0, sum(c * x for c, x in zip(self.coefficients, features)))
+
+
+def _round_up(seconds):
+    return math.ceil(seconds / DELAY_STEP - 1e-9) * DELAY_STEP
+
+
+def route_segments(plan):
+    """执行计划中每一步的 (上一步坐标, 本步)，第一步的上一步为循环的最后一步"""
+    steps = plan.steps
+    return [(steps[position - 1].coords, step) for position, step in enumerate(steps)]
+
+
+def suggest_delays(route, settings, log, margin=DEFAULT_MARGIN):
+    """返回执行区间内各点的 Suggestion 列表
+
+    模型只用本路线经过的路段拟合，样本不足时使用全部记录。
+    同一个点在计划中出现多次（不同的上一点）时取最大的建议值。
+    """
+    plan = compile_plan(route, settings)
+    segments = log.by_segment()
+    route_keys = {(start, step.coords) for start, step in route_segments(plan)}
+    own = [s for s in log.samples if (s.start, s.end) in route_keys]
+    model = TravelModel.fit(own) if len(own) >= FULL_MODEL_SAMPLES else None
+    model = model or TravelModel.fit(log.samples)
+
+    result = {}
+    for start, step in route_segments(plan):
+        observed = segments.get((start, step.coords), [])
+        predicted = model.predict(start, step.coords) if model else None
+        candidates = list(observed)
+        if predicted is not None:
+            candidates.append(predicted + SIGMA_FACTOR * model.sigma)
+        suggested = _round_up(max(candidates) * (1 + margin)) if candidates else None
+        previous = result.get(step.index)
+        if previous is not None and (suggested is None or (previous.suggested or 0) >= suggested):
+            continue
+        result[step.index] = Suggestion(step.index, step.desc, math.dist(start, step.coords), step.delay,
+                                        predicted, suggested, len(observed))
+    return [result[index] for index in sorted(result)]
+
+
+def projected_cycle_time(route, settings, suggestions, indices=None):
+    """返回 (当前每次循环耗时, 应用建议后的每次循环耗时)，indices 为要应用的点序号（None 表示全部）"""
+    before = compile_plan(route, settings)
+    after = compile_plan(apply_suggestions(route, suggestions, indices), settings)
+    return before.cycle_time, after.cycle_time
+
+
+def apply_suggestions(route, suggestions, indices=None):
+    """返回应用了建议等待时间的路线副本"""
+    route = route.copy()
+    for suggestion in suggestions:
+        if suggestion.suggested is None or (indices is not None and suggestion.index not in indices):
+            continue
+        point = route[suggestion.index]
+        point.delay = suggestion.suggested
+        route[suggestion.index] = point
+    return route
+
+
+def format_suggestions(suggestions):
+    lines = [f"{'序号':>4}  {'描述':<20} {'距离':>8} {'当前(s)':>8} {'预测(s)':>8} {'建议(s)':>8} {'样本':>5}"]
+    for s in suggestions:
+        predicted = "-" if s.predicted is None else f"{s.predicted:.1f}"
+        suggested = "-" if s.suggested is None else f"{s.suggested:g}"
+        lines.append(f"{s.index:>4}  {s.desc:<20} {s.distance:>8.1f} {s.current:>8g} {predicted:>8} "
+                     f"{suggested:>8} {s.samples:>5}")
+    return lines
+
+
+def main(argv=None):
+    import argparse
+
+    from route_store import load_route_file, save_route_file
+
+    parser = argparse.ArgumentParser(description="根据实测耗时建议各点的等待时间")
+    parser.add_argument("config", nargs="?", default="mc_route_config.json", help="路线配置文件")
+    parser.add_argument("--log", default=DEFAULT_TRAVEL_FILE, help="实测耗时记录文件")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="安全余量（比例，如 0.2）")
+    parser.add_argument("--points", help="只应用这些点序号，如 1,2")
+    parser.add_argument("--apply", action="store_true", help="把建议值写回配置文件")
+    args = parser.parse_args(argv)
+
+    settings, route = load_route_file(args.config)
+    suggestions = suggest_delays(route, settings, TravelLog.load(args.log), args.margin)
+    indices = {int(i) for i in args.points.split(",")} if args.points else None
+    print("\n".join(format_suggestions(suggestions)))
+    before, after = projected_cycle_time(route, settings, suggestions, indices)
+    print(f"每次循环: {before:g}s -> {after:g}s（{after - before:+g}s）")
+    if args.apply:
+        save_route_file(args.config, settings, apply_suggestions(route, suggestions, indices))
+        print(f"已写回 {args.config}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Baritone 航点模式：每个不同坐标只注册一次航点，之后用航点名称寻路
+
+".b wp save user <名称> x y z" 注册航点后，每步只需输入 ".b wp goto <名称>"，
+比完整的 ".b goto x y z" 少输入若干字符；坐标很短、用航点反而更长的点仍使用完整指令。
+航点名称由坐标计算得出，相同坐标在整条路线（以及不同路线）中共用同一个航点，
+也不会与其他坐标的旧航点混淆；两个坐标的名称冲突时，后加入的坐标追加同样由坐标计算的短后缀。
+
+WaypointRegistry 记录本次游戏会话中已注册的航点；重新进入游戏或切换世界后应调用 reset()。
+"""
+import zlib
+
+from route_model import BARITONE_PREFIX
+
+WAYPOINT_TAG = "user"
+NAME_PREFIX = "r"
+NAME_SPACE = 36 ** 5  # 名称最多 5 位 36 进制字符
+SUFFIX_SPACE = 36 ** 3  # 冲突后缀最多 3 位 36 进制字符
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _base36(number):
+    text = ""
+    while True:
+        number, digit = divmod(number, 36)
+        text = _DIGITS[digit] + text
+        if not number:
+            return text
+
+
+def _coords_key(coords):
+    return "{} {} {}".format(*coords).encode()
+
+
+def waypoint_name(coords):
+    """由坐标 (x, y, z) 生成固定的航点名称"""
+    return NAME_PREFIX + _base36(zlib.crc32(_coords_key(coords)) % NAME_SPACE)
+
+
+def disambiguator(coords, attempt=0):
+    """名称冲突时追加的后缀，同样只由坐标计算（与注册顺序无关），attempt 用于极少见的再次冲突"""
+    key = _coords_key(coords) + (b"#%d" % attempt if attempt else b"")
+    return _base36(zlib.adler32(key) % SUFFIX_SPACE)
+
+
+class WaypointRegistry:
+    """已注册航点的记录"""
+
+    def __init__(self):
+        self.names = {}  # 坐标 -> 航点名称
+        self._owners = {}  # 航点名称 -> 坐标
+        self.registered = set()  # 本次会话中已注册的航点名称
+
+    def reset(self):
+        """开始新的游戏会话，之前注册的航点需要重新注册"""
+        self.registered.clear()
+
+    def name_for(self, coords):
+        name = self.names.get(coords)
+        if name is None:
+            name = base = waypoint_name(coords)
+            attempt = 0
+            while name in self._owners:  # 哈希冲突时追加由坐标计算的后缀
+                name = f"{base}_{disambiguator(coords, attempt)}"
+                attempt += 1
+            self.names[coords] = name
+            self._owners[name] = coords
+        return name
+
+    def shortens(self, coords, command):
+        """该点使用航点指令是否比完整坐标指令更短"""
+        return len(self.goto_command(self.name_for(coords))) < len(command)
+
+    def pending(self, steps):
+        """返回执行计划各步中需要注册的 [(名称, 坐标), ...]，相同坐标只出现一次"""
+        result = []
+        seen = set()
+        for step in steps:
+            coords = step.coords
+            if not self.shortens(coords, step.command):
+                continue
+            name = self.name_for(coords)
+            if name not in self.registered and name not in seen:
+                seen.add(name)
+                result.append((name, coords))
+        return result
+
+    def mark_registered(self, name):
+        self.registered.add(name)
+
+    @staticmethod
+    def save_command(name, coords):
+        return f"{BARITONE_PREFIX} wp save {WAYPOINT_TAG} {name} " + "{} {} {}".format(*coords)
+
+    @staticmethod
+    def goto_command(name):
+        return f"{BARITONE_PREFIX} wp goto {name}"
+
+    def command_for(self, coords, command):
+        """已注册航点的点返回航点指令，其余仍使用完整坐标指令"""
+        name = self.names.get(coords)
+        if name in self.registered:
+            return self.goto_command(name)
+        return command